@@ -0,0 +1,443 @@
+import asyncio
+import os
+import threading
+import time
+
+import serial
+
+from protocol import BinaryFrameCodec, split_messages
+
+try:
+    import termios
+    import tty
+except ImportError:  # Windows: no fd-based serial I/O
+    termios = None
+    tty = None
+
+READ_CHUNK = 4096
+
+
+class AsyncSerialPort:
+    """
+    One serial link served by an AsyncSerialHub event loop (no thread of its own).
+
+    Blocking pyserial-style API for DeviceCommunicator and the I/O engine
+    (read/readline/write/in_waiting/... with the same timeout semantics), and
+    coroutines for code running on the hub loop (readline/readexactly/drain).
+
+    Received bytes are buffered StreamReader-style until a caller asks for a
+    line or N bytes. Writes go straight to the non-blocking fd when possible,
+    the rest is flushed by the loop. Backpressure: the bytes still on the
+    wire are estimated from the baud rate (10 bits/byte); a write that would
+    push that backlog above `high_water` waits up to `write_timeout` and is
+    then dropped (counted in `writes_dropped`), so a writer faster than the
+    baud rate sends fresh commands instead of queueing stale ones.
+    """
+
+    def __init__(
+        self,
+        hub,
+        fd,
+        name,
+        baud_rate=115200,
+        timeout=0.05,
+        write_timeout=None,
+        high_water=None,
+    ):
+        self.hub = hub
+        self.fd = fd
+        self.name = self.port = name
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.write_timeout = timeout if write_timeout is None else write_timeout
+        self.bytes_per_s = baud_rate / 10.0
+        # Default: ~20 ms of wire time, at least one JSON command
+        self.high_water = high_water or max(128, int(self.bytes_per_s * 0.02))
+        self.is_open = True
+        self.error = None
+
+        self._cond = threading.Condition()
+        self._rx = bytearray()
+        self._tx = bytearray()
+        self._writing = False  # Loop is watching the fd for writability
+        self._wire_bytes = 0.0  # Estimated bytes not yet sent at the baud rate
+        self._wire_t = time.monotonic()
+        self._rx_waiters = []  # Loop futures woken when bytes arrive
+
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.write_waits = 0
+        self.writes_dropped = 0
+
+    # ----- blocking API (any thread) -----
+
+    @property
+    def in_waiting(self):
+        return len(self._rx)
+
+    def read(self, size=1):
+        """Up to `size` bytes; waits up to `timeout` for all of them (like pyserial)."""
+        with self._cond:
+            self._wait(lambda: len(self._rx) >= size)
+            if not self._rx and not self.is_open:
+                raise serial.SerialException(f"{self.name} closed: {self.error}")
+            out = bytes(self._rx[:size])
+            del self._rx[:size]
+            return out
+
+    def readline(self):
+        """One line including the newline, or what arrived before `timeout`."""
+        with self._cond:
+            self._wait(lambda: b"\n" in self._rx)
+            if not self._rx and not self.is_open:
+                raise serial.SerialException(f"{self.name} closed: {self.error}")
+            end = self._rx.find(b"\n")
+            end = len(self._rx) if end < 0 else end + 1
+            out = bytes(self._rx[:end])
+            del self._rx[:end]
+            return out
+
+    def write(self, data):
+        """Queue `data`; returns the bytes accepted (0 if dropped by backpressure)."""
+        data = bytes(data)
+        with self._cond:
+            if not self.is_open:
+                raise serial.SerialException(f"{self.name} closed: {self.error}")
+            backlog = self._backlog()
+            if backlog and backlog + len(data) > self.high_water:
+                self.write_waits += 1
+                deadline = time.monotonic() + self.write_timeout
+                while self.is_open:
+                    backlog = self._backlog()
+                    excess = backlog + len(data) - self.high_water
+                    remaining = deadline - time.monotonic()
+                    if not backlog or excess <= 0 or remaining <= 0:
+                        break
+                    self._cond.wait(min(excess / self.bytes_per_s, remaining))
+                if not self.is_open:
+                    raise serial.SerialException(f"{self.name} closed: {self.error}")
+                if backlog and excess > 0:
+                    self.writes_dropped += 1
+                    return 0
+
+            self._wire_bytes += len(data)
+            self.bytes_written += len(data)
+            if self._tx:
+                self._tx += data  # Keep ordering behind what the loop is flushing
+                return len(data)
+            try:
+                sent = os.write(self.fd, data)
+            except BlockingIOError:
+                sent = 0
+            except OSError as e:
+                self.error = e
+                sent = None
+            if sent is not None:
+                if sent < len(data):
+                    self._tx += data[sent:]
+                    if not self._writing:
+                        self._writing = True
+                        self.hub.loop.call_soon_threadsafe(self._watch_writable)
+                return len(data)
+        # The fd failed: close it on the loop (outside the lock the loop needs)
+        self.close()
+        raise serial.SerialException(f"{self.name}: {self.error}")
+
+    def flush(self):
+        """Wait until every queued byte has been handed to the OS."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._tx or not self.is_open)
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._rx.clear()
+
+    def close(self):
+        if not self.is_open:
+            return
+        self.hub.call(self._close)
+
+    # ----- coroutine API (on the hub loop) -----
+
+    async def readline_async(self):
+        """Wait for and return one complete line (StreamReader.readline style)."""
+        while True:
+            with self._cond:
+                end = self._rx.find(b"\n")
+                if end >= 0:
+                    out = bytes(self._rx[: end + 1])
+                    del self._rx[: end + 1]
+                    return out
+            await self._data_arrived()
+
+    async def readexactly(self, n):
+        """Wait for and return exactly `n` bytes (e.g. one binary frame)."""
+        while True:
+            with self._cond:
+                if len(self._rx) >= n:
+                    out = bytes(self._rx[:n])
+                    del self._rx[:n]
+                    return out
+            await self._data_arrived()
+
+    async def drain(self):
+        """Wait until the estimated wire backlog is below `high_water`."""
+        while True:
+            with self._cond:
+                if not self.is_open:
+                    raise serial.SerialException(f"{self.name} closed: {self.error}")
+                excess = self._backlog() - self.high_water
+            if excess <= 0:
+                return
+            await asyncio.sleep(excess / self.bytes_per_s)
+
+    # ----- loop side -----
+
+    def _attach(self):
+        self.hub.loop.add_reader(self.fd, self._on_readable)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._fail(e)
+            return
+        if not data:
+            self._fail(EOFError("device disconnected"))
+            return
+        with self._cond:
+            self._rx += data
+            self.bytes_read += len(data)
+            self._cond.notify_all()
+        self._wake_rx_waiters()
+
+    def _watch_writable(self):
+        if self.is_open:
+            self.hub.loop.add_writer(self.fd, self._on_writable)
+
+    def _on_writable(self):
+        with self._cond:
+            try:
+                sent = os.write(self.fd, self._tx) if self._tx else 0
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self._fail(e)
+                return
+            del self._tx[:sent]
+            if not self._tx:
+                self._writing = False
+                self.hub.loop.remove_writer(self.fd)
+            self._cond.notify_all()
+
+    def _data_arrived(self):
+        future = self.hub.loop.create_future()
+        if not self.is_open:
+            future.set_exception(
+                serial.SerialException(f"{self.name} closed: {self.error}")
+            )
+        else:
+            self._rx_waiters.append(future)
+        return future
+
+    def _wake_rx_waiters(self):
+        waiters, self._rx_waiters = self._rx_waiters, []
+        for future in waiters:
+            if not future.done():
+                if self.is_open:
+                    future.set_result(None)
+                else:
+                    future.set_exception(
+                        serial.SerialException(f"{self.name} closed: {self.error}")
+                    )
+
+    def _fail(self, error):
+        """The fd failed (unplugged, hung up): close it and wake every waiter."""
+        if self.error is None:
+            self.error = error
+        self._close()
+
+    def _close(self):
+        with self._cond:
+            if not self.is_open:
+                return
+            self.is_open = False
+            self.hub._forget(self)
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self._cond.notify_all()
+        self._wake_rx_waiters()
+
+    # ----- helpers (lock held) -----
+
+    def _backlog(self):
+        now = time.monotonic()
+        drained = (now - self._wire_t) * self.bytes_per_s
+        self._wire_bytes = max(0.0, self._wire_bytes - drained)
+        self._wire_t = now
+        return max(self._wire_bytes, len(self._tx))
+
+    def _wait(self, predicate):
+        if self.timeout is None:
+            self._cond.wait_for(lambda: predicate() or not self.is_open)
+        else:
+            self._cond.wait_for(lambda: predicate() or not self.is_open, self.timeout)
+
+
+class LoopbackEndpoint:
+    """
+    Stand-in device on a pty pair, served by the hub loop (POSIX only).
+    Connect a port to `path`; every complete message (JSON line or binary
+    frame) written to it is passed to `responder(message)` and the returned
+    bytes (if any) are written back. Default: echo. `close()` acts like
+    unplugging the cable.
+    """
+
+    def __init__(self, hub, responder=None, frame_size=None):
+        if tty is None:
+            raise OSError("Loopback devices need a POSIX pty")
+        self.hub = hub
+        self.responder = responder or (lambda message: message)
+        self.frame_size = frame_size or BinaryFrameCodec().frame_size
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # Stays open, so the master never sees a hangup
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self._slave)
+        self.messages_received = 0
+        self._pending = bytearray()
+        hub.call(lambda: hub.loop.add_reader(self.master, self._on_readable))
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.master, READ_CHUNK)
+        except OSError:
+            return
+        self._pending += data
+        for message in split_messages(self._pending, self.frame_size):
+            self.messages_received += 1
+            reply = self.responder(message)
+            if reply:
+                try:
+                    os.write(self.master, reply)
+                except OSError:
+                    pass
+
+    def close(self):
+        def _close():
+            self.hub.loop.remove_reader(self.master)
+            os.close(self.master)
+            os.close(self._slave)
+
+        self.hub.call(_close)
+
+
+class AsyncSerialHub:
+    """
+    One asyncio event loop (in one "serial-hub" thread) that serves any number
+    of serial links through non-blocking file descriptors (POSIX tty/pty).
+    Adding a link registers its fd with the loop instead of starting threads.
+      - `open(path, ...)` returns an AsyncSerialPort (pyserial-like)
+      - `loopback(responder)` creates a pty stand-in device for tests
+      - `spawn(coro)` runs a coroutine (e.g. a sensor parser) on the loop
+    """
+
+    def __init__(self):
+        if termios is None:
+            raise OSError("The asyncio serial transport needs POSIX termios")
+        self.loop = asyncio.new_event_loop()
+        self.ports = set()
+        self._thread = threading.Thread(
+            target=self._run, name="serial-hub", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def call(self, fn, timeout=1.0):
+        """Run `fn()` on the loop thread and return its result."""
+        if threading.get_ident() == self._thread.ident:
+            return fn()
+
+        async def _call():
+            return fn()
+
+        return self.spawn(_call()).result(timeout)
+
+    def spawn(self, coro):
+        """Schedule a coroutine on the hub loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def open(
+        self, path, baud_rate=115200, timeout=0.05, write_timeout=None, high_water=None
+    ):
+        """Open a tty in raw non-blocking mode; raises serial.SerialException on failure."""
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError as e:
+            raise serial.SerialException(f"could not open port {path}: {e}") from e
+        try:
+            _configure_tty(fd, baud_rate)
+        except (OSError, termios.error, ValueError) as e:
+            os.close(fd)
+            raise serial.SerialException(f"could not configure {path}: {e}") from e
+        port = AsyncSerialPort(
+            self,
+            fd,
+            path,
+            baud_rate=baud_rate,
+            timeout=timeout,
+            write_timeout=write_timeout,
+            high_water=high_water,
+        )
+        self.ports.add(port)
+        self.call(port._attach)
+        return port
+
+    def loopback(self, responder=None):
+        """New LoopbackEndpoint; connect a port to its `.path`."""
+        return LoopbackEndpoint(self, responder)
+
+    def _forget(self, port):
+        self.ports.discard(port)
+        try:
+            self.loop.remove_reader(port.fd)
+            self.loop.remove_writer(port.fd)
+        except (ValueError, OSError):
+            pass
+
+    def close(self):
+        for port in list(self.ports):
+            port.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(1.0)
+
+
+def _configure_tty(fd, baud_rate):
+    """Raw 8N1 at `baud_rate`."""
+    tty.setraw(fd)
+    attrs = termios.tcgetattr(fd)
+    speed = getattr(termios, f"B{baud_rate}", None)
+    if speed is None:
+        raise ValueError(f"Unsupported baud rate: {baud_rate}")
+    attrs[4] = attrs[5] = speed  # ispeed / ospeed
+    attrs[2] |= termios.CLOCAL | termios.CREAD
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+
+_default_hub = None
+_default_hub_lock = threading.Lock()
+
+
+def default_hub():
+    """The process-wide hub shared by every DeviceCommunicator using this transport."""
+    global _default_hub
+    with _default_hub_lock:
+        if _default_hub is None:
+            _default_hub = AsyncSerialHub()
+        return _default_hub
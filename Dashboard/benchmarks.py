@@ -0,0 +1,279 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from protocol import BinaryFrameCodec, FrameDecoder
+from sim_device import SimClock, SimulatedDevice
+
+SAMPLE_COMMAND = {
+    "left_thrust_power": 4123,
+    "right_thrust_power": 3877,
+    "z_thrust_power": 5650,
+}
+
+
+def _time_per_call(fn, number):
+    """Best-of-3 mean time per call, in microseconds."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def _percentiles_ms(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    n = len(samples)
+    return {
+        "p50": samples[n * 50 // 100] * 1e3,
+        "p90": samples[min(n - 1, n * 90 // 100)] * 1e3,
+        "p99": samples[min(n - 1, n * 99 // 100)] * 1e3,
+        "max": samples[-1] * 1e3,
+    }
+
+
+def bench_serialization(number=20000):
+    """Encode/decode cost per frame for each wire format."""
+    line = (json.dumps(SAMPLE_COMMAND) + "\n").encode("utf-8")
+
+    def json_encode():
+        return (json.dumps(SAMPLE_COMMAND) + "\n").encode("utf-8")
+
+    def json_decode():
+        return json.loads(line.decode("utf-8"))
+
+    codec = BinaryFrameCodec()
+    frame = bytes(codec.encode_dict(SAMPLE_COMMAND))
+    decoder = FrameDecoder()
+
+    def binary_decode():
+        decoder.feed(frame)
+        return decoder.next_frame()
+
+    return {
+        "json": {
+            "bytes_per_frame": len(line),
+            "encode_us": _time_per_call(json_encode, number),
+            "decode_us": _time_per_call(json_decode, number),
+        },
+        "binary": {
+            "bytes_per_frame": len(frame),
+            "encode_us": _time_per_call(
+                lambda: codec.encode_dict(SAMPLE_COMMAND), number
+            ),
+            "decode_us": _time_per_call(binary_decode, number),
+        },
+    }
+
+
+def bench_round_trip(baud_rates, timeouts, rounds=50, echo_latency=0.002):
+    """Blocking send + read round trips against a simulated device."""
+    results = []
+    for wire_format in ("json", "binary"):
+        for baud_rate in baud_rates:
+            for timeout in timeouts:
+                clock = SimClock()
+                device = SimulatedDevice(
+                    baud_rate=baud_rate,
+                    timeout=timeout,
+                    wire_format=wire_format,
+                    echo_latency=echo_latency,
+                    clock=clock,
+                )
+                device.connect()
+                latencies = []
+                lost = 0
+                start = clock.now()
+                for _ in range(rounds):
+                    sent = clock.now()
+                    device.send_data(SAMPLE_COMMAND)
+                    response = device.read_response()
+                    if wire_format == "binary":
+                        # Binary reads never block; wait out the timeout like readline
+                        deadline = sent + timeout
+                        while response is None and clock.now() < deadline:
+                            time.sleep(0.0002)
+                            response = device.read_response()
+                    if response is None:
+                        lost += 1
+                    else:
+                        latencies.append(clock.now() - sent)
+                elapsed = clock.now() - start
+                device.disconnect()
+                results.append(
+                    {
+                        "format": wire_format,
+                        "baud_rate": baud_rate,
+                        "timeout": timeout,
+                        "rounds": rounds,
+                        "lost": lost,
+                        "round_trips_per_s": rounds / elapsed if elapsed else 0.0,
+                        "latency_ms": _percentiles_ms(latencies),
+                    }
+                )
+    return results
+
+
+def bench_joystick(number=2000):
+    """JoystickReader.update cost (no controller needed, measures the pygame path)."""
+    from joystick_reader import JoystickReader
+
+    results = {}
+    for mode, event_driven in (("polling", False), ("event_driven", True)):
+        try:
+            reader = JoystickReader(event_driven=event_driven)
+        except ImportError as e:  # pygame is imported by the first reader
+            return {"skipped": str(e)}
+        results[mode] = {
+            "joysticks": len(reader.joysticks),
+            "update_us": _time_per_call(reader.update, number),
+        }
+    reader.cleanup()
+    return results
+
+
+def bench_gui(frames=200):
+    """Dashboard._poll_queue cost per frame with a fresh state and a burst of log lines."""
+    try:
+        from gui import Dashboard
+
+        app = Dashboard(record=False)
+    except Exception as e:  # No display, missing Tk, ...
+        return {"skipped": f"{type(e).__name__}: {e}"}
+
+    try:
+        app.withdraw()
+        app.stop_worker()
+
+        timings = []
+        for i in range(frames):
+            value = (i % 200) / 100 - 1
+            app.channel.publish([value] * 6, [i % 2] * 16, (3300 + i, 3300 - i, 5200))
+            for j in range(20):
+                app.channel.logs.push(f'{{"ack": {i}, "line": {j}}}')
+            start = time.perf_counter()
+            app._poll_queue()
+            timings.append(time.perf_counter() - start)
+            app.update()
+        return {
+            "frames": frames,
+            "log_lines_per_frame": 20,
+            "poll_ms": _percentiles_ms(timings),
+        }
+    finally:
+        app.destroy()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, list):
+        for item in value:
+            label = "/".join(
+                str(item[k]) for k in ("format", "baud_rate", "timeout") if k in item
+            )
+            _flatten(f"{prefix}[{label}]", item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Return (metric, old, new) for every cost metric (`_us`/`_ms` timings)
+    that got more than `threshold` (relative) slower.
+    """
+    old = _flatten("", baseline.get("results", {}), {})
+    new = _flatten("", current.get("results", {}), {})
+    regressions = []
+    for key, old_value in old.items():
+        is_cost = "_us" in key or "_ms" in key
+        if not is_cost or key not in new or old_value <= 0:
+            continue
+        if (new[key] - old_value) / old_value > threshold:
+            regressions.append((key, old_value, new[key]))
+    return regressions
+
+
+SUITES = ("serialization", "round_trip", "joystick", "gui")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the control path and print the results as JSON."
+    )
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument(
+        "--baud-rates", nargs="+", type=int, default=[9600, 115200, 460800]
+    )
+    parser.add_argument("--timeouts", nargs="+", type=float, default=[0.01, 0.05])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    parser.add_argument(
+        "--compare", help="Baseline results file to check for regressions"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed relative slowdown"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    if "serialization" in args.suites:
+        results["serialization"] = bench_serialization()
+    if "round_trip" in args.suites:
+        results["round_trip"] = bench_round_trip(
+            args.baud_rates, args.timeouts, rounds=args.rounds
+        )
+    if "joystick" in args.suites:
+        results["joystick"] = bench_joystick()
+    if "gui" in args.suites:
+        results["gui"] = bench_gui()
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for key, old_value, new_value in regressions:
+            print(
+                f"REGRESSION {key}: {old_value:.3f} -> {new_value:.3f}", file=sys.stderr
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import threading
+import time
+from array import array
+from collections import deque
+
+import numpy as np
+
+from config import TelemetryConfig
+from telemetry import TELEMETRY_FIELDS
+
+
+NUM_AXES = 6
+NUM_BUTTONS = 16
+NUM_THRUSTS = 3
+HISTORY_WIDTH = NUM_AXES + NUM_THRUSTS  # History row: axes, then thrusts
+
+
+class LogRing:
+    """
+    Bounded log buffer. When full, the oldest line is discarded and
+    counted in `dropped`, so a stalled reader cannot grow memory.
+    """
+
+    def __init__(self, capacity=500):
+        self._lines = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def push(self, line):
+        if len(self._lines) == self.capacity:
+            self.dropped += 1
+        self._lines.append(line)
+
+    def drain(self):
+        """Remove and return all buffered lines, oldest first."""
+        lines = []
+        while True:
+            try:
+                lines.append(self._lines.popleft())
+            except IndexError:
+                return lines
+
+
+class HistoryRing:
+    """
+    Time series of `width` values per row in fixed-size numpy arrays, for
+    plotting: every published state (axes + thrusts) by default, or parsed
+    device telemetry. One writer appends; readers keep a cursor and copy the
+    rows appended since (`read_since`). When full, the oldest rows are
+    overwritten. `buffer` places the arrays in shared memory.
+    """
+
+    def __init__(self, capacity=65536, width=HISTORY_WIDTH, buffer=None, offset=0):
+        if buffer is None:
+            buffer = bytearray(self.nbytes(capacity, width))
+        self.capacity = capacity
+        self._written = np.ndarray((1,), np.int64, buffer, offset)
+        self.t = np.ndarray((capacity,), np.float64, buffer, offset + 8)
+        self.values = np.ndarray(
+            (capacity, width), np.float64, buffer, offset + 8 + 8 * capacity
+        )
+
+    @staticmethod
+    def nbytes(capacity, width=HISTORY_WIDTH):
+        return 8 * (1 + capacity * (1 + width))
+
+    @property
+    def written(self):
+        return int(self._written[0])
+
+    def append(self, t, axes, thrusts):
+        i = self.written % self.capacity
+        self.t[i] = t
+        row = self.values[i]
+        row[:NUM_AXES] = axes
+        row[NUM_AXES:] = thrusts
+        # Publish the row only after its contents are written
+        self._written[0] += 1
+
+    def append_row(self, t, values):
+        i = self.written % self.capacity
+        self.t[i] = t
+        self.values[i] = values
+        self._written[0] += 1
+
+    def read_since(self, cursor):
+        """(new cursor, times, values) of the rows appended since `cursor`, oldest first."""
+        written = self.written
+        # The oldest slot may be overwritten while it is copied: skip it
+        start = max(cursor, written - self.capacity + 1)
+        index = np.arange(start, written) % self.capacity
+        return written, self.t[index], self.values[index]
+
+
+class StateChannel:
+    """
+    Latest-state channel between the worker and the GUI.
+    Joystick axes/buttons and commanded thrusts live in one preallocated
+    snapshot that each `publish` overwrites and stamps with a new sequence
+    number; readers only ever see the newest state. Device log lines go
+    to a bounded LogRing (`logs`). Every published state is also kept in a
+    HistoryRing (`history`) for the plots, next to the telemetry the device
+    parser appends (`telemetry`, one column per TELEMETRY_FIELDS).
+    """
+
+    def __init__(
+        self,
+        log_capacity=500,
+        history_capacity=65536,
+        telemetry_capacity=TelemetryConfig.CAPACITY,
+    ):
+        self._lock = threading.Lock()
+        self._axes = array("d", [0.0] * NUM_AXES)
+        self._buttons = array("B", [0] * NUM_BUTTONS)
+        self._thrusts = array("l", [0] * NUM_THRUSTS)
+        self.seq = 0
+        self.logs = LogRing(log_capacity)
+        self.history = HistoryRing(history_capacity)
+        self.telemetry = HistoryRing(telemetry_capacity, len(TELEMETRY_FIELDS))
+
+    def publish(self, axes, buttons, thrusts=None):
+        """Overwrite the snapshot. Extra axes/buttons beyond the layout are ignored."""
+        with self._lock:
+            for i in range(min(len(axes), NUM_AXES)):
+                self._axes[i] = axes[i]
+            for i in range(min(len(buttons), NUM_BUTTONS)):
+                self._buttons[i] = buttons[i]
+            if thrusts is not None:
+                for i in range(min(len(thrusts), NUM_THRUSTS)):
+                    self._thrusts[i] = thrusts[i]
+            self.seq += 1
+            self.history.append(time.perf_counter(), self._axes, self._thrusts)
+
+    def snapshot(self, last_seq=-1):
+        """
+        Return (seq, axes, buttons, thrusts) as tuples, or None if nothing
+        has been published since `last_seq`.
+        """
+        with self._lock:
+            if self.seq == last_seq:
+                return None
+            return (
+                self.seq,
+                tuple(self._axes),
+                tuple(self._buttons),
+                tuple(self._thrusts),
+            )
@@ -1,10 +1,61 @@
 class SerialConfig:
-  PORT = "COM3"
+  PORT = "COM3" # Thruster board port; None = find it by the CRAMS handshake (needs DISCOVERY)
   BAUD_RATE = 115200
   TIMEOUT = 0.05 # Timeout does affect the data transfer rate between computer and Pico
+  PIPELINED_IO = True # Separate reader/writer threads so the control loop never waits on the port
+  WIRE_FORMAT = "json" # "json" (newline-delimited text) or "binary" (fixed-size CRC frames)
+  TRANSPORT = "pyserial" # "pyserial" or "asyncio" (one event loop thread serves every board; POSIX only)
+  DISCOVERY = False # Probe serial ports for boards answering the CRAMS handshake (firmware must support it)
+  PROBE_VIDS = (0x2E8A,) # Only probe USB serial devices from these vendors (Raspberry Pi); None = all (e.g. USB-TTL adapters)
+  SCAN_INTERVAL = 2.0 # Seconds between scans for newly plugged-in boards
+  RECONNECT_MAX_DELAY = 2.0 # Upper bound of the reconnect backoff (seconds)
+  STALL_TIMEOUT = 0.25 # Send neutral thrust when no ack has come back for this long (None = off)
+
+class JoystickConfig:
+  EVENT_DRIVEN = True # Consume pygame joystick events instead of polling every axis/button
+  DEADZONE = 0.05 # Stick values below this read as 0
+  CHANGE_THRESHOLD = 0.005 # Minimum axis movement that counts as a change
+
+class FilterConfig:
+  ENABLED = True # Condition the stick axes and skip unchanged thrust commands (see filters.py)
+  DEADZONE = 0.0 # Extra deadzone on every axis, applied after JoystickConfig.DEADZONE
+  MIN_CUTOFF = 1.0 # One-euro smoothing cutoff (Hz) for a resting stick; lower = smoother but laggier (None = off)
+  BETA = 5.0 # How fast the cutoff rises with stick speed (0 = plain exponential smoothing)
+  RATE_LIMIT = None # Max change of an axis per second (None = unlimited)
+  SEND_THRESHOLD = 2 # Only send a thrust command when an output moves by more than this...
+  KEEPALIVE = 0.1 # ...or this many seconds have passed since the last one (None = send every tick)
+
+class MissionConfig:
+  FILE = None # Mission script run by the control loop (JSON, see mission.py; relative to the Dashboard folder); None = manual only
+  START_BUTTON = "options_btn" # Starts the mission (None = as soon as the loop runs)
+  ABORT_BUTTON = "circle_btn" # Stops it and hands the sticks back to the pilot
+  OVERRIDE_THRESHOLD = 0.1 # Moving a stick or trigger past this takes that axis over from the mission...
+  BLEND_TIME = 0.5 # ...fading between mission and pilot over this many seconds
+
+class TelemetryConfig:
+  # Numeric fields kept from device responses (JSON keys or key=value names), in this column order
+  FIELDS = ("left_thrust_power", "right_thrust_power", "z_thrust_power", "battery_v", "current_a")
+  BINARY_FIELDS = ("left_thrust_power", "right_thrust_power", "z_thrust_power") # Values of a binary response frame, in order
+  PLOTS = (("Board thrust", ("left_thrust_power", "right_thrust_power", "z_thrust_power")), ("Battery", ("battery_v", "current_a"))) # (title, fields) strips in the History panel
+  CAPACITY = 16384 # Telemetry rows kept for the plots
+  MAX_LINE = 512 # Longer response lines are dropped as malformed
+
+class LoopConfig:
+  TARGET_HZ = 100 # Rate of the control loop (joystick -> thrust command)
+  OVERRUN_POLICY = "skip" # "skip" missed ticks or "catch_up" by running them back-to-back
+  USE_PROCESS = False # Run the control loop in its own process (shared memory to the GUI)
+  GC_PACED = True # Garbage-collect between control loop ticks (startup objects frozen) instead of mid-tick
   
+class RecorderConfig:
+  ENABLED = True # Log every control loop tick to a memory-mapped file
+  DIRECTORY = "runs" # Relative to the Dashboard folder
+  CAPACITY = 720000 # Max ticks per run (2 hours at 100 Hz)
+  FLUSH_INTERVAL = 1.0 # Seconds between background flushes to disk
+
 class MotorConfig:
   THRUST_SCALING = 1000
   THRUST_ZERO_SHIFT = 3300 # The neutral value for X/Y-Thrust Motors
   Z_THRUST_SCALING = 1000
-  Z_THRUST_ZERO_SHIFT = 5200 # The neutral value for Z-Thrust Motors
\ No newline at end of file
+  Z_THRUST_ZERO_SHIFT = 5200 # The neutral value for Z-Thrust Motors
+  MIXER = "differential" # Mixing preset (see mixer.MIXER_PRESETS)
+  SLEW_RATE = None # Max change of a thrust output per tick (None = unlimited)
\ No newline at end of file
@@ -1,22 +1,91 @@
 import serial
 import json
 
+from link_metrics import SEQ_MODULO, LinkMetrics
+from protocol import BinaryFrameCodec, FrameDecoder, JsonCommandCodec, THRUST_FIELDS
+from telemetry import ResponseParser
+
+
+WIRE_FORMATS = ("json", "binary")
+TRANSPORTS = ("pyserial", "asyncio")
+
 
 class DeviceCommunicator:
-    def __init__(self, port="COM3", baud_rate=115200, timeout=0.05):
+    def __init__(
+        self,
+        port=None,
+        baud_rate=115200,
+        timeout=0.05,
+        wire_format="json",
+        response_values=len(THRUST_FIELDS),
+        sequenced=True,
+        window=32,
+        ack_timeout=0.5,
+        transport="pyserial",
+    ):
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown wire format: {wire_format!r}")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport!r}")
         self.port = port
         self.baud_rate = baud_rate
         self.timeout = timeout
+        self.wire_format = wire_format
+        self.transport = transport
         self.ser = None
+        self.on_link_lost = None  # Called (no arguments) when the port fails
+        self._connect_error = None  # Last "Failed to connect" reason printed
+
+        # Binary framing (only used when wire_format == "binary")
+        self.codec = BinaryFrameCodec(len(THRUST_FIELDS))
+        # Preallocated JSON command lines for send_thrust
+        self.json_codec = JsonCommandCodec(THRUST_FIELDS, sequenced=sequenced)
+        self.decoder = FrameDecoder(response_values)
+        # Responses -> acks and telemetry, parsed once as the bytes arrive
+        self.parser = ResponseParser(wire_format, self.decoder, on_ack=self._on_ack)
+
+        # Command sequence numbers / acks and link health
+        self.sequenced = sequenced
+        self.seq = 0  # Next JSON command seq (binary frames use codec.seq)
+        self.metrics = LinkMetrics(window=window, ack_timeout=ack_timeout)
+        self.metrics.parser = self.parser
 
     def connect(self):
-        """Open the serial connection."""
+        """
+        Open the serial connection. Returns True on success.
+        "pyserial" transport: a serial.Serial port. "asyncio": a non-blocking
+        port served by the shared AsyncSerialHub loop (POSIX only).
+        A failure is printed once, not on every reconnect attempt, until
+        its reason changes or a connection succeeds.
+        """
+        if self.port is None:
+            self._connect_failed("no serial port set")
+            return False
         try:
-            self.ser = serial.Serial(self.port, self.baud_rate, timeout=self.timeout)
+            if self.transport == "asyncio":
+                from async_transport import default_hub  # asyncio only when used
+
+                self.ser = default_hub().open(
+                    self.port, self.baud_rate, timeout=self.timeout
+                )
+            else:
+                self.ser = serial.Serial(
+                    self.port, self.baud_rate, timeout=self.timeout
+                )
+            self.parser.reset()
+            self.metrics.reset_window()
+            self._connect_error = None
             print(f"Connected to device on {self.port} at {self.baud_rate} baud.")
-        except serial.SerialException as e:
-            print(f"Failed to connect: {e}")
+            return True
+        except (serial.SerialException, OSError) as e:
+            self._connect_failed(str(e))
             self.ser = None
+            return False
+
+    def _connect_failed(self, reason):
+        if reason != self._connect_error:
+            self._connect_error = reason
+            print(f"Failed to connect: {reason}")
 
     def disconnect(self):
         """Close the serial connection."""
@@ -29,23 +98,151 @@ class DeviceCommunicator:
         """Check if the serial device is ready."""
         return self.ser is not None and self.ser.is_open
 
+    def _link_lost(self, ser, error):
+        """Drop a port that failed (unplugged, reset, ...) so it can be reopened."""
+        if self.ser is not ser:
+            return  # Already replaced by a reconnect
+        print(f"Lost connection to {self.port}: {error}")
+        self.ser = None
+        try:
+            ser.close()
+        except Exception:
+            pass
+        if self.on_link_lost is not None:
+            self.on_link_lost()
+
     def send_data(self, data_dict):
-        """Send a dictionary to the device as JSON, followed by a newline."""
-        if not self.is_connected():
+        """
+        Send a thrust dictionary to the device.
+        JSON: the dict as JSON followed by a newline, with a "seq" field when
+        `sequenced` (the firmware acks with {"ack": seq} or by echoing "seq").
+        Binary: a fixed-size frame with the values of THRUST_FIELDS; the
+        frame seq is acked by a response frame with the same seq.
+        """
+        ser = self.ser
+        if ser is None or not ser.is_open:
             return
         try:
-            json_string = json.dumps(data_dict) + "\n"
-            self.ser.write(json_string.encode("utf-8"))
+            if self.wire_format == "binary":
+                seq = self.codec.seq
+                data = self.codec.encode_dict(data_dict)
+            else:
+                seq = self.seq
+                if self.sequenced:
+                    data_dict = dict(data_dict, seq=seq)
+                    self.seq = (seq + 1) % SEQ_MODULO
+                data = (json.dumps(data_dict) + "\n").encode("utf-8")
+            self._write_command(ser, data, seq)
+        except (serial.SerialException, OSError) as e:
+            self._link_lost(ser, e)
         except Exception as e:
             print(f"Error sending data: {e}")
 
-    def read_response(self):
-        """Non-blocking read for a line from the device."""
-        if not self.is_connected():
+    def send_thrust(self, values):
+        """
+        Send thrust outputs (a sequence in THRUST_FIELDS order, e.g.
+        Mixer.output), like send_data but without building a dict: the
+        command is encoded into the codec's reused buffer.
+        """
+        ser = self.ser
+        if ser is None or not ser.is_open:
+            return
+        try:
+            if self.wire_format == "binary":
+                seq = self.codec.seq
+                data = self.codec.encode(values)
+            else:
+                seq = self.seq
+                data = self.json_codec.encode(values, seq)
+                if self.sequenced:
+                    self.seq = (seq + 1) % SEQ_MODULO
+            self._write_command(ser, data, seq)
+        except (serial.SerialException, OSError) as e:
+            self._link_lost(ser, e)
+        except Exception as e:
+            print(f"Error sending data: {e}")
+
+    def _write_command(self, ser, data, seq):
+        # Only track commands the port took (the async port drops on backpressure)
+        written = ser.write(data)
+        if self.sequenced and written != 0:
+            self.metrics.on_send(seq, len(data))
+
+    def send_config(self, config_dict):
+        """
+        Push tuning parameters to the device as a {"config": {...}} JSON line.
+        Sent as text in both wire formats; binary frames always start with the
+        sync byte, so the firmware can tell the two apart.
+        """
+        ser = self.ser
+        if ser is None or not ser.is_open:
+            return
+        try:
+            json_string = json.dumps({"config": config_dict}) + "\n"
+            ser.write(json_string.encode("utf-8"))
+        except (serial.SerialException, OSError) as e:
+            self._link_lost(ser, e)
+        except Exception as e:
+            print(f"Error sending config: {e}")
+
+    def read_response(self, block=True):
+        """
+        Read a response from the device.
+        JSON: a line of text (blocks for up to `timeout`; a line cut off by
+        the timeout is completed by the next read). With `block=False`, only
+        a line already received (e.g. when no command awaits a reply).
+        Binary: the next complete Frame from the bytes already received, or None.
+        `parser` matches acks to sent commands and extracts the telemetry.
+        """
+        ser = self.ser
+        if ser is None or not ser.is_open:
             return None
         try:
-            line = self.ser.readline().decode("utf-8").strip()
-            return line if line else None
+            if self.wire_format == "binary" or not block:
+                return self._read_waiting(ser)
+            raw = ser.readline()
+            self.metrics.on_receive(len(raw))
+            self.parser.feed(raw)
+            return self.parser.next_response()
+        except (serial.SerialException, OSError) as e:
+            self._link_lost(ser, e)
+            return None
         except Exception as e:
             print(f"Error reading data: {e}")
             return None
+
+    def _read_waiting(self, ser):
+        """Feed whatever is waiting on the port to the parser, never blocking."""
+        response = self.parser.next_response()
+        if response is not None:
+            return response
+        waiting = ser.in_waiting
+        if waiting:
+            data = ser.read(waiting)
+            self.metrics.on_receive(len(data))
+            self.parser.feed(data)
+        return self.parser.next_response()
+
+    def read_available(self):
+        """
+        Return the raw bytes waiting on the port. If nothing is waiting, blocks
+        for at most `timeout` for the first byte. Returns b"" on timeout/error.
+        """
+        ser = self.ser
+        if ser is None or not ser.is_open:
+            return b""
+        try:
+            data = ser.read(ser.in_waiting or 1)
+            self.metrics.on_receive(len(data))
+            return data
+        except (serial.SerialException, OSError) as e:
+            self._link_lost(ser, e)
+            return b""
+        except Exception as e:
+            print(f"Error reading data: {e}")
+            return b""
+
+    def _on_ack(self, seq):
+        """Match an ack found by the parser to its command."""
+        if self.sequenced:
+            self.metrics.on_ack(seq)
@@ -0,0 +1,320 @@
+import threading
+import time
+
+import serial
+from serial.tools import list_ports
+
+from device_communicator import DeviceCommunicator
+from protocol import HANDSHAKE_REQUEST, parse_handshake
+
+THRUSTER_ROLE = "thrusters"
+
+
+def available_ports(vids=None):
+    """Serial port names on this machine, optionally only USB devices with a vendor id in `vids`."""
+    return [
+        info.device
+        for info in list_ports.comports()
+        if vids is None or info.vid in vids
+    ]
+
+
+def probe_port(port, baud_rate=115200, timeout=0.2):
+    """
+    Send the CRAMS handshake on `port` and wait up to `timeout` for the reply.
+    Returns the reply dict ({"crams": role, ...}), or None if the port could
+    not be opened or something other than CRAMS firmware is on it.
+    """
+    try:
+        with serial.Serial(port, baud_rate, timeout=timeout) as ser:
+            ser.reset_input_buffer()
+            ser.write(HANDSHAKE_REQUEST)
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                line = ser.readline()
+                if not line:
+                    break
+                reply = parse_handshake(line)
+                if reply is not None:
+                    return reply
+    except (serial.SerialException, OSError, ValueError):
+        pass
+    return None
+
+
+class Backoff:
+    """Exponential retry delay: 0 for the first retry, then `initial` doubling up to `maximum`."""
+
+    def __init__(self, initial=0.01, maximum=2.0, factor=2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempts = 0
+
+    def next_delay(self):
+        """Delay before the next attempt (call after each failed attempt)."""
+        if self.attempts == 0:
+            delay = 0.0
+        else:
+            delay = min(self.initial * self.factor ** (self.attempts - 1), self.maximum)
+        self.attempts += 1
+        return delay
+
+    def reset(self):
+        self.attempts = 0
+
+
+class ManagedLink:
+    """One board in a pool: its DeviceCommunicator plus reconnect bookkeeping."""
+
+    def __init__(self, role, device, backoff):
+        self.role = role
+        self.device = device
+        self.backoff = backoff
+        self.next_attempt = 0.0
+        self.reconnects = 0
+        self.last_connected = None
+        self.last_lost = None
+
+    def status(self):
+        return {
+            "role": self.role,
+            "port": self.device.port,
+            "connected": self.device.is_connected(),
+            "reconnects": self.reconnects,
+            "retry_in": (
+                0.0
+                if self.device.is_connected()
+                else max(self.next_attempt - time.monotonic(), 0.0)
+            ),
+        }
+
+
+class DeviceManager:
+    """
+    Finds CRAMS boards and keeps them connected.
+      - `add(role, port)` returns a DeviceCommunicator right away; it is
+        connected in the background and can be handed to the worker loop
+      - With `discovery=True`, boards are found by probing serial ports with
+        the CRAMS handshake (a fixed `port` is tried first and needs no
+        handshake); without it only fixed ports are opened
+      - A dropped link is reopened by the background thread with exponential
+        backoff; the same DeviceCommunicator object is reused, so the control
+        loop just sees `is_connected()` come back
+      - With `auto_add=True` (and discovery), newly plugged-in boards of any
+        role are added to `pools` on the next scan
+    `port_lister`, `prober` and `device_factory` can be replaced for testing.
+    """
+
+    def __init__(
+        self,
+        baud_rate=115200,
+        timeout=0.05,
+        wire_format="json",
+        scan_interval=2.0,
+        probe_timeout=0.2,
+        backoff_initial=0.01,
+        backoff_max=2.0,
+        vids=None,
+        discovery=True,
+        auto_add=False,
+        transport="pyserial",
+        port_lister=available_ports,
+        prober=probe_port,
+        device_factory=DeviceCommunicator,
+    ):
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.wire_format = wire_format
+        self.scan_interval = scan_interval
+        self.probe_timeout = probe_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.vids = vids
+        self.discovery = discovery
+        self.auto_add = auto_add
+        self.transport = transport
+        self.port_lister = port_lister
+        self.prober = prober
+        self.device_factory = device_factory
+
+        self.pools = {}  # {role: [ManagedLink]}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._thread = None
+        self._next_scan = 0.0
+
+    def add(self, role=THRUSTER_ROLE, port=None):
+        """Manage a board of `role` (on `port`, or found by handshake); returns its device."""
+        if port is None and not self.discovery:
+            print(f"No port set for {role} and discovery is off: not connecting.")
+        device = self.device_factory(
+            port=port,
+            baud_rate=self.baud_rate,
+            timeout=self.timeout,
+            wire_format=self.wire_format,
+            transport=self.transport,
+        )
+        self._add_link(role, device)
+        return device
+
+    def device(self, role=THRUSTER_ROLE, index=0):
+        """The `index`-th device of `role`, or None."""
+        links = self.pools.get(role, [])
+        return links[index].device if index < len(links) else None
+
+    def connected(self, role=THRUSTER_ROLE):
+        """Devices of `role` that are currently connected."""
+        return [
+            link.device
+            for link in self.pools.get(role, [])
+            if link.device.is_connected()
+        ]
+
+    def status(self):
+        """One status dict per managed board."""
+        with self._lock:
+            return [link.status() for links in self.pools.values() for link in links]
+
+    def start(self):
+        if not self._stopped.is_set():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._supervise, name="device-manager", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop reconnecting (ports stay as they are)."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def disconnect_all(self):
+        """Close every managed port. Call `stop()` first, or they get reopened."""
+        with self._lock:
+            links = [link for links in self.pools.values() for link in links]
+        for link in links:
+            link.device.disconnect()
+
+    def discover(self, ports=None):
+        """Probe ports not held by a connected board; returns {port: handshake reply}."""
+        if ports is None:
+            ports = self.port_lister(self.vids)
+        in_use = {
+            link.device.port
+            for links in self.pools.values()
+            for link in links
+            if link.device.is_connected()
+        }
+        found = {}
+        for port in ports:
+            if port in in_use:
+                continue
+            reply = self.prober(port, self.baud_rate, self.probe_timeout)
+            if reply is not None:
+                found[port] = reply
+        return found
+
+    def _add_link(self, role, device):
+        link = ManagedLink(
+            role, device, Backoff(self.backoff_initial, self.backoff_max)
+        )
+        device.on_link_lost = self._wake.set
+        with self._lock:
+            self.pools.setdefault(role, []).append(link)
+        self._wake.set()
+        return link
+
+    def _supervise(self):
+        while not self._stopped.is_set():
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                links = [link for links in self.pools.values() for link in links]
+
+            found = None
+            for link in links:
+                if link.device.is_connected() or now < link.next_attempt:
+                    continue
+                if link.last_connected is not None and link.last_lost is None:
+                    link.last_lost = now
+                if link.device.port is not None and link.device.connect():
+                    self._on_connected(link)
+                    continue
+                if not self.discovery:
+                    link.next_attempt = time.monotonic() + link.backoff.next_delay()
+                    continue
+                # Port gone or unknown: look for a board with the same role
+                if found is None:
+                    found = self.discover()
+                for port, reply in found.items():
+                    if reply["crams"] == link.role:
+                        del found[port]
+                        link.device.port = port
+                        if link.device.connect():
+                            self._on_connected(link)
+                        break
+                if not link.device.is_connected():
+                    link.next_attempt = time.monotonic() + link.backoff.next_delay()
+
+            if self.discovery and self.auto_add and now >= self._next_scan:
+                self._next_scan = now + self.scan_interval
+                if found is None:
+                    found = self.discover()
+                known = {link.device.port for link in links}
+                for port, reply in found.items():
+                    if port not in known:
+                        print(f"Found CRAMS {reply['crams']} board on {port}.")
+                        self.add(reply["crams"], port)
+
+            self._wake.wait(self._next_wait())
+
+    def _on_connected(self, link):
+        now = time.monotonic()
+        if link.last_lost is not None:
+            link.reconnects += 1
+            print(
+                f"Reconnected {link.role} on {link.device.port} "
+                f"after {(now - link.last_lost) * 1e3:.0f} ms."
+            )
+        link.last_connected = now
+        link.last_lost = None
+        link.backoff.reset()
+        link.next_attempt = 0.0
+
+    def _next_wait(self):
+        """Sleep until the next retry or scan is due (woken early by a lost link)."""
+        now = time.monotonic()
+        wait = self.scan_interval
+        if self.discovery and self.auto_add:
+            wait = min(wait, self._next_scan - now)
+        with self._lock:
+            for links in self.pools.values():
+                for link in links:
+                    if not link.device.is_connected():
+                        wait = min(wait, link.next_attempt - now)
+        return max(wait, 0.0)
+
+
+def format_status(status):
+    """One-line summary of DeviceManager.status() for the GUI."""
+    if not status:
+        return "Devices: none"
+    parts = []
+    for link in status:
+        if link["connected"]:
+            state = link["port"]
+        elif link["port"] is None:
+            state = "searching"
+        else:
+            state = f"lost {link['port']}, retry in {link['retry_in']:.1f} s"
+        if link["reconnects"]:
+            state += f" ({link['reconnects']} reconnects)"
+        parts.append(f"{link['role']}: {state}")
+    return "Devices: " + " | ".join(parts)
@@ -0,0 +1,67 @@
+import customtkinter as ctk
+
+REFRESH_MS = 500
+
+
+class DiagnosticsView(ctk.CTkToplevel):
+    """
+    Window with the stage timing tables (worker, serial I/O, GUI) and the
+    sampling profiler report, refreshed twice a second while open.
+    `dashboard` provides diagnostics_text(), reset_diagnostics() and
+    toggle_profiler().
+    """
+
+    def __init__(self, dashboard, **kwargs):
+        super().__init__(dashboard, **kwargs)
+        self.dashboard = dashboard
+        self.title("Diagnostics")
+        self.geometry("720x640")
+
+        self.textbox = ctk.CTkTextbox(
+            self, wrap="none", font=ctk.CTkFont(family="Courier", size=12)
+        )
+        self.textbox.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+        btn_frame = ctk.CTkFrame(self)
+        btn_frame.pack(pady=(5, 10))
+
+        reset_btn = ctk.CTkButton(
+            btn_frame, text="Reset", fg_color="gray", command=self._reset
+        )
+        reset_btn.pack(side="left", padx=5)
+
+        self.profiler_btn = ctk.CTkButton(
+            btn_frame, text="Start Profiler", command=self._toggle_profiler
+        )
+        self.profiler_btn.pack(side="left", padx=5)
+
+        print_btn = ctk.CTkButton(
+            btn_frame, text="Print to Console", command=self._print
+        )
+        print_btn.pack(side="left", padx=5)
+
+        self._refresh()
+
+    def _refresh(self):
+        text = self.dashboard.diagnostics_text()
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", text)
+        self.textbox.configure(state="disabled")
+        self._after_id = self.after(REFRESH_MS, self._refresh)
+
+    def destroy(self):
+        self.after_cancel(self._after_id)
+        super().destroy()
+
+    def _reset(self):
+        self.dashboard.reset_diagnostics()
+
+    def _toggle_profiler(self):
+        running = self.dashboard.toggle_profiler()
+        self.profiler_btn.configure(
+            text="Stop Profiler" if running else "Start Profiler"
+        )
+
+    def _print(self):
+        print(self.dashboard.diagnostics_text())
@@ -0,0 +1,216 @@
+import math
+
+import numpy as np
+
+from config import FilterConfig
+from joystick_reader import NUM_AXES
+from protocol import THRUST_FIELDS
+
+
+def _per_axis(value, n):
+    return np.array(np.broadcast_to(np.asarray(value, dtype=np.float64), (n,)))
+
+
+class InputFilter:
+    """
+    Conditions the joystick axes before they are mixed, per axis:
+      deadzone -> one-euro smoothing -> rate limit
+    - `deadzone`: values inside it read as 0, the rest is rescaled to full range
+    - One-euro smoothing (Casiez et al.): an exponential filter whose cutoff
+      rises from `min_cutoff` Hz by `beta` * |speed|, so a resting stick is
+      smoothed heavily and a fast move passes with little lag. `beta=0` is a
+      plain exponential filter; `min_cutoff=None` disables smoothing.
+    - `rate_limit`: max change per second
+    Parameters may be scalars or one value per axis. All state lives in
+    preallocated arrays; `output` is updated in place by `update()`.
+    """
+
+    def __init__(
+        self,
+        num_axes=NUM_AXES,
+        deadzone=0.0,
+        min_cutoff=None,
+        beta=0.0,
+        d_cutoff=1.0,
+        rate_limit=None,
+        max_dt=0.05,
+        settle=1e-4,
+    ):
+        self.deadzone = _per_axis(deadzone, num_axes)
+        self.min_cutoff = (
+            None if min_cutoff is None else _per_axis(min_cutoff, num_axes)
+        )
+        self.beta = _per_axis(beta, num_axes)
+        self.d_tau = 1.0 / (2 * math.pi * d_cutoff)
+        self.rate_limit = (
+            None if rate_limit is None else _per_axis(rate_limit, num_axes)
+        )
+        # Caps dt after a pause, so the first move is still smoothed
+        self.max_dt = max_dt
+        self.settle = settle  # Output snaps to its target once this close
+
+        self.output = np.zeros(num_axes)  # Filtered axes
+        self.settled = True  # False while the output is still moving toward the input
+        self._target = np.zeros(num_axes)  # Input after the deadzone
+        self._smoothed = np.zeros(num_axes)
+        self._speed = np.zeros(num_axes)  # Smoothed derivative (one-euro)
+        self._previous = np.zeros(num_axes)
+        self._scratch = np.zeros(num_axes)
+        self._delta = np.zeros(num_axes)
+        self._moved = np.zeros(num_axes, dtype=bool)
+        self._target_view = memoryview(self._target)
+        self._last_ns = None
+
+    @classmethod
+    def from_config(cls, config=FilterConfig):
+        return cls(
+            deadzone=config.DEADZONE,
+            min_cutoff=config.MIN_CUTOFF,
+            beta=config.BETA,
+            rate_limit=config.RATE_LIMIT,
+        )
+
+    def reset(self):
+        """Forget the filter state (the next update passes its input through)."""
+        self._last_ns = None
+        self.settled = True
+
+    def update(self, axes, now_ns):
+        """Filter one sample of `axes` taken at `now_ns`; True if `output` changed."""
+        target = self._target
+        scratch = self._scratch
+        try:
+            self._target_view[:] = axes  # array("d") / float64 array: no temporary
+        except (TypeError, ValueError):
+            target[:] = axes
+
+        # Deadzone, rescaled so the output still spans the full range
+        np.abs(target, out=scratch)
+        scratch -= self.deadzone
+        np.maximum(scratch, 0.0, out=scratch)
+        scratch /= 1.0 - self.deadzone
+        np.copysign(scratch, target, out=target)
+
+        self._previous[:] = self.output
+        if self._last_ns is None:
+            self._last_ns = now_ns
+            self._smoothed[:] = target
+            self._speed[:] = 0.0
+            self.output[:] = target
+        else:
+            dt = min(max((now_ns - self._last_ns) * 1e-9, 1e-6), self.max_dt)
+            self._last_ns = now_ns
+            if self.min_cutoff is None:
+                self._smoothed[:] = target
+            else:
+                self._one_euro(target, dt)
+            if self.rate_limit is None:
+                self.output[:] = self._smoothed
+            else:
+                np.subtract(self._smoothed, self.output, out=scratch)
+                np.clip(
+                    scratch, -self.rate_limit * dt, self.rate_limit * dt, out=scratch
+                )
+                self.output += scratch
+
+        np.subtract(target, self.output, out=scratch)
+        np.abs(scratch, out=scratch)
+        self.settled = bool(np.less_equal(scratch, self.settle, out=self._moved).all())
+        if self.settled:
+            self.output[:] = target
+            self._smoothed[:] = target
+            self._speed[:] = 0.0
+        return bool(np.not_equal(self.output, self._previous, out=self._moved).any())
+
+    def _one_euro(self, target, dt):
+        smoothed = self._smoothed
+        speed = self._speed
+        scratch = self._scratch
+        delta = self._delta
+
+        # Speed of the input, smoothed at the fixed derivative cutoff
+        np.subtract(target, smoothed, out=delta)
+        np.divide(delta, dt, out=scratch)
+        scratch -= speed
+        scratch *= 1.0 / (1.0 + self.d_tau / dt)
+        speed += scratch
+
+        # Cutoff rises with speed; alpha = 1 / (1 + tau / dt), tau = 1 / (2 pi f)
+        np.abs(speed, out=scratch)
+        scratch *= self.beta
+        scratch += self.min_cutoff
+        scratch *= 2 * math.pi * dt
+        np.reciprocal(scratch, out=scratch)
+        scratch += 1.0
+        np.reciprocal(scratch, out=scratch)
+        # smoothed += alpha * (target - smoothed)
+        scratch *= delta
+        smoothed += scratch
+
+
+class SendGate:
+    """
+    Send-on-change for thrust commands: a command goes out only when an
+    output moved by more than `threshold` since the last command sent, or
+    `keepalive` seconds have passed, so the firmware failsafe and the link
+    watchdog still see regular traffic while the vehicle holds station.
+    """
+
+    def __init__(self, threshold=2, keepalive=0.1, num_outputs=len(THRUST_FIELDS)):
+        self.threshold = threshold
+        self.keepalive_ns = int(keepalive * 1e9)
+        self._last = [0] * num_outputs
+        self._last_ns = None
+        self.sent = 0
+        self.suppressed = 0
+
+    @classmethod
+    def from_config(cls, config=FilterConfig):
+        return cls(threshold=config.SEND_THRESHOLD, keepalive=config.KEEPALIVE)
+
+    def reset(self):
+        """Let the next command through whatever it is."""
+        self._last_ns = None
+
+    def should_send(self, outputs, now_ns):
+        """True if `outputs` should be sent at `now_ns` (then remembered as last sent)."""
+        last = self._last
+        send = self._last_ns is None or now_ns - self._last_ns >= self.keepalive_ns
+        if not send:
+            threshold = self.threshold
+            for i, value in enumerate(outputs):
+                if abs(value - last[i]) > threshold:
+                    send = True
+                    break
+        if not send:
+            self.suppressed += 1
+            return False
+        for i, value in enumerate(outputs):
+            last[i] = value
+        self._last_ns = now_ns
+        self.sent += 1
+        return True
+
+    def summary(self):
+        total = self.sent + self.suppressed
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "suppressed_rate": self.suppressed / total if total else 0.0,
+        }
+
+
+def filters_from_config(config=FilterConfig):
+    """(InputFilter, SendGate) as configured in FilterConfig; None where disabled."""
+    if not config.ENABLED:
+        return None, None
+    send_gate = None if config.KEEPALIVE is None else SendGate.from_config(config)
+    return InputFilter.from_config(config), send_gate
+
+
+def format_gate_summary(s):
+    """One-line summary of SendGate.summary()."""
+    return (
+        f"Commands: {s['sent']} sent, {s['suppressed']} unchanged skipped "
+        f"({s['suppressed_rate'] * 100:.0f}%)"
+    )
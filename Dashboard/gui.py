@@ -1,12 +1,58 @@
+import time
+
+from profiling import StartupTimer
+
+STARTUP = StartupTimer()  # Startup report, from before the imports below
+
 import customtkinter as ctk
 import tkinter as tk
-import queue
+import os
 
-from joystick_reader import JoystickReader
-from device_communicator import DeviceCommunicator
-from main import start_worker
+STARTUP.mark("import customtkinter")
 
-from config import SerialConfig, MotorConfig
+from channel import StateChannel
+from diagnostics_view import DiagnosticsView
+from live_config import ConfigStore
+from log_view import LOG_KINDS, LogView
+from plot_view import PlotView
+from render import PanelRenderer
+from recorder import TelemetryRecorder
+from joystick_reader import JoystickReader
+from mission import source_from_config
+from device_manager import THRUSTER_ROLE, DeviceManager, format_status
+from filters import filters_from_config
+from io_engine import ENGINE_STAGES
+from link_metrics import format_link_summary
+from main import WORKER_STAGES, start_worker
+from process_worker import ProcessWorker
+from profiling import (
+    AllocationCounter,
+    SamplingProfiler,
+    StageTimers,
+    format_allocation_summary,
+    format_profile_report,
+    format_stage_summary,
+)
+from scheduler import GcPacer, RateScheduler, format_gc_summary
+
+from config import SerialConfig, LoopConfig, JoystickConfig, RecorderConfig
+
+STARTUP.mark("import dashboard modules")
+
+FRAME_INTERVAL_MS = 33  # GUI refresh period (~30 fps)
+
+# Stage timers of one _poll_queue frame ("gap" = time since the previous frame started,
+# so a Tk stall shows up as a gap well above FRAME_INTERVAL_MS)
+GUI_STAGES = ("snapshot", "panel", "logs", "log_render", "plot", "frame", "gap")
+SNAPSHOT, PANEL, LOGS, LOG_RENDER, PLOT, FRAME, GAP = range(len(GUI_STAGES))
+
+# Config panel label -> MotorConfig field
+CONFIG_LABELS = {
+    "Thrust Offset": "THRUST_ZERO_SHIFT",
+    "Thrust Scaling": "THRUST_SCALING",
+    "Z Thrust Offset": "Z_THRUST_ZERO_SHIFT",
+    "Z Thrust Scaling": "Z_THRUST_SCALING",
+}
 
 
 class ScrollableFrame(ctk.CTkFrame):
@@ -52,34 +98,137 @@ class ScrollableFrame(ctk.CTkFrame):
 
 
 class Dashboard(ctk.CTk):
-    def __init__(self):
+    def __init__(self, record=RecorderConfig.ENABLED, startup=None):
+        # Steps up to the first rendered frame; printed once it is shown
+        self.startup = startup if startup is not None else StartupTimer()
+        self.startup_reported = False
         super().__init__()
 
         self.title("CRAMS Device Dashboard (Multithread)")
-        self.geometry("1600x800")
+        self.geometry("1600x1050")
 
         ctk.set_appearance_mode("Dark")
         ctk.set_default_color_theme("blue")
+        self.startup.mark("create window")
+
+        self.last_seq = -1
+        self.last_log_dropped = 0
+
+        # Always-on stage timing; the sampling profiler only runs when toggled on
+        self.gui_timers = StageTimers(GUI_STAGES)
+        self.last_frame_ns = None
+        self.profiler = SamplingProfiler()
+        self.diagnostics_view = None
+
+        # Live motor config (last saved file, or MotorConfig defaults)
+        self.config_store = ConfigStore()
+        self.config_store.load()
+
+        # Finds the boards and reconnects them in the background
+        manager_options = {
+            "baud_rate": SerialConfig.BAUD_RATE,
+            "timeout": SerialConfig.TIMEOUT,
+            "wire_format": SerialConfig.WIRE_FORMAT,
+            "transport": SerialConfig.TRANSPORT,
+            "scan_interval": SerialConfig.SCAN_INTERVAL,
+            "backoff_max": SerialConfig.RECONNECT_MAX_DELAY,
+            "vids": SerialConfig.PROBE_VIDS,
+            "discovery": SerialConfig.DISCOVERY,
+            "auto_add": True,
+        }
+        joystick_options = {
+            "event_driven": JoystickConfig.EVENT_DRIVEN,
+            "deadzone": JoystickConfig.DEADZONE,
+            "change_threshold": JoystickConfig.CHANGE_THRESHOLD,
+        }
 
-        # Create queue for data exchange between worker and GUI
-        self.data_queue = queue.Queue()
-
-        # Create device / joystick
-        self.device = DeviceCommunicator(port="COM3", baud_rate=115200, timeout=0.05)
-        # self.device.connect()
-        self.joystick = JoystickReader()
-        self.prev_buttons = []  # previous button values for state changes
-
-        # Start the worker thread
-        self.worker_thread, self.stop_event = start_worker(
-            self.joystick, self.device, self.data_queue, verbose=True
-        )
+        # Per-run telemetry log
+        recorder_options = None
+        if record:
+            run_name = time.strftime("run_%Y%m%d_%H%M%S.crec")
+            recorder_options = {
+                "path": os.path.join(
+                    os.path.dirname(__file__), RecorderConfig.DIRECTORY, run_name
+                ),
+                "capacity": RecorderConfig.CAPACITY,
+                "flush_interval": RecorderConfig.FLUSH_INTERVAL,
+            }
+
+        self.process_worker = None
+        if LoopConfig.USE_PROCESS:
+            # The worker process owns the joystick, device and recorder
+            self.process_worker = ProcessWorker(
+                {
+                    "joystick": joystick_options,
+                    "manager": manager_options,
+                    "port": SerialConfig.PORT,
+                    "scheduler": {
+                        "target_hz": LoopConfig.TARGET_HZ,
+                        "overrun_policy": LoopConfig.OVERRUN_POLICY,
+                    },
+                    "recorder": recorder_options,
+                    "verbose": True,
+                    "pipelined": SerialConfig.PIPELINED_IO,
+                    "stall_timeout": SerialConfig.STALL_TIMEOUT,
+                    "gc_paced": LoopConfig.GC_PACED,
+                }
+            )
+            self.channel = self.process_worker.channel
+            self.loop_stats = self.process_worker.stats
+            self.startup.mark("start worker process")
+        else:
+            # Latest-state channel between worker and GUI (bounded, coalescing)
+            self.channel = StateChannel()
+
+            # Create device / joystick
+            self.device_manager = DeviceManager(**manager_options)
+            self.device = self.device_manager.add(THRUSTER_ROLE, SerialConfig.PORT)
+            self.device_manager.start()
+            self.startup.mark("start device manager")
+            # Blended with MissionConfig.FILE when a mission is configured
+            self.joystick = source_from_config(JoystickReader(**joystick_options))
+            self.startup.mark("pygame + joystick init")
+
+            self.recorder = None
+            if recorder_options:
+                self.recorder = TelemetryRecorder(**recorder_options)
+
+            # Start the worker thread
+            self.scheduler = RateScheduler(
+                LoopConfig.TARGET_HZ, LoopConfig.OVERRUN_POLICY
+            )
+            self.worker_timers = StageTimers(WORKER_STAGES)
+            self.engine_timers = StageTimers(ENGINE_STAGES)
+            self.input_filter, self.send_gate = filters_from_config()
+            self.gc_pacer = GcPacer() if LoopConfig.GC_PACED else None
+            self.allocations = AllocationCounter()
+            self.worker_thread, self.stop_event = start_worker(
+                self.joystick,
+                self.device,
+                self.channel,
+                verbose=True,
+                pipelined=SerialConfig.PIPELINED_IO,
+                scheduler=self.scheduler,
+                config_store=self.config_store,
+                recorder=self.recorder,
+                stall_timeout=SerialConfig.STALL_TIMEOUT,
+                timers=self.worker_timers,
+                engine_timers=self.engine_timers,
+                input_filter=self.input_filter,
+                send_gate=self.send_gate,
+                gc_pacer=self.gc_pacer,
+                allocations=self.allocations,
+            )
+            self.loop_stats = self.scheduler.stats
+            self.startup.mark("start worker")
 
         # Build the UI
         self._build_ui()
+        self.startup.mark("build UI")
 
-        # Start checking the queue
+        # Start rendering the channel
         self._poll_queue()
+        self._update_loop_stats()
 
     def _build_ui(self):
         # Your existing layout code
@@ -100,11 +249,22 @@ class Dashboard(ctk.CTk):
         self.device_frame = ctk.CTkFrame(self, corner_radius=10)
         self.device_frame.grid(row=0, column=2, sticky="nsew", padx=10, pady=10)
 
+        # Panel D: History plots (bottom, full width)
+        self.plot_view = PlotView(self, self.channel, corner_radius=10)
+        self.plot_view.grid(
+            row=1, column=0, columnspan=3, sticky="nsew", padx=10, pady=(0, 10)
+        )
+
         # Build sub-sections (the same code you had before)
         self._build_ps4_panel()
         self._build_config_panel()
         self._build_device_panel()
 
+        # Only touches PS4 panel widgets whose displayed value changed
+        self.panel_renderer = PanelRenderer(
+            self.axis_pair_labels, self.checkbox_references
+        )
+
     def _build_ps4_panel(self):
         # Use the ScrollableFrame for the PS4 panel
         self.ps4_frame = ScrollableFrame(self)
@@ -197,11 +357,9 @@ class Dashboard(ctk.CTk):
 
         self.config_entries = {}
 
+        config = self.config_store.current
         config_items = [
-            ("Thrust Offset", MotorConfig.THRUST_ZERO_SHIFT),
-            ("Thrust Scaling", MotorConfig.THRUST_SCALING),
-            ("Z Thrust Offset", MotorConfig.Z_THRUST_ZERO_SHIFT),
-            ("Z Thrust Scaling", MotorConfig.Z_THRUST_SCALING),
+            (label, getattr(config, field)) for label, field in CONFIG_LABELS.items()
         ]
 
         self.config_items = {key: val for key, val in config_items}
@@ -218,6 +376,14 @@ class Dashboard(ctk.CTk):
             entry.pack(side="right", expand=True, fill="x", padx=5)
             self.config_entries[label_text] = entry
 
+        self.push_config_var = tk.BooleanVar(value=False)
+        push_cb = ctk.CTkCheckBox(
+            self.config_frame,
+            text="Push to Pico on apply",
+            variable=self.push_config_var,
+        )
+        push_cb.pack(anchor="w", padx=15, pady=(5, 0))
+
         # Apply / Reset Buttons
         btn_frame = ctk.CTkFrame(self.config_frame)
         btn_frame.pack(pady=(10, 0))
@@ -240,11 +406,33 @@ class Dashboard(ctk.CTk):
         )
         title_label.pack(pady=5)
 
-        # A text box for logs
-        self.log_textbox = ctk.CTkTextbox(
-            self.device_frame, width=300, height=400, wrap="word"
+        # Bounded, virtualized log (only the visible rows are drawn)
+        self.log_view = LogView(self.device_frame, width=300, height=400)
+        self.log_view.pack(padx=10, pady=5, expand=True, fill="both")
+
+        # Control loop timing (period / jitter / overruns)
+        self.loop_stats_label = ctk.CTkLabel(
+            self.device_frame, text="Loop: --", anchor="w", justify="left"
+        )
+        self.loop_stats_label.pack(fill="x", padx=10, pady=(5, 0))
+
+        # GUI render cost per frame
+        self.render_stats_label = ctk.CTkLabel(
+            self.device_frame, text="GUI render: --", anchor="w", justify="left"
+        )
+        self.render_stats_label.pack(fill="x", padx=10, pady=(0, 0))
+
+        # Connected boards / reconnect state
+        self.device_status_label = ctk.CTkLabel(
+            self.device_frame, text="Devices: --", anchor="w", justify="left"
         )
-        self.log_textbox.pack(padx=10, pady=5, expand=True, fill="both")
+        self.device_status_label.pack(fill="x", padx=10, pady=(0, 0))
+
+        # Thruster link health (RTT / loss / throughput / decode errors)
+        self.link_stats_label = ctk.CTkLabel(
+            self.device_frame, text="Link: --", anchor="w", justify="left"
+        )
+        self.link_stats_label.pack(fill="x", padx=10, pady=(0, 0))
 
         # Buttons to clear or simulate a message
         btn_frame = ctk.CTkFrame(self.device_frame)
@@ -260,104 +448,224 @@ class Dashboard(ctk.CTk):
         )
         test_msg_btn.pack(side="left", padx=5)
 
-    def append_log(self, message):
-        """Append messages to the device messages Textbox."""
-        self.log_textbox.insert("end", message)
-        self.log_textbox.see("end")
+        # Filter by message type / pause the view (capture keeps running)
+        view_frame = ctk.CTkFrame(self.device_frame)
+        view_frame.pack(pady=(10, 10))
+
+        filter_menu = ctk.CTkOptionMenu(
+            view_frame, values=list(LOG_KINDS), command=self.log_view.set_filter
+        )
+        filter_menu.pack(side="left", padx=5)
+
+        self.pause_btn = ctk.CTkButton(
+            view_frame, text="Pause", width=80, command=self._toggle_log_pause
+        )
+        self.pause_btn.pack(side="left", padx=5)
+
+        diagnostics_btn = ctk.CTkButton(
+            view_frame, text="Diagnostics", width=100, command=self._open_diagnostics
+        )
+        diagnostics_btn.pack(side="left", padx=5)
+
+    def append_log(self, message, kind="System"):
+        """Append a line to the device log (drawn on the next frame)."""
+        self.log_view.append(message, kind)
 
     def _apply_config(self):
-        """Collect config values and send to device"""
+        """Publish config values to the running worker, save them, optionally push to device"""
 
         config_values = {}
         for key, entry in self.config_entries.items():
-            config_values[key] = entry.get()
-        print("Applying Config:", config_values)
-        # TODO: Send to device, save to file, etc.
+            config_values[CONFIG_LABELS[key]] = entry.get()
+        try:
+            snapshot = self.config_store.update(
+                config_values, push_to_device=self.push_config_var.get()
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Invalid config value: {e}")
+            return
+        try:
+            self.config_store.save()
+        except OSError as e:
+            print(f"Failed to save config: {e}")
+        self.config_items = {
+            key: getattr(snapshot, field) for key, field in CONFIG_LABELS.items()
+        }
+        if self.process_worker is not None:
+            self.process_worker.send_config(snapshot)
+        print(f"Applying Config (v{snapshot.version}):", snapshot.as_dict())
 
     def _reset_config(self):
         """Resets config to last save (file)"""
+        if self.config_store.load():
+            config = self.config_store.current
+            self.config_items = {
+                key: getattr(config, field) for key, field in CONFIG_LABELS.items()
+            }
         for key, entry in self.config_entries.items():
             entry.delete(0, "end")
             entry.insert(0, self.config_items[key])
         print("Config reset to last save.")
 
     def _clear_logs(self):
-        self.log_textbox.delete("1.0", "end")
+        self.log_view.clear()
 
     def _simulate_msg(self):
-        self.append_log("Simulated: Hello from Pico!\n")
+        self.append_log("Simulated: Hello from Pico!")
 
-    def append_log(self, message):
-        self.log_textbox.insert("end", message)
-        self.log_textbox.see("end")  # Auto-scroll
+    def _toggle_log_pause(self):
+        self.log_view.set_paused(not self.log_view.paused)
+        self.pause_btn.configure(text="Resume" if self.log_view.paused else "Pause")
 
     def _poll_queue(self):
-        try:
-            # Keep reading until the queue is empty
-            while True:
-                msg_type, payload = self.data_queue.get_nowait()
-                if msg_type == "device_response":
-                    self.append_log(f"Response from device: {payload}\n")
-                elif msg_type == "joystick_data":
-                    axes, buttons = payload
-                    self._update_axes_on_gui(axes)
-                    self._update_buttons_on_gui(buttons)
-        except queue.Empty:
-            pass
-
-        # Schedule to run again in 50ms
-        self.after(50, self._poll_queue)
-
-    def _update_axes_on_gui(self, axes):
-        """
-        Update the axis labels in the GUI.
-        `axes` is a list or tuple of length 6:
-          indices: 0..5
-          pairs: (0,1) -> left stick, (2,3) -> right stick, (4,5) -> L2/R2
-        """
-        axis_pairs = [(0, 1), (2, 3), (4, 5)]
-        for pair in axis_pairs:
-            val1, val2 = axes[pair[0]], axes[pair[1]]
-            label = self.axis_pair_labels[pair]  # The CTkLabel previously stored
-            label.configure(text=f"[{val1:.2f}, {val2:.2f}]")
-
-    def _update_buttons_on_gui(self, buttons):
-        """
-        Update the checkboxes to reflect pressed (1) or not pressed (0).
-        `buttons` is a list or tuple of length 16 (0..15).
-        """
-
-        try:
-            for idx, cb in self.checkbox_references.items():
-
-                if len(buttons) == len(self.prev_buttons):
-                    if buttons[idx] != self.prev_buttons[idx]:
-                        if buttons[idx] == 1:
-                            cb.select()
-                        else:
-                            cb.deselect()
-                else:
-                    if buttons[idx] == 1:
-                        cb.select()
-                    else:
-                        cb.deselect()
-
-            self.prev_buttons = buttons
-        except Exception as e:
-            print("Error in _update_buttons_on_gui:", e)
+        """Render the newest worker state and any new log lines, once per frame."""
+        clock = time.perf_counter_ns
+        record = self.gui_timers.record
+        t_start = clock()
+        if self.last_frame_ns is not None:
+            record(GAP, t_start - self.last_frame_ns)
+        self.last_frame_ns = t_start
+
+        snapshot = self.channel.snapshot(self.last_seq)
+        t = clock()
+        record(SNAPSHOT, t - t_start)
+        if snapshot is not None:
+            self.last_seq, axes, buttons, _thrusts = snapshot
+            self.panel_renderer.render(axes, buttons)
+            t, t_prev = clock(), t
+            record(PANEL, t - t_prev)
+
+        dropped = self.channel.logs.dropped
+        if dropped != self.last_log_dropped:
+            self.append_log(f"[{dropped - self.last_log_dropped} messages dropped]")
+            self.last_log_dropped = dropped
+        for line in self.channel.logs.drain():
+            self.log_view.append_response(line)
+        t, t_prev = clock(), t
+        record(LOGS, t - t_prev)
+
+        # One redraw per frame, however many lines arrived
+        self.log_view.render()
+        t, t_prev = clock(), t
+        record(LOG_RENDER, t - t_prev)
+
+        # Redraws at most PlotView.max_fps times per second
+        self.plot_view.render()
+        t, t_prev = clock(), t
+        record(PLOT, t - t_prev)
+        record(FRAME, t - t_start)
+
+        if not self.startup_reported and self.last_seq > 0:
+            # First frame with worker state: the control loop is running
+            self.startup.mark("first frame")
+            self.startup_reported = True
+            print(self.startup.format_report())
+            if self.process_worker is None and self.gc_pacer is not None:
+                # The widgets are built now: keep them out of the collector's scans
+                self.gc_pacer.freeze()
+
+        self.after(FRAME_INTERVAL_MS, self._poll_queue)
+
+    def _update_loop_stats(self):
+        """Refresh the loop timing, render, device and link labels twice a second."""
+        if self.process_worker is not None:
+            self.process_worker.poll()
+            devices = self.process_worker.devices
+            link = self.process_worker.link
+        else:
+            devices = self.device_manager.status()
+            link = self.device.metrics.summary()
+        self.device_status_label.configure(text=format_status(devices))
+        if link is not None:
+            self.link_stats_label.configure(text=format_link_summary(link))
+        self.loop_stats_label.configure(text=self.loop_stats.format_summary())
+        self.render_stats_label.configure(
+            text=self.panel_renderer.stats.format_summary()
+        )
+        self.after(500, self._update_loop_stats)
+
+    def _open_diagnostics(self):
+        if self.diagnostics_view is None or not self.diagnostics_view.winfo_exists():
+            self.diagnostics_view = DiagnosticsView(self)
+        self.diagnostics_view.focus()
+
+    def diagnostics_text(self):
+        """Stage timing tables (worker, serial I/O, GUI) and profiler reports as text."""
+        if self.process_worker is not None:
+            self.process_worker.poll()
+            timers = self.process_worker.timers or {}
+            worker = timers.get("worker")
+            engine = timers.get("engine")
+            allocations = timers.get("allocations")
+            gc_summary = timers.get("gc")
+        else:
+            worker = self.worker_timers.summary()
+            engine = self.engine_timers.summary() if SerialConfig.PIPELINED_IO else None
+            allocations = self.allocations.summary()
+            gc_summary = self.gc_pacer.summary() if self.gc_pacer is not None else None
+
+        sections = []
+        if worker is not None:
+            worker_lines = [format_stage_summary(worker, "Worker")]
+            if allocations is not None:
+                worker_lines.append(format_allocation_summary(allocations))
+            if gc_summary is not None:
+                worker_lines.append(format_gc_summary(gc_summary))
+            sections.append("\n".join(worker_lines))
+        if engine is not None:
+            sections.append(format_stage_summary(engine, "Serial I/O"))
+        sections.append(self.gui_timers.format_summary("GUI"))
+        sections.append(self.startup.format_report())
+        if self.profiler.samples:
+            sections.append(self.profiler.format_report())
+        if self.process_worker is not None and self.process_worker.profile:
+            sections.append(
+                "Worker process " + format_profile_report(self.process_worker.profile)
+            )
+        return "\n\n".join(sections)
+
+    def reset_diagnostics(self):
+        """Clear all stage timers and profiler samples."""
+        self.gui_timers.reset()
+        self.last_frame_ns = None
+        self.profiler.clear()
+        if self.process_worker is not None:
+            self.process_worker.reset_timers()
+        else:
+            self.worker_timers.reset()
+            self.engine_timers.reset()
+            self.allocations.reset()
+
+    def toggle_profiler(self):
+        """Start/stop the sampling profiler (in the worker process too); returns True if on."""
+        running = self.profiler.toggle()
+        if self.process_worker is not None:
+            self.process_worker.set_profiling(running)
+        return running
+
+    def stop_worker(self):
+        """Stop the control loop (thread or process) and let it close the device and recorder."""
+        self.profiler.stop()
+        if self.process_worker is not None:
+            self.process_worker.stop()
+        else:
+            self.device_manager.stop()  # no reconnects while shutting down
+            self.stop_event.set()  # signal the thread to stop
+            self.worker_thread.join(timeout=1.0)
+            self.device_manager.disconnect_all()
 
     def on_closing(self):
         """
         Called when the user closes the window.
-        We set the stop_event so the worker thread can exit cleanly.
+        We stop the worker first so it can exit cleanly.
         """
-        self.stop_event.set()  # signal the thread to stop
+        self.stop_worker()
         self.destroy()
 
 
 if __name__ == "__main__":
     print("Starting GUI...")
-    app = Dashboard()
+    app = Dashboard(startup=STARTUP)
     print("GUI created, calling mainloop()...")
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
@@ -0,0 +1,162 @@
+import argparse
+import os
+import time
+
+from profiling import StartupTimer
+
+STARTUP = StartupTimer()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the control loop without the GUI (no Tk, no display): "
+        "joystick -> thrust commands -> board, with status lines on the console."
+    )
+    parser.add_argument("--port", help="Thruster board port (default: SerialConfig)")
+    parser.add_argument(
+        "--sim",
+        action="store_true",
+        help="Simulated board and synthetic stick input (no hardware, no pygame)",
+    )
+    parser.add_argument(
+        "--duration", type=float, help="Stop after this many seconds (default: Ctrl-C)"
+    )
+    parser.add_argument(
+        "--status-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between status lines (0 = none)",
+    )
+    parser.add_argument("--no-record", action="store_true", help="No telemetry log")
+    parser.add_argument(
+        "--mission",
+        help="Mission script to run (default: MissionConfig.FILE); with --sim it "
+        "replaces the synthetic sticks and starts right away",
+    )
+    args = parser.parse_args()
+
+    # Deferred so the startup report shows what each part costs
+    from channel import StateChannel
+    from config import JoystickConfig, LoopConfig, RecorderConfig, SerialConfig
+    from device_manager import THRUSTER_ROLE, DeviceManager, format_status
+    from filters import filters_from_config, format_gate_summary
+    from link_metrics import format_link_summary
+    from live_config import ConfigStore
+    from main import BUSY, WORKER_STAGES, start_worker
+    from mission import MissionSource, load_mission, source_from_config
+    from profiling import AllocationCounter, StageTimers, format_allocation_summary
+    from recorder import TelemetryRecorder
+    from scheduler import GcPacer, RateScheduler, format_gc_summary
+
+    STARTUP.mark("import control loop")
+
+    config_store = ConfigStore()
+    config_store.load()
+    device_manager = None
+    if args.sim:
+        from replay import ReplayJoystick, synthetic_run
+        from sim_device import SimulatedDevice
+
+        device = SimulatedDevice(wire_format=SerialConfig.WIRE_FORMAT)
+        device.connect()
+        if args.mission:
+            joystick = MissionSource(load_mission(args.mission, LoopConfig.TARGET_HZ))
+        else:
+            joystick = ReplayJoystick(synthetic_run(), loop=True)
+        STARTUP.mark("simulated device + input")
+    else:
+        device_manager = DeviceManager(
+            baud_rate=SerialConfig.BAUD_RATE,
+            timeout=SerialConfig.TIMEOUT,
+            wire_format=SerialConfig.WIRE_FORMAT,
+            transport=SerialConfig.TRANSPORT,
+            scan_interval=SerialConfig.SCAN_INTERVAL,
+            backoff_max=SerialConfig.RECONNECT_MAX_DELAY,
+            vids=SerialConfig.PROBE_VIDS,
+            discovery=SerialConfig.DISCOVERY,
+            auto_add=True,
+        )
+        device = device_manager.add(THRUSTER_ROLE, args.port or SerialConfig.PORT)
+        # Boards are probed in the background while pygame loads
+        device_manager.start()
+        STARTUP.mark("start device manager")
+
+        from joystick_reader import JoystickReader
+
+        joystick = JoystickReader(
+            event_driven=JoystickConfig.EVENT_DRIVEN,
+            deadzone=JoystickConfig.DEADZONE,
+            change_threshold=JoystickConfig.CHANGE_THRESHOLD,
+        )
+        joystick = source_from_config(joystick, args.mission)
+        STARTUP.mark("pygame + joystick init")
+
+    recorder = None
+    if RecorderConfig.ENABLED and not args.no_record:
+        run_name = time.strftime("run_%Y%m%d_%H%M%S.crec")
+        recorder = TelemetryRecorder(
+            path=os.path.join(
+                os.path.dirname(__file__), RecorderConfig.DIRECTORY, run_name
+            ),
+            capacity=RecorderConfig.CAPACITY,
+            flush_interval=RecorderConfig.FLUSH_INTERVAL,
+        )
+
+    scheduler = RateScheduler(LoopConfig.TARGET_HZ, LoopConfig.OVERRUN_POLICY)
+    timers = StageTimers(WORKER_STAGES)
+    input_filter, send_gate = filters_from_config()
+    gc_pacer = GcPacer() if LoopConfig.GC_PACED else None
+    allocations = AllocationCounter()
+    thread, stop_event = start_worker(
+        joystick,
+        device,
+        StateChannel(),
+        pipelined=SerialConfig.PIPELINED_IO,
+        scheduler=scheduler,
+        config_store=config_store,
+        recorder=recorder,
+        stall_timeout=SerialConfig.STALL_TIMEOUT,
+        timers=timers,
+        input_filter=input_filter,
+        send_gate=send_gate,
+        gc_pacer=gc_pacer,
+        allocations=allocations,
+    )
+    STARTUP.mark("start worker")
+    while timers.histograms[BUSY].count == 0 and thread.is_alive():
+        time.sleep(0.001)
+    STARTUP.mark("first tick")
+    print(STARTUP.format_report())
+
+    deadline = None if args.duration is None else time.monotonic() + args.duration
+    next_status = time.monotonic() + args.status_interval
+    try:
+        while thread.is_alive():
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if args.status_interval > 0 and now >= next_status:
+                next_status = now + args.status_interval
+                print(scheduler.stats.format_summary())
+                if device_manager is not None:
+                    print(format_status(device_manager.status()))
+                print(format_link_summary(device.metrics.summary()))
+                if send_gate is not None:
+                    print(format_gate_summary(send_gate.summary()))
+                print(format_allocation_summary(allocations.summary()))
+                if gc_pacer is not None:
+                    print(format_gc_summary(gc_pacer.summary()))
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if device_manager is not None:
+            device_manager.stop()
+        stop_event.set()
+        thread.join()
+        if device_manager is not None:
+            device_manager.disconnect_all()
+
+
+if __name__ == "__main__":
+    main()
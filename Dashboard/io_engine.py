@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from profiling import StageTimers
+from protocol import THRUST_FIELDS
+
+# Stage timers of the I/O threads: time spent in a port write / parsing received bytes
+ENGINE_STAGES = ("write", "parse")
+WRITE, PARSE = range(len(ENGINE_STAGES))
+
+
+class LatestValueSlot:
+    """
+    Single-value mailbox. `put` overwrites whatever has not been taken yet,
+    so a slow consumer only ever sees the newest value.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._has_value = False
+        self.dropped = 0
+
+    def put(self, value):
+        with self._cond:
+            if self._has_value:
+                self.dropped += 1
+            self._value = value
+            self._has_value = True
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """Wait up to `timeout` seconds for a value; returns None if none arrived."""
+        with self._cond:
+            if not self._has_value:
+                self._cond.wait(timeout)
+                if not self._has_value:
+                    return None
+            value = self._value
+            self._value = None
+            self._has_value = False
+            return value
+
+    def wake(self):
+        """Wake a waiting consumer without handing it a value."""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class LatestArraySlot(LatestValueSlot):
+    """
+    LatestValueSlot for fixed-size numeric values (e.g. Mixer.output). `put`
+    copies the value into a preallocated array and `take` copies it out into
+    another, so the producer may keep overwriting its own array in place.
+    The array `take` returns is reused by the next call.
+    """
+
+    def __init__(self, size, dtype=np.int64):
+        super().__init__()
+        self._value = np.zeros(size, dtype)
+        self._taken = np.zeros(size, dtype)
+
+    def put(self, value):
+        with self._cond:
+            if self._has_value:
+                self.dropped += 1
+            self._value[:] = value
+            self._has_value = True
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        with self._cond:
+            if not self._has_value:
+                self._cond.wait(timeout)
+                if not self._has_value:
+                    return None
+            self._taken[:] = self._value
+            self._has_value = False
+            return self._taken
+
+
+class SerialIOEngine:
+    """
+    Pipelined I/O around a DeviceCommunicator.
+      - Writer thread: sends the newest submitted command (stale ones are dropped)
+      - Reader thread: pulls raw bytes and parses them (the device's
+        ResponseParser: acks, telemetry, partial lines kept between reads)
+    The control loop never blocks on the serial port. `timers` (ENGINE_STAGES)
+    shows how long the writes and parsing take.
+    """
+
+    def __init__(self, device, max_responses=256, timers=None):
+        self.device = device
+        self.commands = LatestArraySlot(len(THRUST_FIELDS))
+        self.configs = deque()
+        self.responses = deque(maxlen=max_responses)
+
+        self.commands_sent = 0
+        self.responses_received = 0
+        self.timers = timers if timers is not None else StageTimers(ENGINE_STAGES)
+
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._writer = None
+        self._reader = None
+
+    def start(self):
+        if not self._stopped.is_set():
+            return
+        self._stopped.clear()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="serial-writer", daemon=True
+        )
+        self._reader = threading.Thread(
+            target=self._reader_loop, name="serial-reader", daemon=True
+        )
+        self._writer.start()
+        self._reader.start()
+
+    def stop(self, timeout=1.0):
+        self._stopped.set()
+        self.commands.wake()
+        for thread in (self._writer, self._reader):
+            if thread is not None:
+                thread.join(timeout)
+        self._writer = self._reader = None
+
+    def submit(self, thrusts):
+        """
+        Queue thrust outputs (THRUST_FIELDS order) for sending; replaces any
+        command not yet sent. They are copied, so the caller may reuse its array.
+        """
+        self.commands.put(thrusts)
+
+    def submit_config(self, config_dict):
+        """Queue a config push; sent by the writer thread ahead of the next command."""
+        self.configs.append(config_dict)
+        self.commands.wake()
+
+    @property
+    def commands_dropped(self):
+        return self.commands.dropped
+
+    def poll_response(self):
+        """Return the oldest parsed response, or None."""
+        try:
+            return self.responses.popleft()
+        except IndexError:
+            return None
+
+    def drain_responses(self):
+        """Yield every parsed response received so far."""
+        while self.responses:
+            yield self.responses.popleft()
+
+    def _writer_loop(self):
+        while not self._stopped.is_set():
+            command = self.commands.take(timeout=0.1)
+            if not self.device.is_connected():
+                continue
+            while self.configs:
+                self.device.send_config(self.configs.popleft())
+            if command is None:
+                continue
+            start = time.perf_counter_ns()
+            self.device.send_thrust(command)
+            self.timers.record(WRITE, time.perf_counter_ns() - start)
+            self.commands_sent += 1
+
+    def _reader_loop(self):
+        while not self._stopped.is_set():
+            if not self.device.is_connected():
+                self._stopped.wait(0.05)
+                continue
+            data = self.device.read_available()
+            if data:
+                start = time.perf_counter_ns()
+                for response in self.device.parser.responses(data):
+                    self.responses.append(response)
+                    self.responses_received += 1
+                self.timers.record(PARSE, time.perf_counter_ns() - start)
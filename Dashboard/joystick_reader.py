@@ -1,21 +1,125 @@
-import pygame
+import os
+from array import array
+
+
+pygame = None  # Imported by the first JoystickReader (see init_pygame)
+
+NUM_AXES = 6
+NUM_BUTTONS = 16
+STICK_AXES = (0, 1, 2, 3)
+TRIGGER_AXES = (4, 5)
+
+# Named button attributes, in button index order
+BUTTON_NAMES = (
+    "x_btn",
+    "circle_btn",
+    "square_btn",
+    "triangle_btn",
+    "share_btn",
+    "ps4_btn",
+    "options_btn",
+    "left_stick_btn",
+    "right_stick_btn",
+    "l1_btn",
+    "l2_btn",
+    "up_btn",
+    "down_btn",
+    "left_btn",
+    "right_btn",
+    "touchpad_btn",
+)
+
+
+def init_pygame():
+    """
+    Import pygame and start only what joystick input needs: the joystick
+    subsystem and the event queue. The event queue lives in SDL's video
+    subsystem, but no window is opened; without a display (headless) the
+    dummy video driver is used. Audio, fonts etc. are never initialized.
+    """
+    global pygame
+    if pygame is None:
+        import pygame
+    if not pygame.display.get_init():
+        try:
+            pygame.display.init()
+        except pygame.error:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            pygame.display.init()
+    pygame.joystick.init()
+    return pygame
+
+
+def _button_property(index):
+    return property(lambda self: self.buttons[index])
+
+
+def _axis_property(index):
+    return property(lambda self: self.axes[index])
+
+
+class InputSource:
+    """
+    What the control loop reads its input from (see main.device_worker_loop):
+      - `axes`: left x/y, right x/y, L2, R2 (sticks -1..1, triggers 0..1)
+      - `buttons`: 16 button states
+    `update()` is called once per tick to refresh them, and
+    `consume_changed()` reports whether anything moved since the last call.
+    Sources that run out (replays, missions) set `finished`.
+    """
+
+    finished = False
+
+    left_stick_x = _axis_property(0)
+    left_stick_y = _axis_property(1)
+    right_stick_x = _axis_property(2)
+    right_stick_y = _axis_property(3)
+    l2_trigger = _axis_property(4)
+    r2_trigger = _axis_property(5)
 
-
-class JoystickReader:
     def __init__(self):
-        pygame.init()
-        pygame.joystick.init()
+        self.axes = array("d", [0.0] * NUM_AXES)
+        self.buttons = [0] * NUM_BUTTONS
+        self.changed = True  # Report the initial state once
+
+    def update(self):
+        """Refresh `axes`/`buttons` for this tick (the base source stays at rest)."""
+        pass
+
+    def consume_changed(self):
+        """Return True if the state moved since the last call, then clear the flag."""
+        changed = self.changed
+        self.changed = False
+        return changed
+
+    def cleanup(self):
+        pass
+
+
+class JoystickReader(InputSource):
+    """
+    Reads the first connected joystick into a preallocated state:
+      - `axes`: left x/y, right x/y, L2, R2 (triggers mapped to 0..1)
+      - `buttons`: 16 button states
+
+    Polling mode reads every axis/button once per `update()`.
+    Event-driven mode (`event_driven=True`) only applies the JOYAXISMOTION /
+    JOYBUTTONDOWN / JOYBUTTONUP events pygame has queued since the last call.
+
+    Stick values inside `deadzone` read as 0, and an axis only updates when it
+    moves by more than `change_threshold`. `consume_changed()` reports whether
+    anything moved since it was last called.
+    """
+
+    def __init__(self, event_driven=False, deadzone=0.0, change_threshold=0.0):
+        super().__init__()
+        init_pygame()
         self.joysticks = []
         self._init_joysticks()
 
-        # Store some relevant axes/buttons
-        self.left_stick_x = 0.0
-        self.left_stick_y = 0.0
-        self.right_stick_x = 0.0
-        self.right_stick_y = 0.0
-        self.l2_trigger = 0.0
-        self.r2_trigger = 0.0
-        self.buttons = [0] * 16
+        self.event_driven = event_driven
+        self.deadzone = deadzone
+        self.change_threshold = change_threshold
 
     def _init_joysticks(self):
         """Detect and initialize all joysticks."""
@@ -29,6 +133,12 @@ class JoystickReader:
 
     def update(self):
         """Call once per frame or loop iteration to update joystick values."""
+        if self.event_driven:
+            self._update_from_events()
+        else:
+            self._update_by_polling()
+
+    def _update_by_polling(self):
         # Must call event.get() or event.pump() to allow Pygame to handle events
         pygame.event.pump()
 
@@ -37,37 +147,70 @@ class JoystickReader:
 
         # For simplicity, read from the first joystick
         joystick = self.joysticks[0]
-        axes_count = joystick.get_numaxes()
-        buttons_count = joystick.get_numbuttons()
-
-        buttons = [joystick.get_button(i) for i in range(joystick.get_numbuttons())]
-
-        # Read axes
-        if axes_count >= 6:
-            self.left_stick_x = joystick.get_axis(0)
-            self.left_stick_y = joystick.get_axis(1)
-            self.right_stick_x = joystick.get_axis(2)
-            self.right_stick_y = joystick.get_axis(3)
-            self.l2_trigger = (joystick.get_axis(4) + 1) * 0.5
-            self.r2_trigger = (joystick.get_axis(5) + 1) * 0.5
-
-        if len(buttons) >= 16:
-            self.x_btn, self.circle_btn, self.square_btn, self.triangle_btn = buttons[
-                0:4
-            ]
-
-            self.share_btn, self.ps4_btn, self.options_btn = buttons[4:7]
-
-            self.left_stick_btn, self.right_stick_btn = buttons[7:9]
-            self.l1_btn, self.l2_btn = buttons[9:11]
-
-            self.up_btn, self.down_btn, self.left_btn, self.right_btn = buttons[11:15]
-
-            self.touchpad_btn = buttons[15]
+        if joystick.get_numaxes() >= NUM_AXES:
+            for i in range(NUM_AXES):
+                self._set_axis(i, joystick.get_axis(i))
+
+        buttons = self.buttons
+        for i in range(min(joystick.get_numbuttons(), NUM_BUTTONS)):
+            value = joystick.get_button(i)
+            if buttons[i] != value:
+                buttons[i] = value
+                self.changed = True
+
+    def _update_from_events(self):
+        events = pygame.event.get()
+        if not events:
+            return
 
-        # Read buttons
-        for i in range(min(buttons_count, 16)):
-            self.buttons[i] = joystick.get_button(i)
+        instance_id = self.joysticks[0].get_instance_id() if self.joysticks else None
+        for event in events:
+            if event.type == pygame.JOYAXISMOTION:
+                if event.instance_id == instance_id and event.axis < NUM_AXES:
+                    self._set_axis(event.axis, event.value)
+            elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+                if event.instance_id == instance_id and event.button < NUM_BUTTONS:
+                    self.buttons[event.button] = int(event.type == pygame.JOYBUTTONDOWN)
+                    self.changed = True
+            elif event.type in (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
+                if (
+                    event.type == pygame.JOYDEVICEREMOVED
+                    and event.instance_id == instance_id
+                ):
+                    self._release()
+                self._init_joysticks()
+                instance_id = (
+                    self.joysticks[0].get_instance_id() if self.joysticks else None
+                )
+
+    def _release(self):
+        """The active pad is gone: rest every axis and button (neutral thrust)."""
+        for i in range(NUM_AXES):
+            self.axes[i] = 0.0
+        for i in range(NUM_BUTTONS):
+            self.buttons[i] = 0
+        self.changed = True
+
+    def _set_axis(self, index, raw):
+        """Apply trigger mapping, deadzone and change threshold to one axis."""
+        if index in TRIGGER_AXES:
+            value = (raw + 1) * 0.5
+        else:
+            magnitude = abs(raw)
+            if magnitude <= self.deadzone:
+                value = 0.0
+            else:
+                # Rescale so the output still spans the full range past the deadzone
+                value = (magnitude - self.deadzone) / (1 - self.deadzone)
+                value = value if raw > 0 else -value
+
+        previous = self.axes[index]
+        if value == previous:
+            return
+        # Always let an axis settle exactly at rest, even below the threshold
+        if abs(value - previous) > self.change_threshold or value == 0.0:
+            self.axes[index] = value
+            self.changed = True
 
     def cleanup(self):
         """Cleanup when shutting down."""
@@ -82,3 +225,7 @@ class JoystickReader:
         print(f"Right Stick Y: <{self.right_stick_y}>")
         print(f"L2 Trigger: <{self.l2_trigger}>")
         print(f"R2 Trigger: <{self.r2_trigger}>")
+
+
+for _index, _name in enumerate(BUTTON_NAMES):
+    setattr(InputSource, _name, _button_property(_index))
@@ -0,0 +1,194 @@
+import math
+import threading
+import time
+from array import array
+
+from profiling import LogHistogram
+
+SEQ_MODULO = 256  # Command sequence numbers are u8 (same as the binary frame seq)
+
+
+class RateMeter:
+    """Exponentially decaying event rate (units/s) with time constant `tau` seconds."""
+
+    def __init__(self, tau=1.0, clock=time.monotonic):
+        self.tau = tau
+        self.clock = clock
+        self._level = 0.0
+        self._last = clock()
+
+    def add(self, amount):
+        now = self.clock()
+        self._level = self._level * math.exp((self._last - now) / self.tau) + amount
+        self._last = now
+
+    def rate(self):
+        decay = math.exp((self._last - self.clock()) / self.tau)
+        return self._level * decay / self.tau
+
+
+class LinkMetrics:
+    """
+    Health of one serial link, fed by DeviceCommunicator:
+      - commands sent / acked / lost, with a window of `window` commands in
+        flight; a command is lost when its ack has not come within
+        `ack_timeout` or it is pushed out of the window
+      - RTT histogram (send -> matching ack)
+      - tx/rx bytes per second, decode errors (malformed responses, CRC failures)
+    Acks may arrive on another thread than sends (I/O engine reader/writer).
+    """
+
+    def __init__(self, window=32, ack_timeout=0.5, clock=time.monotonic):
+        if not 0 < window <= SEQ_MODULO // 2:
+            raise ValueError(f"window must be in 1..{SEQ_MODULO // 2}")
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.clock = clock
+        self.rtt = LogHistogram()  # Round-trip times
+        self.tx = RateMeter(clock=clock)
+        self.rx = RateMeter(clock=clock)
+        self.parser = None  # ResponseParser whose errors count as decode errors
+
+        self._lock = threading.Lock()
+        self._send_times = array("d", [0.0] * SEQ_MODULO)
+        self._pending = bytearray(SEQ_MODULO)  # 1 while seq is in flight
+        self._oldest = 0  # Oldest seq that may still be in flight
+        self._next = 0  # Next seq expected to be sent
+        self.sent = 0
+        self.acked = 0
+        self.lost = 0
+        self.late_acks = 0  # Acks for commands already counted lost (or unknown)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.last_ack = None  # clock() of the newest ack
+        self._first_unacked_send = None  # clock() of the first send after it
+
+    def on_send(self, seq, nbytes):
+        now = self.clock()
+        with self._lock:
+            if self.sent == 0:
+                self._oldest = self._next = seq
+            self._expire(now)
+            # Evict the oldest entries if the window is full
+            while (seq - self._oldest) % SEQ_MODULO >= self.window:
+                self._drop(self._oldest)
+            if self._first_unacked_send is None:
+                self._first_unacked_send = now
+            self._send_times[seq] = now
+            self._pending[seq] = 1
+            self._next = (seq + 1) % SEQ_MODULO
+            self.sent += 1
+            self.bytes_sent += nbytes
+        self.tx.add(nbytes)
+
+    def on_ack(self, seq):
+        """Match an ack to its command; returns the RTT in seconds, or None."""
+        now = self.clock()
+        with self._lock:
+            seq %= SEQ_MODULO
+            if not self._pending[seq]:
+                self.late_acks += 1
+                return None
+            self._pending[seq] = 0
+            rtt = now - self._send_times[seq]
+            self.rtt.record(rtt)
+            self.acked += 1
+            self.last_ack = now
+            self._first_unacked_send = None
+            return rtt
+
+    def on_receive(self, nbytes):
+        self.bytes_received += nbytes
+        self.rx.add(nbytes)
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return sum(self._pending)
+
+    @property
+    def decode_errors(self):
+        return self.parser.errors if self.parser is not None else 0
+
+    def stalled(self, stall_timeout):
+        """
+        True if no ack has come in for `stall_timeout` seconds since a command
+        was sent. Never True before the first ack, so firmware that does not
+        ack is not mistaken for a stalled link.
+        """
+        first_unacked = self._first_unacked_send
+        if self.last_ack is None or first_unacked is None:
+            return False
+        return self.clock() - first_unacked > stall_timeout
+
+    def reset_window(self):
+        """Forget commands in flight (e.g. after a reconnect) without counting them lost."""
+        with self._lock:
+            for i in range(SEQ_MODULO):
+                self._pending[i] = 0
+            self._oldest = self._next
+            self.last_ack = None
+            self._first_unacked_send = None
+
+    def summary(self):
+        with self._lock:
+            self._expire(self.clock())
+            completed = self.acked + self.lost
+        return {
+            "sent": self.sent,
+            "acked": self.acked,
+            "lost": self.lost,
+            "late_acks": self.late_acks,
+            "in_flight": self.in_flight,
+            "loss_rate": self.lost / completed if completed else 0.0,
+            "rtt_ms": {
+                "count": self.rtt.count,
+                "mean": (
+                    self.rtt.total / self.rtt.count * 1e3 if self.rtt.count else 0.0
+                ),
+                "p50": self.rtt.percentile(50) * 1e3,
+                "p90": self.rtt.percentile(90) * 1e3,
+                "p99": self.rtt.percentile(99) * 1e3,
+                "max": self.rtt.max * 1e3,
+            },
+            "tx_bytes_per_s": self.tx.rate(),
+            "rx_bytes_per_s": self.rx.rate(),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "decode_errors": self.decode_errors,
+        }
+
+    def format_summary(self):
+        return format_link_summary(self.summary())
+
+    def _expire(self, now):
+        """Count in-flight commands older than `ack_timeout` as lost (lock held)."""
+        deadline = now - self.ack_timeout
+        while self._oldest != self._next:
+            seq = self._oldest
+            if self._pending[seq] and self._send_times[seq] > deadline:
+                return
+            self._drop(seq)
+
+    def _drop(self, seq):
+        if self._pending[seq]:
+            self._pending[seq] = 0
+            self.lost += 1
+        self._oldest = (seq + 1) % SEQ_MODULO
+
+
+def format_link_summary(s):
+    """One-line summary of LinkMetrics.summary() (also used for process-mode stats)."""
+    if not s["sent"]:
+        return "Link: no commands sent"
+    rtt = s["rtt_ms"]
+    rtt_text = (
+        f"RTT p50 {rtt['p50']:.1f} p99 {rtt['p99']:.1f} ms"
+        if rtt["count"]
+        else "no acks"
+    )
+    return (
+        f"Link: {rtt_text}  loss {s['loss_rate'] * 100:.1f}%  "
+        f"tx {s['tx_bytes_per_s'] / 1e3:.1f} rx {s['rx_bytes_per_s'] / 1e3:.1f} kB/s  "
+        f"decode errors {s['decode_errors']}"
+    )
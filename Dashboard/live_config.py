@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+
+from config import MotorConfig
+from mixer import MIXER_PRESETS
+
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "motor_config.json")
+
+# Tunable MotorConfig fields and their types
+CONFIG_FIELDS = {
+    "THRUST_SCALING": int,
+    "THRUST_ZERO_SHIFT": int,
+    "Z_THRUST_SCALING": int,
+    "Z_THRUST_ZERO_SHIFT": int,
+    "MIXER": str,
+    "SLEW_RATE": float,
+}
+# Fields that may be cleared (None = feature off); the others always need a value
+OPTIONAL_FIELDS = ("SLEW_RATE",)
+
+
+class ConfigSnapshot:
+    """
+    Immutable, versioned copy of the tunable MotorConfig fields. Has the same
+    attribute names as MotorConfig, so it can be passed to Mixer.from_config.
+    """
+
+    __slots__ = ("version", "push_to_device") + tuple(CONFIG_FIELDS)
+
+    def __init__(self, version, values, push_to_device=False):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "push_to_device", push_to_device)
+        for name in CONFIG_FIELDS:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is read-only")
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in CONFIG_FIELDS}
+
+
+def _coerce(values):
+    """Validate and convert user/file values to the field types."""
+    coerced = {}
+    for name, value in values.items():
+        if name not in CONFIG_FIELDS:
+            raise KeyError(f"Unknown config field: {name}")
+        if value is None or value == "":
+            if name not in OPTIONAL_FIELDS:
+                raise ValueError(f"{name} needs a value")
+            coerced[name] = None
+        else:
+            coerced[name] = CONFIG_FIELDS[name](value)
+    mixer = coerced.get("MIXER")
+    if mixer is not None and mixer not in MIXER_PRESETS:
+        raise ValueError(f"Unknown mixer {mixer!r} (one of {', '.join(MIXER_PRESETS)})")
+    return coerced
+
+
+class ConfigStore:
+    """
+    Holds the live motor config as a ConfigSnapshot in `current`.
+    Updates build a new snapshot with a higher version and swap the reference,
+    so the worker can read `store.current` each tick without taking a lock
+    and rebuild whatever depends on it when `version` changes.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG_PATH, defaults=MotorConfig):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self.current = ConfigSnapshot(
+            0, {name: getattr(defaults, name) for name in CONFIG_FIELDS}
+        )
+
+    def update(self, values, push_to_device=False):
+        """
+        Publish a new snapshot with `values` merged into the current one.
+        Raises ValueError/KeyError on invalid values (nothing is published).
+        """
+        coerced = _coerce(values)
+        with self._write_lock:
+            merged = self.current.as_dict()
+            merged.update(coerced)
+            snapshot = ConfigSnapshot(self.current.version + 1, merged, push_to_device)
+            self.current = snapshot
+        return snapshot
+
+    def load(self):
+        """Load the saved file (if any) into a new snapshot. Returns True if loaded."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"Failed to load config from {self.path}: {e}")
+            return False
+        try:
+            if not isinstance(values, dict):
+                raise ValueError("expected a JSON object")
+            self.update(values)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Invalid config in {self.path}: {e}")
+            return False
+        return True
+
+    def save(self):
+        """Write the current snapshot to the config file (atomically)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.current.as_dict(), f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,180 @@
+import itertools
+from collections import deque
+
+import customtkinter as ctk
+
+from protocol import Frame
+
+LOG_KINDS = ("All", "JSON", "Binary", "Text", "System")
+
+
+def classify(message):
+    """Message type used by the filter: JSON / Binary / Text for device responses."""
+    if isinstance(message, Frame):
+        return "Binary"
+    if message.startswith("{"):
+        return "JSON"
+    return "Text"
+
+
+def _window(rows, start, count):
+    """rows[start:start + count] of a list or deque, walked from the nearer end."""
+    n = len(rows)
+    start = min(start, n)
+    end = min(start + count, n)
+    if n - end < start:
+        window = list(itertools.islice(reversed(rows), n - end, n - start))
+        window.reverse()
+        return window
+    return list(itertools.islice(rows, start, end))
+
+
+class LogView(ctk.CTkFrame):
+    """
+    Device log backed by a bounded ring of (kind, text) entries.
+
+    Only the rows that fit in the widget are ever inserted into the text box,
+    and only once per frame (`render()`), however many lines arrived. Each
+    kind also has its own ring of texts, so a filtered view is read in place
+    and a frame costs the visible window, not the capacity. The
+    view follows the newest line unless scrolled up; `paused` freezes the
+    view while capture continues. `kind_filter` limits it to one LOG_KINDS type.
+    """
+
+    def __init__(self, parent, capacity=5000, **kwargs):
+        super().__init__(parent, **kwargs)
+        self._entries = deque(maxlen=capacity)
+        self._by_kind = {kind: deque() for kind in LOG_KINDS[1:]}  # Texts per kind
+        self.capacity = capacity
+        self.total = 0  # Lines ever appended (drives the "new lines" check)
+        self.kind_filter = "All"
+        self.paused = False
+        self.follow = True
+
+        self._offset = 0  # Index of the first visible row in the filtered list
+        self._rendered_total = -1
+        self._dirty = True
+        self._frozen = None  # Filtered rows captured when paused
+
+        self.textbox = ctk.CTkTextbox(self, wrap="none", activate_scrollbars=False)
+        self.textbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.textbox.bind("<MouseWheel>", self._on_mouse_wheel)
+        # X11 reports the wheel as buttons 4 (up) and 5 (down)
+        self.textbox.bind("<Button-4>", lambda event: self._scroll_lines(-3))
+        self.textbox.bind("<Button-5>", lambda event: self._scroll_lines(3))
+        self.textbox.bind("<Configure>", lambda event: self._mark_dirty())
+
+    def append(self, text, kind="System"):
+        """Store one line; nothing is drawn until the next `render()`."""
+        if len(self._entries) == self.capacity:
+            # The line dropped from the ring is also the oldest of its kind
+            self._by_kind[self._entries[0][0]].popleft()
+        self._entries.append((kind, text))
+        self._by_kind.setdefault(kind, deque()).append(text)
+        self.total += 1
+
+    def append_response(self, message):
+        """Store a device response (str or Frame) under its message type."""
+        self.append(f"Response from device: {message}", classify(message))
+
+    def clear(self):
+        self._entries.clear()
+        for texts in self._by_kind.values():
+            texts.clear()
+        self._frozen = [] if self.paused else None
+        self._offset = 0
+        self.follow = True
+        self._mark_dirty()
+
+    def set_filter(self, kind):
+        self.kind_filter = kind
+        if self.paused:
+            self._frozen = self._filtered()
+        self.follow = True
+        self._mark_dirty()
+
+    def set_paused(self, paused):
+        self.paused = paused
+        self._frozen = self._filtered() if paused else None
+        if not paused:
+            self.follow = True
+        self._mark_dirty()
+
+    def render(self):
+        """Redraw the visible window if anything changed since the last frame."""
+        if not self._dirty and (self.paused or self.total == self._rendered_total):
+            return
+        self._dirty = False
+        self._rendered_total = self.total
+
+        rows = self._frozen if self.paused else self._rows()
+        visible = self._visible_rows()
+        max_offset = max(len(rows) - visible, 0)
+        if self.follow:
+            self._offset = max_offset
+        self._offset = min(self._offset, max_offset)
+        window = _window(rows, self._offset, visible)
+        if rows is self._entries:
+            window = [text for _kind, text in window]
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", "\n".join(window))
+        self.textbox.configure(state="disabled")
+
+        if rows:
+            self.scrollbar.set(
+                self._offset / len(rows), min((self._offset + visible) / len(rows), 1.0)
+            )
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _rows(self):
+        """The live rows of the current filter: (kind, text) entries for "All", else texts."""
+        if self.kind_filter == "All":
+            return self._entries
+        return self._by_kind.setdefault(self.kind_filter, deque())
+
+    def _filtered(self):
+        """A copy of the filtered texts (frozen while paused)."""
+        if self.kind_filter == "All":
+            return [text for _kind, text in self._entries]
+        return list(self._rows())
+
+    def _visible_rows(self):
+        line_height = self.textbox.cget("font").metrics("linespace") or 1
+        return max(self.textbox.winfo_height() // line_height, 1)
+
+    def _scroll_to(self, offset):
+        rows = len(self._frozen) if self.paused else self._count_filtered()
+        max_offset = max(rows - self._visible_rows(), 0)
+        self._offset = max(0, min(int(offset), max_offset))
+        self.follow = self._offset >= max_offset
+        self._mark_dirty()
+
+    def _count_filtered(self):
+        return len(self._rows())
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            rows = len(self._frozen) if self.paused else self._count_filtered()
+            self._scroll_to(float(value) * rows)
+        elif action == "scroll":
+            step = self._visible_rows() if unit == "pages" else 1
+            self._scroll_to(self._offset + int(value) * step)
+        self.render()
+
+    def _on_mouse_wheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS a few units
+        notches = max(abs(event.delta) // 120, 1)
+        return self._scroll_lines(-3 * notches if event.delta > 0 else 3 * notches)
+
+    def _scroll_lines(self, lines):
+        self._scroll_to(self._offset + lines)
+        self.render()
+        return "break"
+
+    def _mark_dirty(self):
+        self._dirty = True
@@ -1,73 +1,271 @@
-import time
 import threading
+import time
+
+import numpy as np
+
+from io_engine import SerialIOEngine
+from mixer import Mixer
+from profiling import StageTimers
+from scheduler import RateScheduler
 
+# Stage timers of one worker tick ("busy" = the whole tick minus "wait")
+WORKER_STAGES = (
+    "config",
+    "joystick",
+    "filter",
+    "mix",
+    "publish",
+    "send",
+    "read",
+    "record",
+    "busy",
+    "gc",
+    "wait",
+)
+CONFIG, JOYSTICK, FILTER, MIX, PUBLISH, SEND, READ, RECORD, BUSY, GC, WAIT = range(
+    len(WORKER_STAGES)
+)
 
-def device_worker_loop(stop_event, data_queue, joystick, device, verbose=False):
+
+def device_worker_loop(
+    stop_event,
+    channel,
+    joystick,
+    device,
+    verbose=False,
+    io_engine=None,
+    scheduler=None,
+    mixer=None,
+    config_store=None,
+    recorder=None,
+    stall_timeout=None,
+    timers=None,
+    input_filter=None,
+    send_gate=None,
+    gc_pacer=None,
+    allocations=None,
+):
     """
     Runs in a background thread. Loops until `stop_event` is set.
-      - Reads joystick
+      - Reads `joystick`, any InputSource: a JoystickReader, a replay or a
+        mission (see mission.py); thrust is only recomputed when it changed
       - Sends data to device
       - Reads response
-      - Publishes relevant data to `data_queue` for the GUI
+      - Publishes the latest state and device responses to `channel` (a StateChannel)
+    If `io_engine` is given, serial writes/reads are handed to its threads
+    instead of blocking this loop.
+    The loop is paced by `scheduler` (a RateScheduler, 100 Hz by default) and
+    thrust is computed by `mixer` (Mixer.from_config() by default).
+    With a `config_store`, the mixer is rebuilt from `config_store.current`
+    whenever its version changes (checked once per tick, no locking).
+    With a `recorder` (TelemetryRecorder), every tick is appended to its log.
+    With a `stall_timeout` (seconds), neutral thrust is sent instead while the
+    device has not acked a command for that long (see LinkMetrics.stalled).
+    With an `input_filter` (InputFilter), the mixer sees the filtered axes.
+    With a `send_gate` (SendGate), a command is only sent when it moved past
+    the gate's threshold or its keepalive expired.
+    Every stage of a tick is timed into `timers` (StageTimers over WORKER_STAGES).
+    A tick reuses its arrays (Mixer.output is the command, encoded into the
+    device's buffers), so it leaves no garbage behind. With a `gc_pacer`
+    (GcPacer) garbage collection only runs between ticks, and an
+    `allocations` counter (AllocationCounter) checks what each tick allocates.
     """
-    while not stop_event.is_set():
-        # 1) Update joystick data
-        joystick.update()
-
-        # 2) Build our data payload
-        left_thrust_power = int(
-            joystick.r2_trigger * 1000 * min(1, 1 - joystick.left_stick_x) + 3300
-        )
-        right_thrust_power = int(
-            joystick.r2_trigger * 1000 * min(1, 1 + joystick.left_stick_x) + 3300
-        )
-        z_thrust_power = int(joystick.right_stick_y * 1000 + 5200)
-
-        data_to_send = {
-            "left_thrust_power": left_thrust_power,
-            "right_thrust_power": right_thrust_power,
-            "z_thrust_power": z_thrust_power,
-        }
-
-        # 3) If device is connected, send data and read response
-        if device.is_connected():
-            device.send_data(data_to_send)
-            response = device.read_response()
-            if response and verbose:
-                # Put the response in the queue for the GUI
-                data_queue.put(("device_response", response))
-
-        # 4) Also push the current joystick data to the queue so the GUI can update
-        # We'll pass axes and buttons
-        axes_data = [
-            joystick.left_stick_x,
-            joystick.left_stick_y,
-            joystick.right_stick_x,
-            joystick.right_stick_y,
-            joystick.l2_trigger,
-            joystick.r2_trigger,
-        ]
-        buttons_data = joystick.buttons[:]
-
-        data_queue.put(("joystick_data", (axes_data, buttons_data)))
-
-        # 5) Throttle the loop
-        time.sleep(0.01)
+    if scheduler is None:
+        scheduler = RateScheduler(100)
+    if mixer is None:
+        mixer = Mixer.from_config()
+    if timers is None:
+        timers = StageTimers(WORKER_STAGES)
+    clock = time.perf_counter_ns
+    record = timers.record
+
+    thrust = None  # mixer.output once mixed
+    config_version = None
+    neutral = np.array(mixer.neutral(), dtype=np.int64)
+    stalled = False
+    try:
+        if gc_pacer is not None:
+            gc_pacer.start()
+        scheduler.start()
+        while not stop_event.is_set():
+            if allocations is not None:
+                allocations.begin()
+            t_start = clock()
+
+            # 0) Pick up a new config if the GUI published one
+            if config_store is not None:
+                config = config_store.current
+                if config.version != config_version:
+                    config_version = config.version
+                    mixer = Mixer.from_config(config)
+                    neutral = np.array(mixer.neutral(), dtype=np.int64)
+                    thrust = None  # force a recompute with the new mixer
+                    if config.push_to_device:
+                        if io_engine is not None:
+                            io_engine.submit_config(config.as_dict())
+                        else:
+                            device.send_config(config.as_dict())
+            t = clock()
+            record(CONFIG, t - t_start)
+
+            # 1) Update joystick data
+            joystick.update()
+            t, t_prev = clock(), t
+            record(JOYSTICK, t - t_prev)
+
+            # 2) Filter the axes while the stick moves or the filter is catching up
+            changed = joystick.consume_changed()
+            axes = joystick.axes
+            if input_filter is not None:
+                if changed or not input_filter.settled:
+                    changed = input_filter.update(axes, scheduler.now_ns())
+                axes = input_filter.output
+                t, t_prev = clock(), t
+                record(FILTER, t - t_prev)
+
+            # 3) Recompute thrust and GUI state only when the input moved
+            # (or while the slew limiter is still ramping toward the target)
+            if changed or thrust is None or not mixer.settled:
+                thrust = mixer.mix_into(axes)
+                t, t_prev = clock(), t
+                record(MIX, t - t_prev)
+
+                # Overwrite the latest-state snapshot so the GUI can update
+                # We'll pass axes, buttons and the commanded thrusts
+                channel.publish(joystick.axes, joystick.buttons, thrust)
+                t, t_prev = clock(), t
+                record(PUBLISH, t - t_prev)
+
+            # 4) Watchdog: park the thrusters while the link is stalled
+            command = thrust
+            if stall_timeout is not None:
+                if device.metrics.stalled(stall_timeout):
+                    if not stalled:
+                        stalled = True
+                        print("Link stalled: sending neutral thrust.")
+                    command = neutral
+                elif stalled:
+                    stalled = False
+                    print("Link recovered.")
+
+            # 5) If device is connected, send data (unless unchanged) and read response
+            send = send_gate is None or send_gate.should_send(
+                command, scheduler.now_ns()
+            )
+            response = None
+            response_count = 0
+            if io_engine is not None:
+                # Non-blocking: newest command wins, responses arrive in the background
+                if send:
+                    io_engine.submit(command)
+                t, t_prev = clock(), t
+                record(SEND, t - t_prev)
+                for response in io_engine.drain_responses():
+                    response_count += 1
+                    if verbose:
+                        channel.logs.push(response)
+                t, t_prev = clock(), t
+                record(READ, t - t_prev)
+            elif device.is_connected():
+                if send:
+                    device.send_thrust(command)
+                t, t_prev = clock(), t
+                record(SEND, t - t_prev)
+                # A suppressed command gets no reply: only take what already arrived
+                response = device.read_response(block=send)
+                if response:
+                    response_count = 1
+                    if verbose:
+                        # Put the response in the log ring for the GUI
+                        channel.logs.push(response)
+                t, t_prev = clock(), t
+                record(READ, t - t_prev)
+
+            # 6) Log the tick
+            if recorder is not None:
+                recorder.record(
+                    joystick.axes, joystick.buttons, command, response, response_count
+                )
+                t, t_prev = clock(), t
+                record(RECORD, t - t_prev)
+            if allocations is not None:
+                allocations.end()
+            t = clock()
+            record(BUSY, t - t_start)
+
+            # 7) Collect garbage in the idle time, then wait for the next tick deadline
+            if gc_pacer is not None:
+                gc_pacer.collect()
+                t, t_prev = clock(), t
+                record(GC, t - t_prev)
+            scheduler.wait()
+            record(WAIT, clock() - t)
+    finally:
+        # Never leave the process without automatic collection, even if a tick raised
+        if gc_pacer is not None:
+            gc_pacer.stop()
 
     # Cleanup
+    if io_engine is not None:
+        io_engine.stop()
+    if recorder is not None:
+        recorder.close()
     joystick.cleanup()
     device.disconnect()
     print("Worker thread exiting cleanly.")
 
 
-def start_worker(joystick, device, data_queue, verbose=False):
+def start_worker(
+    joystick,
+    device,
+    channel,
+    verbose=False,
+    pipelined=False,
+    scheduler=None,
+    config_store=None,
+    recorder=None,
+    stall_timeout=None,
+    timers=None,
+    engine_timers=None,
+    input_filter=None,
+    send_gate=None,
+    gc_pacer=None,
+    allocations=None,
+):
     """
     Spawns the worker thread, returns (thread, stop_event).
+    With `pipelined=True` the serial link is driven by a SerialIOEngine.
+    Pass a RateScheduler as `scheduler` to set the loop rate and read its stats,
+    a ConfigStore as `config_store` to tune the mixer while running, and a
+    TelemetryRecorder as `recorder` to log every tick. `stall_timeout` enables
+    the neutral-thrust watchdog. Pass StageTimers(WORKER_STAGES) as `timers`
+    (and StageTimers(ENGINE_STAGES) as `engine_timers`) to read the per-stage timing.
+    `input_filter` and `send_gate` (see filters.py) condition the input and
+    skip unchanged commands. A GcPacer as `gc_pacer` moves garbage collection
+    between ticks; an AllocationCounter as `allocations` counts per-tick allocations.
+    Telemetry the device parses from its responses goes to `channel.telemetry`.
     """
+    device.parser.telemetry = channel.telemetry
+    io_engine = None
+    if pipelined:
+        io_engine = SerialIOEngine(device, timers=engine_timers)
+        io_engine.start()
+
     stop_event = threading.Event()
     thread = threading.Thread(
         target=device_worker_loop,
-        args=(stop_event, data_queue, joystick, device, verbose),
+        name="control-loop",
+        args=(stop_event, channel, joystick, device, verbose, io_engine, scheduler),
+        kwargs={
+            "config_store": config_store,
+            "recorder": recorder,
+            "stall_timeout": stall_timeout,
+            "timers": timers,
+            "input_filter": input_filter,
+            "send_gate": send_gate,
+            "gc_pacer": gc_pacer,
+            "allocations": allocations,
+        },
         daemon=True,
     )
     thread.start()
@@ -0,0 +1,369 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from config import LoopConfig, MissionConfig
+from joystick_reader import BUTTON_NAMES, NUM_AXES, STICK_AXES, InputSource
+from mixer import INPUT_NAMES
+
+# Keys of a segment / waypoint that are not axis names
+_TIMING_KEYS = ("t", "duration", "ramp")
+
+
+class Mission:
+    """
+    A mission script compiled to one row of axes per control loop tick
+    (`axes`, shape (ticks, NUM_AXES), sampled at `hz`). `changes[i]` counts
+    the rows that differ from their predecessor up to row i, so two rows
+    hold the same input exactly when their counts match.
+    """
+
+    def __init__(self, axes, hz, name=""):
+        self.axes = np.asarray(axes, dtype=np.float64)
+        self.axes.flags.writeable = False
+        self.hz = hz
+        self.name = name
+        moved = np.any(self.axes[1:] != self.axes[:-1], axis=1)
+        self.changes = np.concatenate(([0], np.cumsum(moved)))
+
+    def __len__(self):
+        return len(self.axes)
+
+    @property
+    def duration(self):
+        return len(self.axes) / self.hz
+
+
+def _number(value, what):
+    """`value` as a float; ValueError unless it is a JSON number."""
+    if type(value) not in (int, float):
+        raise ValueError(f"{what} must be a number, not {value!r}")
+    return float(value)
+
+
+def _entries(spec, key):
+    """spec[key] as a non-empty list of objects."""
+    entries = spec[key]
+    kind = key[:-1]  # "segment" / "waypoint"
+    if not isinstance(entries, list):
+        raise ValueError(f"'{key}' must be a list of {kind} objects")
+    if not entries:
+        raise ValueError(f"A mission needs at least one {kind}")
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{kind} {i}: must be an object, not {entry!r}")
+    return entries
+
+
+def _axis_values(entry, where):
+    """The axes an entry sets, by INPUT_NAMES name; the others are at rest (0)."""
+    values = np.zeros(NUM_AXES)
+    for key, value in entry.items():
+        if key in _TIMING_KEYS:
+            _number(value, f"{where}: {key}")
+            continue
+        if key not in INPUT_NAMES:
+            raise ValueError(
+                f"{where}: unknown axis {key!r} (one of {', '.join(INPUT_NAMES)})"
+            )
+        index = INPUT_NAMES.index(key)
+        low = -1.0 if index in STICK_AXES else 0.0
+        value = _number(value, f"{where}: {key}")
+        if not low <= value <= 1.0:
+            raise ValueError(f"{where}: {key}={value} is outside {low:g}..1")
+        values[index] = value
+    return values
+
+
+def _compile_segments(segments, hz):
+    starts = []
+    total = 0.0
+    for i, segment in enumerate(segments):
+        _axis_values(segment, f"segment {i}")
+        duration = float(segment.get("duration", 0))
+        if duration <= 0:
+            raise ValueError(f"segment {i}: needs a positive duration")
+        if float(segment.get("ramp", 0)) < 0:
+            raise ValueError(f"segment {i}: ramp must not be negative")
+        starts.append(total)
+        total += duration
+
+    n = max(1, int(round(total * hz)))
+    t = np.arange(n) / hz
+    axes = np.empty((n, NUM_AXES))
+    previous = np.zeros(NUM_AXES)
+    for i, (segment, start) in enumerate(zip(segments, starts)):
+        target = _axis_values(segment, f"segment {i}")
+        lo = int(round(start * hz))
+        hi = n if i == len(segments) - 1 else int(round(starts[i + 1] * hz))
+        ramp = float(segment.get("ramp", 0))
+        if ramp > 0:
+            progress = np.clip((t[lo:hi] - start) / ramp, 0.0, 1.0)
+            axes[lo:hi] = previous + progress[:, None] * (target - previous)
+        else:
+            axes[lo:hi] = target
+        if hi > lo:
+            # Where this segment ended: short of `target` if its ramp outlasts it
+            previous = axes[hi - 1].copy()
+    return axes
+
+
+def _compile_waypoints(waypoints, hz):
+    times = []
+    values = []
+    for i, waypoint in enumerate(waypoints):
+        if "t" not in waypoint:
+            raise ValueError(f"waypoint {i}: needs a time 't'")
+        t = _number(waypoint["t"], f"waypoint {i}: t")
+        if t < 0 or (times and t <= times[-1]):
+            raise ValueError(f"waypoint {i}: times must be >= 0 and increasing")
+        times.append(t)
+        values.append(_axis_values(waypoint, f"waypoint {i}"))
+    if times[0] > 0:
+        # Start from rest
+        times.insert(0, 0.0)
+        values.insert(0, np.zeros(NUM_AXES))
+    values = np.array(values)
+
+    n = int(round(times[-1] * hz)) + 1
+    t = np.arange(n) / hz
+    axes = np.empty((n, NUM_AXES))
+    for i in range(NUM_AXES):
+        axes[:, i] = np.interp(t, times, values[:, i])
+    return axes
+
+
+def compile_mission(spec, hz=LoopConfig.TARGET_HZ, name=""):
+    """
+    Compile a mission script (a dict, see load_mission) into a Mission sampled
+    at `hz`. All interpolation happens here, so running it is a table lookup.
+    Raises ValueError for an invalid script.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("A mission script is a JSON object")
+    if ("segments" in spec) == ("waypoints" in spec):
+        raise ValueError("A mission needs either 'segments' or 'waypoints'")
+    if "segments" in spec:
+        axes = _compile_segments(_entries(spec, "segments"), hz)
+    else:
+        axes = _compile_waypoints(_entries(spec, "waypoints"), hz)
+    return Mission(axes, hz, str(spec.get("name", name)))
+
+
+def load_mission(path, hz=LoopConfig.TARGET_HZ):
+    """
+    Load and compile a JSON mission script. Inputs are given in stick space,
+    by axis name (mixer.INPUT_NAMES); axes an entry leaves out are at rest.
+      - "segments": time-based profile, run in order. Each holds its axes for
+        "duration" seconds, reached from the previous segment's values
+        linearly over "ramp" seconds (default 0: a step).
+          {"segments": [{"duration": 10, "r2_trigger": 0.4, "ramp": 2}, ...]}
+      - "waypoints": axes at times "t" (seconds, increasing), linearly
+        interpolated in between, starting from rest at t=0.
+          {"waypoints": [{"t": 2, "r2_trigger": 0.4}, {"t": 12, "r2_trigger": 0.4}, ...]}
+    The mission ends with the last segment / waypoint; the input then rests.
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    return compile_mission(spec, hz, name=os.path.splitext(os.path.basename(path))[0])
+
+
+class MissionSource(InputSource):
+    """
+    Plays a compiled Mission as an input source. The row for the current
+    tick is picked by elapsed time on `clock` (ns): O(1) and allocation-free,
+    so a mission runs at the full loop rate. `axes` is a read-only view of
+    that row; it rests (zeros) until `start()` and after the mission ends,
+    which sets `finished`. With `autostart` the mission starts on the first
+    `update()`. Buttons always read as released.
+    """
+
+    def __init__(self, mission, clock=time.perf_counter_ns, autostart=True):
+        super().__init__()
+        self.mission = mission
+        self.clock = clock
+        self._rest = np.zeros(NUM_AXES)
+        self._rest.flags.writeable = False
+        self.axes = self._rest
+        self._period_ns = 1e9 / mission.hz
+        self._start_ns = None
+        self.index = -1
+        self.running = False
+        self.finished = False
+        if autostart:
+            self.start()
+
+    def start(self):
+        """(Re)start from the beginning; the clock starts at the next update()."""
+        self._start_ns = None
+        self.index = -1
+        self.running = True
+        self.finished = False
+
+    def stop(self):
+        """Abort: the input rests until the next start()."""
+        if self.running:
+            self.running = False
+            self.axes = self._rest
+            self.changed = True
+
+    def update(self):
+        if not self.running:
+            return
+        now = self.clock()
+        if self._start_ns is None:
+            self._start_ns = now
+        index = int((now - self._start_ns) / self._period_ns)
+        mission = self.mission
+        if index >= len(mission):
+            self.stop()
+            self.finished = True
+            return
+        if index == self.index:
+            return
+        changes = mission.changes
+        if self.index < 0 or changes[index] != changes[self.index]:
+            self.changed = True
+        self.index = index
+        self.axes = mission.axes[index]
+
+    def summary(self):
+        return {
+            "name": self.mission.name,
+            "duration_s": self.mission.duration,
+            "ticks_played": self.index + 1,
+            "running": self.running,
+            "finished": self.finished,
+        }
+
+
+class BlendedSource(InputSource):
+    """
+    A MissionSource with manual override from `manual` (e.g. JoystickReader).
+    Each axis blends mission and pilot by a weight (0 = mission, 1 = pilot):
+    moving an axis past `override_threshold` takes it over and releasing it
+    hands it back, the weight ramping over `blend_time` seconds either way so
+    the thrust does not jump. The pilot has every axis while no mission runs.
+    `start_button` / `abort_button` (BUTTON_NAMES) start and abort the
+    mission; buttons otherwise pass through from `manual`.
+    """
+
+    def __init__(
+        self,
+        manual,
+        mission,
+        override_threshold=MissionConfig.OVERRIDE_THRESHOLD,
+        blend_time=MissionConfig.BLEND_TIME,
+        start_button=MissionConfig.START_BUTTON,
+        abort_button=MissionConfig.ABORT_BUTTON,
+        clock=time.perf_counter_ns,
+    ):
+        super().__init__()
+        self.manual = manual
+        self.mission = mission
+        self.override_threshold = override_threshold
+        self.blend_time = blend_time
+        self.clock = clock
+        self._start_button = (
+            None if start_button is None else BUTTON_NAMES.index(start_button)
+        )
+        self._abort_button = (
+            None if abort_button is None else BUTTON_NAMES.index(abort_button)
+        )
+        self._start_held = self._abort_held = False
+
+        self.buttons = manual.buttons
+        self.axes = np.zeros(NUM_AXES)
+        self.weight = np.ones(NUM_AXES)
+        self._manual = np.zeros(NUM_AXES)
+        self._target = np.zeros(NUM_AXES)
+        self._step = np.zeros(NUM_AXES)
+        self._last_ns = None
+
+    @property
+    def finished(self):
+        return self.mission.finished and self.manual.finished
+
+    def update(self):
+        manual = self.manual
+        mission = self.mission
+        manual.update()
+        changed = manual.consume_changed()
+        if changed:
+            self._manual[:] = manual.axes
+            self._check_buttons()
+        mission.update()
+        changed = mission.consume_changed() or changed
+
+        now = self.clock()
+        dt = 0.0 if self._last_ns is None else (now - self._last_ns) * 1e-9
+        self._last_ns = now
+
+        # Per-axis authority: the pilot's where deflected (or no mission runs)
+        target = self._target
+        if mission.running:
+            np.abs(self._manual, out=target)
+            np.greater(target, self.override_threshold, out=target)
+        else:
+            target.fill(1.0)
+        weight = self.weight
+        if not np.array_equal(weight, target):
+            limit = dt / self.blend_time if self.blend_time > 0 else 1.0
+            np.subtract(target, weight, out=self._step)
+            np.clip(self._step, -limit, limit, out=self._step)
+            weight += self._step
+            changed = True
+
+        if changed:
+            # axes = mission + weight * (manual - mission)
+            np.subtract(self._manual, mission.axes, out=self.axes)
+            self.axes *= weight
+            self.axes += mission.axes
+            self.changed = True
+
+    def _check_buttons(self):
+        buttons = self.buttons
+        if self._start_button is not None:
+            pressed = bool(buttons[self._start_button])
+            if pressed and not self._start_held and not self.mission.running:
+                self.mission.start()
+                print(f"Mission {self.mission.mission.name!r} started.")
+            self._start_held = pressed
+        if self._abort_button is not None:
+            pressed = bool(buttons[self._abort_button])
+            if pressed and not self._abort_held and self.mission.running:
+                self.mission.stop()
+                print("Mission aborted: manual control.")
+            self._abort_held = pressed
+
+    def cleanup(self):
+        self.manual.cleanup()
+
+
+def source_from_config(manual, path=None, config=MissionConfig, clock=None):
+    """
+    `manual` blended with the mission script at `path` (default: config.FILE,
+    relative to the Dashboard folder), or `manual` itself when there is none
+    or it fails to load. Without a START_BUTTON the mission starts right away.
+    """
+    if path is None:
+        if config.FILE is None:
+            return manual
+        path = os.path.join(os.path.dirname(__file__), config.FILE)
+    try:
+        mission = load_mission(path)
+    except (OSError, ValueError) as e:
+        print(f"Mission {path} not loaded ({e}); manual control only.")
+        return manual
+    clock = clock or time.perf_counter_ns
+    return BlendedSource(
+        manual,
+        MissionSource(mission, clock, autostart=config.START_BUTTON is None),
+        override_threshold=config.OVERRIDE_THRESHOLD,
+        blend_time=config.BLEND_TIME,
+        start_button=config.START_BUTTON,
+        abort_button=config.ABORT_BUTTON,
+        clock=clock,
+    )
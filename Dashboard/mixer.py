@@ -0,0 +1,256 @@
+import numpy as np
+
+from config import MotorConfig
+
+
+# Order of joystick.axes
+INPUT_NAMES = (
+    "left_stick_x",
+    "left_stick_y",
+    "right_stick_x",
+    "right_stick_y",
+    "l2_trigger",
+    "r2_trigger",
+)
+
+
+def linear_features(axes, out=None):
+    """Raw axes as features (identity)."""
+    if out is not None:
+        out[:] = axes
+        return out
+    return np.asarray(axes, dtype=np.float64)
+
+
+def differential_features(axes, out=None):
+    """
+    Features for the CRAMS differential drive, for axes of shape (..., 6):
+      [r2, r2 * max(lx, 0), r2 * max(-lx, 0), ry]
+    Left/right thrust is throttle (R2) minus the turn on that side, which
+    keeps the original `r2 * min(1, 1 -/+ lx)` behaviour linear in the features.
+    With `out` (one tick, axes of shape (6,)) they are written into it.
+    """
+    if out is not None:
+        lx = axes[0]
+        r2 = axes[5]
+        out[0] = r2
+        out[1] = r2 * lx if lx > 0.0 else 0.0
+        out[2] = -r2 * lx if lx < 0.0 else 0.0
+        out[3] = axes[3]
+        return out
+    axes = np.asarray(axes, dtype=np.float64)
+    lx = axes[..., 0]
+    ry = axes[..., 3]
+    r2 = axes[..., 5]
+    return np.stack(
+        (r2, r2 * np.maximum(lx, 0.0), r2 * np.maximum(-lx, 0.0), ry), axis=-1
+    )
+
+
+# name -> (feature function, mixing matrix [outputs x features])
+MIXER_PRESETS = {
+    "differential": (
+        differential_features,
+        np.array(
+            [
+                [1.0, -1.0, 0.0, 0.0],  # left_thrust_power
+                [1.0, 0.0, -1.0, 0.0],  # right_thrust_power
+                [0.0, 0.0, 0.0, 1.0],  # z_thrust_power
+            ]
+        ),
+    ),
+    "linear": (
+        linear_features,
+        np.array(
+            [
+                [0.0, 0.0, 0.0, 0.0, 0.0, 1.0],
+                [0.0, 0.0, 0.0, 0.0, 0.0, 1.0],
+                [0.0, 0.0, 0.0, 1.0, 0.0, 0.0],
+            ]
+        ),
+    ),
+}
+
+
+def make_curve_lut(curve, size=1025):
+    """Sample `curve(x)` over [-1, 1] into a lookup table of `size` points."""
+    return np.asarray(curve(np.linspace(-1.0, 1.0, size)), dtype=np.float64)
+
+
+def expo_curve(expo):
+    """Common RC 'expo' curve: softer around center, full output at the ends."""
+    return lambda x: (1 - expo) * x + expo * x**3
+
+
+class Mixer:
+    """
+    Maps a joystick axes vector to N thruster outputs:
+      features(axes) -> matrix @ features -> response curve (optional LUT)
+      -> * scale + offset -> clamp -> slew-rate limit -> int
+    `mix` handles one tick; `mix_batch` and `sweep` run over recorded inputs.
+    `mix_into` is the control loop's tick: every step writes into
+    preallocated arrays and the result lands in `output` (THRUST_FIELDS
+    order, as DeviceCommunicator.send_thrust takes it), so it creates no
+    arrays (response curves excepted).
+    """
+
+    def __init__(
+        self,
+        matrix,
+        scale,
+        offset,
+        features=linear_features,
+        out_min=None,
+        out_max=None,
+        slew_rate=None,
+        curves=None,
+    ):
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        n = self.matrix.shape[0]
+        self.features = features
+        self.scale = np.broadcast_to(np.asarray(scale, dtype=np.float64), (n,))
+        self.offset = np.broadcast_to(np.asarray(offset, dtype=np.float64), (n,))
+        self.out_min = (
+            self.offset - np.abs(self.scale) if out_min is None else np.asarray(out_min)
+        )
+        self.out_max = (
+            self.offset + np.abs(self.scale) if out_max is None else np.asarray(out_max)
+        )
+        self.slew_rate = slew_rate
+
+        # Per-output lookup tables over [-1, 1] (None = linear response)
+        self.curves = list(curves) if curves is not None else [None] * n
+        self._has_curves = any(lut is not None for lut in self.curves)
+
+        # One tick's state, reused by every mix_into()
+        self.output = np.zeros(n, dtype=np.int64)
+        self._axes = np.zeros(len(INPUT_NAMES))
+        self._axes_view = memoryview(self._axes)
+        self._features = np.zeros(self.matrix.shape[1])
+        self._target = np.zeros(n)  # Shaped outputs before slew limiting
+        self._last = np.zeros(n)  # Outputs sent last tick (slew limiter state)
+        self._step = np.zeros(n)
+        self._equal = np.zeros(n, dtype=bool)
+        self._has_last = False
+        self._settled = True
+
+    @classmethod
+    def from_config(cls, config=MotorConfig, preset=None):
+        """Build a mixer from MotorConfig-style scaling/offsets and a preset name."""
+        features, matrix = MIXER_PRESETS[preset or config.MIXER]
+        return cls(
+            matrix,
+            scale=(config.THRUST_SCALING, config.THRUST_SCALING, config.Z_THRUST_SCALING),
+            offset=(
+                config.THRUST_ZERO_SHIFT,
+                config.THRUST_ZERO_SHIFT,
+                config.Z_THRUST_ZERO_SHIFT,
+            ),
+            features=features,
+            slew_rate=config.SLEW_RATE,
+        )
+
+    @property
+    def num_outputs(self):
+        return self.matrix.shape[0]
+
+    @property
+    def settled(self):
+        """False while slew limiting is still moving outputs toward their target."""
+        return self._settled
+
+    def neutral(self):
+        """Outputs with the thrusters at rest (the zero shifts), as a list of ints."""
+        return np.trunc(self.offset).astype(np.int64).tolist()
+
+    def reset(self):
+        """Forget slew-limiter state (next output jumps straight to target)."""
+        self._has_last = False
+        self._settled = True
+
+    def mix(self, axes):
+        """One tick: return the thruster outputs as a list of ints."""
+        return self.mix_into(axes).tolist()
+
+    def mix_into(self, axes):
+        """
+        One tick, in place: returns `output` (int64 array, overwritten by the
+        next call). Buffers (array("d"), float64 arrays) are copied in without
+        a temporary.
+        """
+        try:
+            self._axes_view[:] = axes
+        except (TypeError, ValueError):
+            self._axes[:] = axes
+        features = self.features(self._axes, out=self._features)
+        target = self._target
+        np.dot(self.matrix, features, out=target)
+        if self._has_curves:
+            target[:] = self._shape(target)
+        else:
+            np.multiply(target, self.scale, out=target)
+            np.add(target, self.offset, out=target)
+            np.minimum(target, self.out_max, out=target)
+            np.maximum(target, self.out_min, out=target)
+
+        last = self._last
+        if self.slew_rate and self._has_last:
+            step = self._step
+            np.subtract(target, last, out=step)
+            np.minimum(step, self.slew_rate, out=step)
+            np.maximum(step, -self.slew_rate, out=step)
+            last += step
+            self._settled = bool(np.equal(last, target, out=self._equal).all())
+        else:
+            last[:] = target
+            self._settled = True
+        self._has_last = True
+        np.trunc(last, out=self._step)
+        np.copyto(self.output, self._step, casting="unsafe")
+        return self.output
+
+    def mix_batch(self, axes):
+        """
+        Mix a recorded input array of shape (T, 6) into outputs (T, N).
+        Slew limiting is applied along T, starting from the target of row 0.
+        """
+        outputs = self._shape(self.features(axes) @ self.matrix.T)
+        if self.slew_rate:
+            outputs = self._slew_limit(outputs, self.slew_rate)
+        return np.trunc(outputs).astype(np.int64)
+
+    def sweep(self, matrices, axes):
+        """
+        Evaluate many candidate mixing matrices (C, N, F) against one recorded
+        input array (T, 6) using this mixer's scale/offset/clamp/curves.
+        Returns outputs of shape (C, T, N).
+        """
+        feats = self.features(axes)
+        raw = np.einsum("cnf,tf->ctn", np.asarray(matrices, dtype=np.float64), feats)
+        outputs = self._shape(raw)
+        if self.slew_rate:
+            outputs = self._slew_limit(outputs, self.slew_rate)
+        return np.trunc(outputs).astype(np.int64)
+
+    def _shape(self, mixed):
+        """Apply curves, scale/offset and clamp to mixed values (..., N)."""
+        if any(lut is not None for lut in self.curves):
+            mixed = np.array(mixed, dtype=np.float64)
+            for i, lut in enumerate(self.curves):
+                if lut is not None:
+                    index = np.rint(
+                        (np.clip(mixed[..., i], -1.0, 1.0) + 1.0) * 0.5 * (len(lut) - 1)
+                    ).astype(np.intp)
+                    mixed[..., i] = lut[index]
+        return np.clip(mixed * self.scale + self.offset, self.out_min, self.out_max)
+
+    @staticmethod
+    def _slew_limit(outputs, rate):
+        """Sequential slew limiting along the time axis (-2), vectorized over the rest."""
+        limited = np.empty_like(outputs)
+        prev = outputs[..., 0, :]
+        limited[..., 0, :] = prev
+        for t in range(1, outputs.shape[-2]):
+            prev = prev + np.clip(outputs[..., t, :] - prev, -rate, rate)
+            limited[..., t, :] = prev
+        return limited
@@ -0,0 +1,314 @@
+import time
+import tkinter as tk
+
+import customtkinter as ctk
+import numpy as np
+
+from channel import NUM_AXES
+from config import TelemetryConfig
+from protocol import THRUST_FIELDS
+from telemetry import TELEMETRY_FIELDS
+
+
+def _short(name):
+    return name.replace("_thrust_power", "")
+
+
+# (title, channel ring, [(label, ring column)], fixed y range or None to autoscale)
+PLOT_GROUPS = (
+    ("Sticks", "history", [("LX", 0), ("LY", 1), ("RX", 2), ("RY", 3)], (-1.0, 1.0)),
+    ("Triggers", "history", [("L2", 4), ("R2", 5)], (0.0, 1.0)),
+    (
+        "Thrust",
+        "history",
+        [(_short(name), NUM_AXES + i) for i, name in enumerate(THRUST_FIELDS)],
+        None,
+    ),
+)
+# Parsed device telemetry, one strip per TelemetryConfig.PLOTS entry
+TELEMETRY_GROUPS = tuple(
+    (
+        title,
+        "telemetry",
+        [(_short(name), TELEMETRY_FIELDS.index(name)) for name in fields],
+        None,
+    )
+    for title, fields in TelemetryConfig.PLOTS
+)
+SPANS = {"10 s": 10.0, "1 min": 60.0, "5 min": 300.0, "10 min": 600.0}
+COLORS = ("#4fc3f7", "#ffb74d", "#81c784", "#e57373", "#ba68c8", "#fff176")
+MARGIN_LEFT = 56  # Room for the y-range labels
+TIME_LABEL_HEIGHT = 14
+
+
+class MinMaxDecimator:
+    """
+    Min/max envelope of `width` signals over the last `span` seconds, in
+    `columns` time bins (one per pixel column). Samples are folded into
+    their bin as they arrive, so a frame costs O(new samples + columns)
+    however much history the window covers.
+    Signals are sample-and-hold: a bin without samples shows the value held
+    before it, and a bin where the value steps also spans the held value.
+    """
+
+    def __init__(self, width, columns, span):
+        self.width = width
+        self.columns = columns
+        self.span = span
+        self.bin_s = span / columns
+        self._min = np.full((columns, width), np.inf)
+        self._max = np.full((columns, width), -np.inf)
+        self._last = np.full((columns, width), np.nan)  # Last sample in the bin
+        self._count = np.zeros(columns, np.int64)
+        self._head = None  # Absolute number of the newest bin
+        self._carry = np.full(width, np.nan)  # Value held entering the window
+
+    def advance(self, now):
+        """Scroll the window so its newest bin contains `now` (seconds)."""
+        head = int(now // self.bin_s)
+        if self._head is None:
+            self._head = head
+            return
+        if head <= self._head:
+            return
+        # Slots of the bins leaving the window, oldest first
+        n = min(head - self._head, self.columns)
+        slots = np.arange(self._head + 1, self._head + 1 + n) % self.columns
+        has = np.flatnonzero(self._count[slots])
+        if len(has):
+            self._carry[:] = self._last[slots[has[-1]]]
+        self._min[slots] = np.inf
+        self._max[slots] = -np.inf
+        self._last[slots] = np.nan
+        self._count[slots] = 0
+        self._head = head
+
+    def add(self, t, values):
+        """Fold in samples: times `t` (seconds, ascending), `values` of shape (n, width)."""
+        if not len(t):
+            return
+        bins = (t // self.bin_s).astype(np.int64)
+        self.advance(t[-1])
+        old = bins <= self._head - self.columns
+        if old.any():
+            # Before the window: only the newest one matters (as the held value)
+            self._carry[:] = values[np.flatnonzero(old)[-1]]
+            bins = bins[~old]
+            values = values[~old]
+            if not len(bins):
+                return
+        starts = np.flatnonzero(np.diff(bins, prepend=bins[0] - 1))
+        ends = np.append(starts[1:], len(bins))
+        slots = bins[starts] % self.columns
+        self._min[slots] = np.minimum(
+            self._min[slots], np.minimum.reduceat(values, starts, axis=0)
+        )
+        self._max[slots] = np.maximum(
+            self._max[slots], np.maximum.reduceat(values, starts, axis=0)
+        )
+        self._last[slots] = values[ends - 1]
+        self._count[slots] += ends - starts
+
+    def envelope(self):
+        """(min, max), each (columns, width), oldest column first; NaN before any data."""
+        if self._head is None:
+            nan = np.full((self.columns, self.width), np.nan)
+            return nan, nan
+        order = np.arange(self._head - self.columns + 1, self._head + 1) % self.columns
+        has = self._count[order] > 0
+        last = self._last[order]
+        # Index of the latest bin with data before each bin (-1: none, use the carry)
+        latest = np.where(has, np.arange(self.columns), -1)
+        np.maximum.accumulate(latest, out=latest)
+        previous = np.empty_like(latest)
+        previous[0] = -1
+        previous[1:] = latest[:-1]
+        held = np.where(
+            (previous >= 0)[:, None], last[np.maximum(previous, 0)], self._carry
+        )
+        lo = np.where(has[:, None], np.fmin(self._min[order], held), held)
+        hi = np.where(has[:, None], np.fmax(self._max[order], held), held)
+        return lo, hi
+
+
+class PlotView(ctk.CTkFrame):
+    """
+    Strip charts of the channel's time series (`groups` name the ring each
+    strip reads: the published state history or parsed device telemetry),
+    drawn on one Tk canvas. Each series is a single polyline through the
+    per-pixel min/max envelope, so the drawing cost depends on the canvas
+    width, not on the span shown. `render()` may be called every GUI frame;
+    it redraws at most `max_fps` times per second.
+    """
+
+    def __init__(
+        self,
+        parent,
+        channel,
+        groups=PLOT_GROUPS + TELEMETRY_GROUPS,
+        max_fps=10,
+        height=300,
+        **kwargs,
+    ):
+        super().__init__(parent, **kwargs)
+        self.channel = channel
+        self.groups = groups
+        self.sources = sorted({source for _, source, _, _ in groups})
+        self.span = SPANS["1 min"]
+        self.min_interval = 1.0 / max_fps
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=10, pady=(5, 0))
+        ctk.CTkLabel(
+            header, text="History", font=ctk.CTkFont(size=14, weight="bold")
+        ).pack(side="left")
+        span_selector = ctk.CTkSegmentedButton(
+            header, values=list(SPANS), command=self._set_span
+        )
+        span_selector.set("1 min")
+        span_selector.pack(side="right")
+
+        self.canvas = tk.Canvas(self, bg="#1d1e1e", highlightthickness=0, height=height)
+        self.canvas.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+        self.canvas.bind("<Configure>", lambda event: self._invalidate())
+
+        self._decimators = None  # Per source, rebuilt with the canvas items
+        self._cursors = {}
+        self._last_draw = 0.0
+        self._lines = []  # [(ring column, canvas line id)] per group
+        self._range_labels = []  # (top label id, bottom label id) per group
+        self._ranges = [None] * len(groups)
+
+    def _set_span(self, choice):
+        self.span = SPANS[choice]
+        self._invalidate()
+
+    def _invalidate(self):
+        """Rebuild the envelopes and canvas items on the next render (span or size changed)."""
+        self._decimators = None
+
+    def render(self, now=None):
+        """Fold in new rows and redraw; returns False if skipped (frame cap, channel closed)."""
+        now = time.perf_counter() if now is None else now
+        if now - self._last_draw < self.min_interval:
+            return False
+        rings = {source: getattr(self.channel, source) for source in self.sources}
+        if any(ring is None for ring in rings.values()):
+            return False
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= MARGIN_LEFT + 2 or height < 20 * len(self.groups):
+            return False
+        self._last_draw = now
+
+        if self._decimators is None:
+            self._build(width, height, rings)
+        envelopes = {}
+        for source, ring in rings.items():
+            decimator = self._decimators[source]
+            self._cursors[source], t, values = ring.read_since(self._cursors[source])
+            decimator.add(t, values)
+            decimator.advance(now)
+            envelopes[source] = decimator.envelope()
+
+        points = self._points
+        flip = self._flip
+        for g, (title, source, series, fixed_range) in enumerate(self.groups):
+            lo, hi = envelopes[source]
+            columns = [column for _, column in series]
+            y_range = fixed_range or self._autoscale(lo[:, columns], hi[:, columns])
+            if y_range is None:
+                continue  # No data yet
+            y_min, y_max = y_range
+            if self._ranges[g] != y_range:
+                self._ranges[g] = y_range
+                top, bottom = self._range_labels[g]
+                self.canvas.itemconfigure(top, text=f"{y_max:.4g}")
+                self.canvas.itemconfigure(bottom, text=f"{y_min:.4g}")
+            strip_top, strip_bottom = self._strip(g)
+            scale = (strip_bottom - strip_top) / (y_max - y_min)
+            for column, line in self._lines[g]:
+                # Columns before the series' first sample are NaN
+                valid = np.flatnonzero(~np.isnan(lo[:, column]))
+                if len(valid) < 2:
+                    continue
+                first = valid[0]
+                y_lo = strip_bottom - (lo[first:, column] - y_min) * scale
+                y_hi = strip_bottom - (hi[first:, column] - y_min) * scale
+                # Zig-zag through each column's min and max (alternating order)
+                p = points[first:]
+                p[:, 1] = np.where(flip[first:], y_hi, y_lo)
+                p[:, 3] = np.where(flip[first:], y_lo, y_hi)
+                self.canvas.coords(line, p.ravel().tolist())
+        return True
+
+    @staticmethod
+    def _autoscale(lo, hi):
+        """(min, max) with 5% headroom, or None if there is no data."""
+        if np.isnan(lo).all():
+            return None
+        y_min = float(np.nanmin(lo))
+        y_max = float(np.nanmax(hi))
+        if y_max - y_min < 1e-9:
+            y_min, y_max = y_min - 1.0, y_max + 1.0
+        pad = (y_max - y_min) * 0.05
+        return y_min - pad, y_max + pad
+
+    def _strip(self, g):
+        """(top, bottom) pixel rows of group `g`'s strip (time labels below the last)."""
+        height = (self._height - TIME_LABEL_HEIGHT) / len(self.groups)
+        return g * height + 16, (g + 1) * height - 4
+
+    def _build(self, width, height, rings):
+        self._height = height
+        columns = width - MARGIN_LEFT
+        self._decimators = {
+            source: MinMaxDecimator(ring.values.shape[1], columns, self.span)
+            for source, ring in rings.items()
+        }
+        self._cursors = dict.fromkeys(rings, 0)  # Refill from all the rows kept
+        # x of both points of every column, y filled in per series
+        self._points = np.zeros((columns, 4))
+        self._points[:, 0] = self._points[:, 2] = np.arange(columns) + MARGIN_LEFT
+        self._flip = (np.arange(columns) % 2).astype(bool)
+
+        canvas = self.canvas
+        canvas.delete("all")
+        self._lines = []
+        self._range_labels = []
+        self._ranges = [None] * len(self.groups)
+        for g, (title, _, series, _) in enumerate(self.groups):
+            top, bottom = self._strip(g)
+            canvas.create_rectangle(
+                MARGIN_LEFT, top, width - 1, bottom, outline="#3a3a3a"
+            )
+            label_x = MARGIN_LEFT + 4
+            canvas.create_text(label_x, top - 8, text=title, anchor="w", fill="#dce4ee")
+            label_x += 8 * len(title) + 8
+            lines = []
+            for i, (name, column) in enumerate(series):
+                color = COLORS[i % len(COLORS)]
+                canvas.create_text(label_x, top - 8, text=name, anchor="w", fill=color)
+                label_x += 8 * len(name) + 10
+                lines.append((column, canvas.create_line(0, 0, 0, 0, fill=color)))
+            self._lines.append(lines)
+            self._range_labels.append(
+                (
+                    canvas.create_text(
+                        MARGIN_LEFT - 4, top, anchor="ne", fill="#9a9a9a"
+                    ),
+                    canvas.create_text(
+                        MARGIN_LEFT - 4, bottom, anchor="se", fill="#9a9a9a"
+                    ),
+                )
+            )
+        canvas.create_text(
+            width - 4, height - 2, text="now", anchor="se", fill="#9a9a9a"
+        )
+        canvas.create_text(
+            MARGIN_LEFT + 4,
+            height - 2,
+            text=f"-{self.span:g} s",
+            anchor="sw",
+            fill="#9a9a9a",
+        )
@@ -0,0 +1,393 @@
+import multiprocessing as mp
+import struct
+import time
+from multiprocessing import shared_memory
+
+from channel import NUM_AXES, NUM_BUTTONS, NUM_THRUSTS, HistoryRing
+from config import TelemetryConfig
+from protocol import Frame
+from scheduler import format_loop_summary
+from telemetry import TELEMETRY_FIELDS
+
+# Shared memory layout
+#   [0, 96)    state:  seq (u64, odd while being written) | axes | buttons | thrusts
+#   [96, 128)  log header: written (u64) | read (u64) | dropped (u64)
+#   [128, ...) log slots: kind (u8) | length (u16) | payload
+#   [..., ...) state history (channel.HistoryRing)
+#   [..., end) device telemetry (channel.HistoryRing, one column per TELEMETRY_FIELDS)
+_SEQ = struct.Struct("<Q")
+_STATE = struct.Struct(f"<{NUM_AXES}d{NUM_BUTTONS}B{NUM_THRUSTS}i")
+_STATE_OFFSET = 8
+_LOG_HEADER_OFFSET = 96
+_COUNTER = struct.Struct("<Q")
+_LOG_SLOTS_OFFSET = 128
+_SLOT_HEADER = struct.Struct("<BH")
+LOG_SLOT_SIZE = 128
+
+_KIND_TEXT = 0
+_KIND_FRAME = 1
+
+
+class SharedLogRing:
+    """
+    Single-producer / single-consumer ring of fixed-size log slots in shared
+    memory. When the consumer falls behind, new lines are dropped and counted.
+    Same interface as channel.LogRing.
+    """
+
+    def __init__(self, buf, slots):
+        self._buf = buf
+        self.capacity = slots
+
+    def _get(self, index):
+        return _COUNTER.unpack_from(self._buf, _LOG_HEADER_OFFSET + 8 * index)[0]
+
+    def _set(self, index, value):
+        _COUNTER.pack_into(self._buf, _LOG_HEADER_OFFSET + 8 * index, value)
+
+    @property
+    def dropped(self):
+        return self._get(2)
+
+    def __len__(self):
+        return self._get(0) - self._get(1)
+
+    def push(self, message):
+        written = self._get(0)
+        if written - self._get(1) >= self.capacity:
+            self._set(2, self._get(2) + 1)
+            return
+        if isinstance(message, Frame):
+            kind = _KIND_FRAME
+            payload = struct.pack(
+                f"<B{len(message.values)}h", message.seq, *message.values
+            )
+        else:
+            kind = _KIND_TEXT
+            payload = str(message).encode("utf-8", "replace")
+        payload = payload[: LOG_SLOT_SIZE - _SLOT_HEADER.size]
+        offset = _LOG_SLOTS_OFFSET + (written % self.capacity) * LOG_SLOT_SIZE
+        _SLOT_HEADER.pack_into(self._buf, offset, kind, len(payload))
+        start = offset + _SLOT_HEADER.size
+        self._buf[start : start + len(payload)] = payload
+        # Publish the slot only after its contents are written
+        self._set(0, written + 1)
+
+    def drain(self):
+        lines = []
+        read, written = self._get(1), self._get(0)
+        while read < written:
+            offset = _LOG_SLOTS_OFFSET + (read % self.capacity) * LOG_SLOT_SIZE
+            kind, length = _SLOT_HEADER.unpack_from(self._buf, offset)
+            start = offset + _SLOT_HEADER.size
+            payload = bytes(self._buf[start : start + length])
+            if kind == _KIND_FRAME:
+                fields = struct.unpack(f"<B{(length - 1) // 2}h", payload)
+                lines.append(Frame(fields[0], fields[1:]))
+            else:
+                lines.append(payload.decode("utf-8", "replace"))
+            read += 1
+        self._set(1, read)
+        return lines
+
+
+class SharedStateChannel:
+    """
+    StateChannel backed by multiprocessing.shared_memory, so the control loop
+    can run in another process. The state snapshot is guarded by a seqlock:
+    the writer makes the sequence odd while writing, and readers retry until
+    they copy a snapshot with the same even sequence before and after.
+    Create it in the GUI process, attach to it by `name` in the worker.
+    """
+
+    def __init__(
+        self,
+        name=None,
+        log_slots=256,
+        history_capacity=65536,
+        telemetry_capacity=TelemetryConfig.CAPACITY,
+    ):
+        history_offset = _LOG_SLOTS_OFFSET + log_slots * LOG_SLOT_SIZE
+        telemetry_offset = history_offset + HistoryRing.nbytes(history_capacity)
+        telemetry_width = len(TELEMETRY_FIELDS)
+        size = telemetry_offset + HistoryRing.nbytes(
+            telemetry_capacity, telemetry_width
+        )
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.name = self._shm.name
+        self.log_slots = log_slots
+        self.logs = SharedLogRing(self._shm.buf, log_slots)
+        self.history = HistoryRing(
+            history_capacity, buffer=self._shm.buf, offset=history_offset
+        )
+        self.telemetry = HistoryRing(
+            telemetry_capacity, telemetry_width, self._shm.buf, telemetry_offset
+        )
+
+    @property
+    def seq(self):
+        return _SEQ.unpack_from(self._shm.buf, 0)[0] // 2
+
+    def publish(self, axes, buttons, thrusts=None):
+        buf = self._shm.buf
+        raw_seq = _SEQ.unpack_from(buf, 0)[0]
+        if thrusts is None:
+            thrusts = _STATE.unpack_from(buf, _STATE_OFFSET)[-NUM_THRUSTS:]
+        values = (
+            list(axes[:NUM_AXES])
+            + [1 if b else 0 for b in buttons[:NUM_BUTTONS]]
+            + [int(t) for t in thrusts[:NUM_THRUSTS]]
+        )
+        _SEQ.pack_into(buf, 0, raw_seq + 1)  # odd: write in progress
+        _STATE.pack_into(buf, _STATE_OFFSET, *values)
+        _SEQ.pack_into(buf, 0, raw_seq + 2)
+        self.history.append(
+            time.perf_counter(), values[:NUM_AXES], values[-NUM_THRUSTS:]
+        )
+
+    def snapshot(self, last_seq=-1, retries=100):
+        """Same contract as StateChannel.snapshot; None if unchanged (or torn too often)."""
+        buf = self._shm.buf
+        for _ in range(retries):
+            before = _SEQ.unpack_from(buf, 0)[0]
+            if before & 1:
+                continue
+            if before // 2 == last_seq:
+                return None
+            values = _STATE.unpack_from(buf, _STATE_OFFSET)
+            if _SEQ.unpack_from(buf, 0)[0] == before:
+                return (
+                    before // 2,
+                    values[:NUM_AXES],
+                    values[NUM_AXES : NUM_AXES + NUM_BUTTONS],
+                    values[NUM_AXES + NUM_BUTTONS :],
+                )
+        return None
+
+    def close(self):
+        self.logs = None
+        # Release the numpy views before closing the mapping
+        self.history = None
+        self.telemetry = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class RemoteLoopStats:
+    """Latest loop statistics reported by the worker process."""
+
+    def __init__(self, target_hz):
+        self.target_hz = target_hz
+        self._summary = None
+
+    def update(self, summary):
+        self._summary = summary
+
+    def summary(self):
+        return self._summary
+
+    def format_summary(self):
+        if self._summary is None:
+            return f"Loop: starting ({self.target_hz} Hz target)"
+        return format_loop_summary(self._summary)
+
+
+def _process_main(shm_name, conn, options):
+    """Entry point of the worker process: builds its own devices and runs the loop."""
+    from device_manager import THRUSTER_ROLE, DeviceManager
+    from filters import filters_from_config
+    from io_engine import ENGINE_STAGES
+    from joystick_reader import JoystickReader
+    from live_config import ConfigStore
+    from main import WORKER_STAGES, start_worker
+    from mission import source_from_config
+    from profiling import AllocationCounter, SamplingProfiler, StageTimers
+    from recorder import TelemetryRecorder
+    from scheduler import GcPacer, RateScheduler
+
+    channel = SharedStateChannel(name=shm_name)
+    config_store = ConfigStore()
+    config_store.load()
+    joystick = source_from_config(JoystickReader(**options["joystick"]))
+    device_manager = DeviceManager(**options["manager"])
+    device = device_manager.add(THRUSTER_ROLE, options.get("port"))
+    device_manager.start()
+    scheduler = RateScheduler(**options["scheduler"])
+    recorder = None
+    if options.get("recorder"):
+        recorder = TelemetryRecorder(**options["recorder"])
+    timers = StageTimers(WORKER_STAGES)
+    engine_timers = StageTimers(ENGINE_STAGES)
+    profiler = SamplingProfiler()
+    input_filter, send_gate = filters_from_config()
+    gc_pacer = GcPacer() if options.get("gc_paced") else None
+    allocations = AllocationCounter()
+
+    thread, stop_event = start_worker(
+        joystick,
+        device,
+        channel,
+        verbose=options.get("verbose", False),
+        pipelined=options.get("pipelined", False),
+        scheduler=scheduler,
+        config_store=config_store,
+        recorder=recorder,
+        stall_timeout=options.get("stall_timeout"),
+        timers=timers,
+        engine_timers=engine_timers,
+        input_filter=input_filter,
+        send_gate=send_gate,
+        gc_pacer=gc_pacer,
+        allocations=allocations,
+    )
+
+    next_stats = 0.0
+    try:
+        while thread.is_alive():
+            if conn.poll(0.1):
+                try:
+                    kind, payload = conn.recv()
+                except EOFError:
+                    break  # GUI process went away
+                if kind == "stop":
+                    break
+                if kind == "config":
+                    config_store.update(payload["values"], payload["push_to_device"])
+                elif kind == "reset_timers":
+                    timers.reset()
+                    engine_timers.reset()
+                    allocations.reset()
+                    profiler.clear()
+                elif kind == "profile":
+                    if payload:
+                        profiler.start()
+                    else:
+                        profiler.stop()
+            if time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + 0.5
+                conn.send(("stats", scheduler.stats.summary()))
+                conn.send(("devices", device_manager.status()))
+                conn.send(("link", device.metrics.summary()))
+                timer_summary = {
+                    "worker": timers.summary(),
+                    "allocations": allocations.summary(),
+                }
+                if gc_pacer is not None:
+                    timer_summary["gc"] = gc_pacer.summary()
+                if options.get("pipelined"):
+                    timer_summary["engine"] = engine_timers.summary()
+                conn.send(("timers", timer_summary))
+                if profiler.samples:
+                    conn.send(("profile", profiler.report()))
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        profiler.stop()
+        device_manager.stop()
+        stop_event.set()
+        thread.join()
+        device_manager.disconnect_all()
+        channel.close()
+        conn.close()
+
+
+class ProcessWorker:
+    """
+    Runs device_worker_loop in its own process (own GIL), so Tk redraws in
+    the GUI process cannot delay joystick sampling or serial writes.
+      - `channel`: SharedStateChannel with the latest state and device logs
+      - `stats`: RemoteLoopStats, refreshed by `poll()`
+      - `devices`: latest DeviceManager.status() of the worker, refreshed by `poll()`
+      - `link`: latest LinkMetrics.summary() of the thruster link (or None)
+      - `timers`: latest {"worker", "engine"} StageTimers summaries, with the
+        worker's "allocations" (AllocationCounter) and "gc" (GcPacer) summaries (or None)
+      - `profile`: latest SamplingProfiler report of the worker process (or None)
+      - `send_config(snapshot)`: forwards a ConfigSnapshot over the control pipe
+    `options` holds plain keyword arguments for the objects the child builds:
+    "joystick", "manager" (DeviceManager), "port", "scheduler", "recorder"
+    (or None), "verbose", "pipelined", "stall_timeout", "gc_paced".
+    """
+
+    def __init__(self, options, log_slots=256):
+        ctx = mp.get_context("spawn")
+        self.channel = SharedStateChannel(log_slots=log_slots)
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_process_main,
+            args=(self.channel.name, child_conn, options),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.stats = RemoteLoopStats(options["scheduler"].get("target_hz", 100))
+        self.devices = []
+        self.link = None
+        self.timers = None
+        self.profile = None
+
+    def poll(self):
+        """Collect messages (loop stats, device status, link metrics, timing) from the worker."""
+        try:
+            while self._conn.poll():
+                kind, payload = self._conn.recv()
+                if kind == "stats":
+                    self.stats.update(payload)
+                elif kind == "devices":
+                    self.devices = payload
+                elif kind == "link":
+                    self.link = payload
+                elif kind == "timers":
+                    self.timers = payload
+                elif kind == "profile":
+                    self.profile = payload
+        except (EOFError, OSError):
+            pass
+
+    def send_config(self, snapshot):
+        self._send(
+            (
+                "config",
+                {
+                    "values": snapshot.as_dict(),
+                    "push_to_device": snapshot.push_to_device,
+                },
+            )
+        )
+
+    def reset_timers(self):
+        self._send(("reset_timers", None))
+        self.profile = None
+
+    def set_profiling(self, enabled):
+        """Start or stop the sampling profiler in the worker process."""
+        self._send(("profile", enabled))
+
+    def _send(self, message):
+        try:
+            self._conn.send(message)
+        except (BrokenPipeError, OSError) as e:
+            print(f"Worker process not reachable: {e}")
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def stop(self, timeout=2.0):
+        """Ask the worker to exit cleanly; terminate it if it doesn't in time."""
+        try:
+            self._conn.send(("stop", None))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print("Worker process did not exit, terminating it.")
+            self.process.terminate()
+            self.process.join(timeout)
+        self._conn.close()
+        self.channel.close()
@@ -0,0 +1,414 @@
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import sysconfig
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+
+
+class LogHistogram:
+    """
+    Durations (seconds) in preallocated log-spaced buckets (no per-sample allocation).
+    Buckets go from `min_s` to `max_s` with `per_decade` buckets per x10;
+    percentiles are read from bucket upper edges (~12% resolution by default).
+    """
+
+    def __init__(self, min_s=1e-4, max_s=10.0, per_decade=20):
+        self.min_s = min_s
+        self.per_decade = per_decade
+        decades = math.log10(max_s / min_s)
+        self.num_buckets = int(math.ceil(decades * per_decade)) + 1
+        self.counts = array("Q", [0] * self.num_buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds <= self.min_s:
+            index = 0
+        else:
+            index = int(math.log10(seconds / self.min_s) * self.per_decade) + 1
+            index = min(index, self.num_buckets - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def upper_edge(self, index):
+        return self.min_s * 10 ** (index / self.per_decade)
+
+    def percentile(self, p):
+        """Upper bound (s) of the bucket holding the p-th percentile, 0.0 if empty."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.upper_edge(index), self.max)
+        return self.max
+
+    def reset(self):
+        for i in range(self.num_buckets):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class StageTimers:
+    """
+    Always-on timers for the named stages of a loop, one LogHistogram each
+    (1 us .. 10 s). Recording is a bucket increment, cheap enough to leave on
+    in the control loop:
+
+        t0 = time.perf_counter_ns()
+        joystick.update()
+        timers.record(JOYSTICK, time.perf_counter_ns() - t0)
+    """
+
+    def __init__(self, stages):
+        self.stages = tuple(stages)
+        self.histograms = [LogHistogram(min_s=1e-6) for _ in self.stages]
+
+    def record(self, stage, elapsed_ns):
+        """Add one duration (ns) to stage index `stage`."""
+        self.histograms[stage].record(elapsed_ns * 1e-9)
+
+    def reset(self):
+        for histogram in self.histograms:
+            histogram.reset()
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p99_ms, max_ms}} in stage order."""
+        out = {}
+        for name, h in zip(self.stages, self.histograms):
+            out[name] = {
+                "count": h.count,
+                "mean_ms": h.total / h.count * 1e3 if h.count else 0.0,
+                "p50_ms": h.percentile(50) * 1e3,
+                "p99_ms": h.percentile(99) * 1e3,
+                "max_ms": h.max * 1e3,
+            }
+        return out
+
+    def format_summary(self, title="Stage"):
+        return format_stage_summary(self.summary(), title)
+
+
+def format_stage_summary(summary, title="Stage"):
+    """Fixed-width table of StageTimers.summary() (also used for process-mode stats)."""
+    lines = [f"{title:<12}{'count':>8}{'mean':>9}{'p50':>9}{'p99':>9}{'max':>9} ms"]
+    for name, s in summary.items():
+        lines.append(
+            f"{name:<12}{s['count']:>8}{s['mean_ms']:>9.3f}{s['p50_ms']:>9.3f}"
+            f"{s['p99_ms']:>9.3f}{s['max_ms']:>9.3f}"
+        )
+    return "\n".join(lines)
+
+
+class AllocationCounter:
+    """
+    What each tick of a loop leaves allocated, between `begin()` and `end()`:
+      - blocks: net change of sys.getallocatedblocks() (any object)
+      - objects: net change of gc's generation 0 count, i.e. new containers
+        (dicts, lists, tuples, ...) the collector will have to scan. It is
+        exact when no collection runs inside the tick (with a GcPacer).
+    Temporaries freed within the tick (ints, numpy scratch) go straight back
+    to the allocator and are not counted. Ticks still allocate while bounded
+    buffers fill (the device log keeps its last 500 responses), and a
+    changing input or a busy link can leave a few blocks or objects behind;
+    once those are full, a tick with a steady input leaves 0 of both
+    (test_allocations.py). Both count every thread, so they are exact only
+    while the loop's thread is the one allocating (not with the serial I/O
+    threads). The first `warmup` ticks are not counted. Cheap enough to
+    leave on.
+    """
+
+    def __init__(self, warmup=100):
+        self.warmup = warmup
+        self.ticks = 0
+        self.allocating_ticks = 0  # Counted ticks that left anything allocated
+        self.blocks = 0  # Net over all counted ticks
+        self.objects = 0
+        self.max_blocks = 0
+        self.max_objects = 0
+        self._start_blocks = 0
+        self._start_objects = 0
+
+    def begin(self):
+        self._start_objects = gc.get_count()[0]
+        self._start_blocks = sys.getallocatedblocks()
+
+    def end(self):
+        blocks = sys.getallocatedblocks() - self._start_blocks
+        objects = gc.get_count()[0] - self._start_objects
+        self.ticks += 1
+        if self.ticks <= self.warmup:
+            return
+        self.blocks += blocks
+        self.objects += objects
+        if blocks > 0 or objects > 0:
+            self.allocating_ticks += 1
+        if blocks > self.max_blocks:
+            self.max_blocks = blocks
+        if objects > self.max_objects:
+            self.max_objects = objects
+
+    def reset(self):
+        self.ticks = min(self.ticks, self.warmup)
+        self.allocating_ticks = self.blocks = self.objects = 0
+        self.max_blocks = self.max_objects = 0
+
+    def summary(self):
+        return {
+            "ticks": max(self.ticks - self.warmup, 0),
+            "allocating_ticks": self.allocating_ticks,
+            "net_blocks": self.blocks,
+            "net_objects": self.objects,
+            "max_blocks": self.max_blocks,
+            "max_objects": self.max_objects,
+        }
+
+
+def format_allocation_summary(s):
+    """One-line summary of AllocationCounter.summary()."""
+    return (
+        f"Allocations: {s['allocating_ticks']}/{s['ticks']} ticks left memory "
+        f"allocated, net {s['net_blocks']} blocks / {s['net_objects']} gc objects "
+        f"(max {s['max_blocks']} / {s['max_objects']} per tick)"
+    )
+
+
+class StartupTimer:
+    """
+    Wall time of each startup step (imports, pygame init, connecting, first
+    tick), for the startup report:
+
+        startup = StartupTimer()
+        import customtkinter
+        startup.mark("import customtkinter")  # time since the previous mark
+
+    `with startup.phase(name):` times a block that does not directly follow
+    the previous mark.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.steps = []  # [(name, seconds)]
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def phase(self, name):
+        self._last = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def summary(self):
+        """{"steps_ms": {name: ms}, "total_ms": start to the last mark}"""
+        return {
+            "steps_ms": {name: seconds * 1e3 for name, seconds in self.steps},
+            "total_ms": (self._last - self.start) * 1e3,
+        }
+
+    def format_report(self):
+        summary = self.summary()
+        lines = [f"{'Startup':<28}{'ms':>9}"]
+        for name, ms in summary["steps_ms"].items():
+            lines.append(f"{name:<28}{ms:>9.1f}")
+        lines.append(f"{'total':<28}{summary['total_ms']:>9.1f}")
+        return "\n".join(lines)
+
+
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+
+def _area(filename):
+    """Library a frame belongs to: the site-packages package, 'stdlib', or the file name."""
+    parts = filename.replace("\\", "/").split("/")
+    if "site-packages" in parts:
+        index = parts.index("site-packages")
+        if index + 1 < len(parts):
+            return parts[index + 1].split(".")[0]
+    if filename.startswith(_STDLIB) or filename.startswith("<"):
+        return "stdlib"
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler. While running, a background thread grabs the
+    stack of every thread each `interval` seconds and counts, per thread name:
+      - the innermost frame (file:line function), i.e. where the thread is
+      - the library of that frame (pygame, serial, customtkinter, one of our
+        modules, or "stdlib via <caller>"), to tell pygame, serial and Tk
+        stalls apart
+    Native calls do not appear as frames; they are counted on the Python
+    line that made them. `start()`/`stop()` can be called at any time.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self._locations = Counter()  # (thread, location) -> samples
+        self._areas = Counter()  # (thread, area) -> samples
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._thread = None
+
+    @property
+    def running(self):
+        return not self._stopped.is_set()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def clear(self):
+        with self._lock:
+            self.samples = 0
+            self._locations.clear()
+            self._areas.clear()
+
+    def report(self, limit=10):
+        """{"samples", "areas": [(thread, area, share)], "locations": [(thread, location, share)]}"""
+        with self._lock:
+            total = self.samples or 1
+            return {
+                "samples": self.samples,
+                "areas": [
+                    (thread, area, n / total)
+                    for (thread, area), n in self._areas.most_common(limit)
+                ],
+                "locations": [
+                    (thread, location, n / total)
+                    for (thread, location), n in self._locations.most_common(limit)
+                ],
+            }
+
+    def format_report(self, limit=10):
+        return format_profile_report(self.report(limit))
+
+    @staticmethod
+    def _frame_area(frame):
+        """Library of the frame; stdlib frames are credited to their first non-stdlib caller."""
+        area = _area(frame.f_code.co_filename)
+        if area != "stdlib":
+            return area
+        caller = frame.f_back
+        while caller is not None:
+            caller_area = _area(caller.f_code.co_filename)
+            if caller_area != "stdlib":
+                return f"stdlib via {caller_area}"
+            caller = caller.f_back
+        return area
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                self.samples += 1
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    thread = names.get(ident, str(ident))
+                    code = frame.f_code
+                    location = (
+                        f"{os.path.basename(code.co_filename)}:{frame.f_lineno} "
+                        f"{code.co_name}"
+                    )
+                    self._locations[thread, location] += 1
+                    self._areas[thread, self._frame_area(frame)] += 1
+            del frames
+
+
+def format_profile_report(report):
+    """Text form of SamplingProfiler.report()."""
+    if not report["samples"]:
+        return "Profiler: no samples"
+    lines = [f"Profiler: {report['samples']} samples (share of samples per thread)"]
+    lines.append("By library:")
+    for thread, area, share in report["areas"]:
+        lines.append(f"  {share * 100:5.1f}%  {thread:<16} {area}")
+    lines.append("Hot lines:")
+    for thread, location, share in report["locations"]:
+        lines.append(f"  {share * 100:5.1f}%  {thread:<16} {location}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the control loop against a simulated device and dump "
+        "its per-stage timing (and optionally a sampling profile)."
+    )
+    parser.add_argument("--ticks", type=int, default=1000, help="Synthetic run length")
+    parser.add_argument("--hz", type=float, default=100)
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument("--blocking", action="store_true", help="No I/O engine")
+    parser.add_argument("--profile", action="store_true", help="Sample all threads")
+    parser.add_argument("--json", action="store_true", help="Print JSON, not tables")
+    args = parser.parse_args()
+
+    from replay import run_simulation, synthetic_run
+
+    profiler = SamplingProfiler() if args.profile else None
+    if profiler is not None:
+        profiler.start()
+    result = run_simulation(
+        synthetic_run(args.ticks, args.hz),
+        hz=args.hz,
+        pipelined=not args.blocking,
+        wire_format=args.format,
+    )
+    if profiler is not None:
+        profiler.stop()
+        result["profile"] = profiler.report()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(format_stage_summary(result["stages"], "Worker"))
+    if "engine_stages" in result:
+        print(format_stage_summary(result["engine_stages"], "Serial I/O"))
+    if profiler is not None:
+        print(format_profile_report(result["profile"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import struct
+import binascii
+import json
+from collections import namedtuple
+
+
+SYNC_BYTE = 0xA5
+
+# Order in which thrust values are packed into a binary frame
+THRUST_FIELDS = ("left_thrust_power", "right_thrust_power", "z_thrust_power")
+
+Frame = namedtuple("Frame", ["seq", "values"])
+
+# Discovery handshake: the host sends HANDSHAKE_REQUEST, CRAMS firmware answers
+# with one JSON line naming its board role, e.g. {"crams": "thrusters", "fw": "1.2"}
+HANDSHAKE_REQUEST = b'{"hello": "crams"}\n'
+
+
+def split_messages(buf, frame_size):
+    """
+    Yield complete messages from a host->device byte stream, removing them
+    from `buf` (a bytearray): binary frames start with SYNC_BYTE and are
+    `frame_size` long, anything else is a newline-terminated text line.
+    Incomplete trailing bytes stay in `buf`.
+    """
+    while buf:
+        if buf[0] == SYNC_BYTE:
+            if len(buf) < frame_size:
+                return
+            message = bytes(buf[:frame_size])
+            del buf[:frame_size]
+        else:
+            end = buf.find(b"\n")
+            if end < 0:
+                return
+            message = bytes(buf[: end + 1])
+            del buf[: end + 1]
+        yield message
+
+
+def parse_handshake(line):
+    """Return the reply dict if `line` is a CRAMS handshake reply, else None."""
+    try:
+        reply = json.loads(line)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if isinstance(reply, dict) and isinstance(reply.get("crams"), str):
+        return reply
+    return None
+
+
+class BinaryFrameCodec:
+    """
+    Builds fixed-layout binary frames:
+      sync (u8) | seq (u8) | N x value (int16, little endian) | CRC-16/CCITT (u16)
+    The CRC covers everything after the sync byte.
+    """
+
+    def __init__(self, num_values=len(THRUST_FIELDS)):
+        self.num_values = num_values
+        self._body = struct.Struct(f"<BB{num_values}h")
+        self._crc = struct.Struct("<H")
+        self.frame_size = self._body.size + self._crc.size
+
+        # Preallocated output buffer, reused for every frame
+        self._buffer = bytearray(self.frame_size)
+        self._crc_view = memoryview(self._buffer)[1 : self._body.size]
+        self.seq = 0
+
+    def encode(self, values):
+        """
+        Pack `values` into the frame buffer and return it.
+        The returned buffer is reused by the next call, so write it out
+        (or copy it) before encoding again.
+        """
+        self._body.pack_into(self._buffer, 0, SYNC_BYTE, self.seq, *values)
+        crc = binascii.crc_hqx(self._crc_view, 0xFFFF)
+        self._crc.pack_into(self._buffer, self._body.size, crc)
+        self.seq = (self.seq + 1) & 0xFF
+        return self._buffer
+
+    def encode_dict(self, data_dict, fields=THRUST_FIELDS):
+        """Encode a thrust dict using the field order in `fields`."""
+        return self.encode([int(data_dict[key]) for key in fields])
+
+
+class JsonCommandCodec:
+    """
+    Builds JSON thrust command lines in one preallocated buffer:
+      {"left_thrust_power":  3300, "right_thrust_power":  3300, "z_thrust_power":  5200, "seq":  17}
+    Every number has a fixed-width slot, right-aligned and padded with spaces
+    (which JSON allows), so encoding only rewrites the digits in place. A
+    value too wide for its slot falls back to a freshly built compact line.
+    """
+
+    def __init__(self, fields=THRUST_FIELDS, sequenced=True, width=5, seq_width=3):
+        self.fields = tuple(fields)
+        self.num_values = len(self.fields)
+        self.sequenced = sequenced
+        self.width = width
+
+        names = self.fields + (("seq",) if sequenced else ())
+        widths = [width] * self.num_values + ([seq_width] if sequenced else [])
+        line = bytearray(b"{")
+        self._slots = []  # (slice of the line, %d format, width) per number
+        for i, (name, slot_width) in enumerate(zip(names, widths)):
+            if i:
+                line += b", "
+            line += f'"{name}": '.encode()
+            start = len(line)
+            line += b" " * slot_width
+            self._slots.append(
+                (
+                    slice(start, start + slot_width),
+                    f"%{slot_width}d".encode(),
+                    slot_width,
+                )
+            )
+        line += b"}\n"
+        self._buffer = line
+
+    def encode(self, values, seq=None):
+        """
+        Write `values` (in `fields` order) and `seq` into the line buffer and
+        return it. The buffer is reused by the next call, like
+        BinaryFrameCodec.encode.
+        """
+        buffer = self._buffer
+        slots = self._slots
+        for i in range(len(slots)):
+            slot, number_format, width = slots[i]
+            text = number_format % (values[i] if i < self.num_values else seq)
+            if len(text) != width:
+                return self._encode_compact(values, seq)
+            buffer[slot] = text
+        return buffer
+
+    def _encode_compact(self, values, seq):
+        command = {name: int(value) for name, value in zip(self.fields, values)}
+        if self.sequenced:
+            command["seq"] = seq
+        return (json.dumps(command) + "\n").encode("utf-8")
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for binary frames. Feed it bytes as they arrive and
+    pull complete frames out; partial frames are kept until the rest shows up.
+    """
+
+    def __init__(self, num_values=len(THRUST_FIELDS)):
+        self.num_values = num_values
+        self._body = struct.Struct(f"<BB{num_values}h")
+        self._crc = struct.Struct("<H")
+        self.frame_size = self._body.size + self._crc.size
+        self._buffer = bytearray()
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """Append received bytes to the internal buffer."""
+        self._buffer += data
+
+    def next_frame(self):
+        """Return the next valid Frame, or None if no complete frame is buffered."""
+        buf = self._buffer
+        while True:
+            start = buf.find(SYNC_BYTE)
+            if start < 0:
+                self.skipped_bytes += len(buf)
+                buf.clear()
+                return None
+            if start:
+                self.skipped_bytes += start
+                del buf[:start]
+            if len(buf) < self.frame_size:
+                return None
+
+            (crc,) = self._crc.unpack_from(buf, self._body.size)
+            if binascii.crc_hqx(buf[1 : self._body.size], 0xFFFF) != crc:
+                # Bad frame or a false sync byte: drop it and rescan
+                self.crc_errors += 1
+                self.skipped_bytes += 1
+                del buf[:1]
+                continue
+
+            fields = self._body.unpack_from(buf, 0)
+            del buf[: self.frame_size]
+            return Frame(fields[1], fields[2:])
+
+    def frames(self, data=b""):
+        """Feed `data` and yield every complete frame now available."""
+        if data:
+            self.feed(data)
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def reset(self):
+        """Drop any buffered partial frame."""
+        self._buffer.clear()
@@ -0,0 +1,176 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from protocol import Frame
+
+# Fixed-width record, one per control loop tick
+RECORD_DTYPE = np.dtype(
+    [
+        ("t_ns", "<i8"),  # perf_counter_ns at record time
+        ("axes", "<f4", (6,)),  # joystick axes (see mixer.INPUT_NAMES)
+        ("buttons", "<u2"),  # button bitmask, bit i = button i
+        ("thrust", "<i4", (3,)),  # commanded thrusts (protocol.THRUST_FIELDS)
+        ("resp_count", "<u2"),  # device responses received this tick
+        ("resp_seq", "<i4"),  # last binary response seq (-1 if none)
+        ("resp_values", "<i4", (4,)),  # last binary response values
+        ("resp_text", "S48"),  # last text response (truncated)
+    ]
+)
+
+MAGIC = b"CRAMSREC"
+FORMAT_VERSION = 1
+# magic | version | record size | capacity | count | wall-clock start (ns) | start t_ns
+HEADER = struct.Struct("<8sIIQQqq")
+HEADER_SIZE = 64
+
+
+class TelemetryRecorder:
+    """
+    Appends one fixed-width record per tick to a preallocated, memory-mapped
+    file. `record` only writes into the mapping (no syscalls, no per-tick
+    objects kept); a background thread updates the header and flushes
+    every `flush_interval` seconds. When `capacity` is reached, further
+    records are counted in `dropped` instead of growing the file.
+    """
+
+    def __init__(self, path, capacity=720_000, flush_interval=1.0):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        self._file = open(path, "w+b")
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+
+        self._start_wall_ns = time.time_ns()
+        self._start_ns = time.perf_counter_ns()
+        self._records = np.frombuffer(
+            self._mm, dtype=RECORD_DTYPE, count=capacity, offset=HEADER_SIZE
+        )
+        # Column views so each tick is a handful of in-place writes
+        self._t = self._records["t_ns"]
+        self._axes = self._records["axes"]
+        self._buttons = self._records["buttons"]
+        self._thrust = self._records["thrust"]
+        self._resp_count = self._records["resp_count"]
+        self._resp_seq = self._records["resp_seq"]
+        self._resp_values = self._records["resp_values"]
+        self._resp_text = self._records["resp_text"]
+        self._write_header()
+
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def record(self, axes, buttons, thrusts, response=None, response_count=0):
+        """Append one tick. `response` is the last device response (str or Frame)."""
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        self._t[i] = time.perf_counter_ns()
+        self._axes[i] = axes
+        mask = 0
+        for bit, pressed in enumerate(buttons):
+            if pressed:
+                mask |= 1 << bit
+        self._buttons[i] = mask
+        self._thrust[i] = thrusts
+        self._resp_count[i] = response_count
+        if isinstance(response, Frame):
+            self._resp_seq[i] = response.seq
+            values = response.values[:4]
+            self._resp_values[i, : len(values)] = values
+        else:
+            self._resp_seq[i] = -1
+            if response:
+                self._resp_text[i] = response.encode("utf-8", "replace")[:48]
+        self.count = i + 1
+
+    def flush(self):
+        """Write the record count to the header and flush the mapping to disk."""
+        with self._lock:
+            if self._mm.closed:
+                return
+            self._write_header()
+            self._mm.flush()
+
+    def close(self):
+        """Stop the flusher, flush, and trim the file to the records written."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        with self._lock:
+            # Drop the numpy views before unmapping
+            self._records = self._t = self._axes = self._buttons = None
+            self._thrust = self._resp_count = self._resp_seq = None
+            self._resp_values = self._resp_text = None
+            self._mm.close()
+            self._file.truncate(HEADER_SIZE + self.count * RECORD_DTYPE.itemsize)
+            self._file.close()
+        print(f"Recorded {self.count} ticks to {self.path} ({self.dropped} dropped).")
+
+    def _write_header(self):
+        HEADER.pack_into(
+            self._mm,
+            0,
+            MAGIC,
+            FORMAT_VERSION,
+            RECORD_DTYPE.itemsize,
+            self.capacity,
+            self.count,
+            self._start_wall_ns,
+            self._start_ns,
+        )
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+
+def read_header(path):
+    """Return the header of a recording as a dict."""
+    with open(path, "rb") as f:
+        fields = HEADER.unpack(f.read(HEADER.size))
+    magic, version, record_size, capacity, count, start_wall_ns, start_ns = fields
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a CRAMS recording")
+    if version != FORMAT_VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has an unsupported record layout")
+    return {
+        "capacity": capacity,
+        "count": count,
+        "start_wall_ns": start_wall_ns,
+        "start_ns": start_ns,
+    }
+
+
+def open_run(path):
+    """
+    Open a recording as a read-only structured array backed by the file
+    itself (no copy). Columns are views: run["axes"], run["thrust"], ...
+    """
+    header = read_header(path)
+    if header["count"] == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(
+        path,
+        dtype=RECORD_DTYPE,
+        mode="r",
+        offset=HEADER_SIZE,
+        shape=(header["count"],),
+    )
@@ -0,0 +1,97 @@
+import time
+from array import array
+
+
+class RenderStats:
+    """Rolling window of per-frame render times (ms) and widgets touched."""
+
+    def __init__(self, window=256):
+        self.window = window
+        self._times = array("d", [0.0] * window)
+        self._index = 0
+        self.frames = 0
+        self.widgets_updated = 0  # total since start
+        self.last_ms = 0.0
+
+    def record(self, elapsed_ms, widgets):
+        self._times[self._index] = elapsed_ms
+        self._index = (self._index + 1) % self.window
+        self.frames += 1
+        self.widgets_updated += widgets
+        self.last_ms = elapsed_ms
+
+    def summary(self):
+        n = min(self.frames, self.window)
+        times = sorted(self._times[:n])
+        if not times:
+            return {"frames": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "frames": self.frames,
+            "p50_ms": times[n // 2],
+            "p99_ms": times[min(n - 1, n * 99 // 100)],
+            "max_ms": times[-1],
+            "widgets_per_frame": self.widgets_updated / self.frames,
+        }
+
+    def format_summary(self):
+        s = self.summary()
+        if not s["frames"]:
+            return "GUI render: --"
+        return (
+            f"GUI render: p50 {s['p50_ms']:.2f} p99 {s['p99_ms']:.2f} "
+            f"max {s['max_ms']:.2f} ms  ({s['widgets_per_frame']:.1f} widgets/frame)"
+        )
+
+
+class PanelRenderer:
+    """
+    Updates the PS4 panel widgets from a state snapshot, touching only the
+    widgets whose *displayed* value changed since the last render.
+    Axis values are quantized to the label precision before comparing, so
+    noise below 0.01 never reaches Tk.
+    """
+
+    def __init__(self, axis_labels, checkboxes, precision=2):
+        self.axis_labels = axis_labels  # {(i, j): label}
+        self.checkboxes = checkboxes  # {button index: checkbox}
+        self.precision = precision
+        self._scale = 10**precision
+        self._rendered_axes = {}  # {(i, j): (quantized i, quantized j)}
+        self._rendered_buttons = {}  # {button index: 0/1}
+        self.stats = RenderStats()
+
+    def render(self, axes, buttons):
+        """Apply one snapshot; returns the number of widgets updated."""
+        start = time.perf_counter()
+        updated = 0
+        scale = self._scale
+
+        for pair, label in self.axis_labels.items():
+            quantized = (round(axes[pair[0]] * scale), round(axes[pair[1]] * scale))
+            if self._rendered_axes.get(pair) != quantized:
+                self._rendered_axes[pair] = quantized
+                label.configure(
+                    text=f"[{quantized[0] / scale:.{self.precision}f}, "
+                    f"{quantized[1] / scale:.{self.precision}f}]"
+                )
+                updated += 1
+
+        for idx, cb in self.checkboxes.items():
+            if idx >= len(buttons):
+                continue
+            pressed = 1 if buttons[idx] else 0
+            if self._rendered_buttons.get(idx) != pressed:
+                self._rendered_buttons[idx] = pressed
+                if pressed:
+                    cb.select()
+                else:
+                    cb.deselect()
+                updated += 1
+
+        self.stats.record((time.perf_counter() - start) * 1e3, updated)
+        return updated
+
+    def invalidate(self):
+        """Force every widget to be redrawn on the next render."""
+        self._rendered_axes.clear()
+        self._rendered_buttons.clear()
@@ -0,0 +1,264 @@
+import argparse
+import json
+import time
+from array import array
+
+import numpy as np
+
+from channel import StateChannel
+from config import LoopConfig
+from filters import filters_from_config
+from joystick_reader import JoystickReader, NUM_AXES, NUM_BUTTONS
+from io_engine import ENGINE_STAGES
+from main import WORKER_STAGES, start_worker
+from mission import BlendedSource, MissionSource, load_mission
+from profiling import AllocationCounter, StageTimers
+from recorder import RECORD_DTYPE, open_run
+from scheduler import GcPacer, RateScheduler
+from sim_device import SimClock, SimulatedDevice
+
+
+class ReplayJoystick(JoystickReader):
+    """
+    JoystickReader that plays back the inputs of a recorded run.
+
+    `realtime=True` follows the recorded timestamps on `clock` (so a fast
+    SimClock replays faster than real time); `realtime=False` advances one
+    record per `update()`. `finished` is set once the run has been played,
+    unless `loop=True`.
+    """
+
+    def __init__(self, run, realtime=True, loop=False, clock=None):
+        # No pygame here: the state comes from the recording
+        if isinstance(run, str):
+            run = open_run(run)
+        self.joysticks = []
+        self.event_driven = False
+        self.deadzone = 0.0
+        self.change_threshold = 0.0
+
+        self._axes_log = np.asarray(run["axes"], dtype=np.float64)
+        self._buttons_log = np.asarray(run["buttons"])
+        t = np.asarray(run["t_ns"], dtype=np.int64)
+        self._offsets = t - t[0] if len(t) else t
+        self.realtime = realtime
+        self.loop = loop
+        self.clock = clock or SimClock()
+        self._start_ns = None
+        self.index = -1
+        self.finished = len(self._offsets) == 0
+
+        self.axes = array("d", [0.0] * NUM_AXES)
+        self.buttons = [0] * NUM_BUTTONS
+        self.changed = True
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def update(self):
+        if self.finished:
+            return
+        if self.realtime:
+            if self._start_ns is None:
+                self._start_ns = self.clock.now_ns()
+            elapsed = self.clock.now_ns() - self._start_ns
+            if self.loop and len(self._offsets) > 1:
+                elapsed %= int(self._offsets[-1]) + 1
+            index = int(np.searchsorted(self._offsets, elapsed, side="right")) - 1
+        else:
+            index = self.index + 1
+            if index >= len(self._offsets) and self.loop:
+                index = 0
+
+        if index >= len(self._offsets) - 1 and not self.loop:
+            self.finished = True
+        index = min(max(index, 0), len(self._offsets) - 1)
+        if index == self.index:
+            return
+        self.index = index
+
+        axes = self._axes_log[index]
+        for i in range(NUM_AXES):
+            if self.axes[i] != axes[i]:
+                self.axes[i] = axes[i]
+                self.changed = True
+        mask = int(self._buttons_log[index])
+        for i in range(NUM_BUTTONS):
+            pressed = (mask >> i) & 1
+            if self.buttons[i] != pressed:
+                self.buttons[i] = pressed
+                self.changed = True
+
+    def cleanup(self):
+        pass
+
+
+def synthetic_run(ticks=1000, hz=100, seed=0):
+    """Generate a run-shaped array of smooth random stick motion (no recording needed)."""
+    rng = np.random.default_rng(seed)
+    run = np.zeros(ticks, dtype=RECORD_DTYPE)
+    run["t_ns"] = np.arange(ticks, dtype=np.int64) * int(1e9 / hz)
+    steps = rng.normal(0, 0.05, (ticks, NUM_AXES))
+    run["axes"] = np.clip(np.cumsum(steps, axis=0), -1, 1)
+    run["axes"][:, 4:] = (run["axes"][:, 4:] + 1) * 0.5  # triggers are 0..1
+    run["buttons"] = rng.integers(0, 2, ticks) * (1 << rng.integers(0, 16, ticks))
+    return run
+
+
+def run_simulation(
+    run,
+    hz=100,
+    speed=1.0,
+    pipelined=True,
+    wire_format="json",
+    baud_rate=115200,
+    timeout=0.05,
+    echo_latency=0.002,
+    drop_rate=0.0,
+    max_seconds=None,
+    filtered=False,
+    mission=None,
+):
+    """
+    Drive the real worker loop with a replayed joystick and a simulated device.
+    Returns a dict of loop timing, link counters, per-stage timing (wall time)
+    and what each tick allocated.
+    `filtered=True` adds the input filter and send gate from FilterConfig.
+    A `mission` (path to a mission script) runs from the first tick, blended
+    with the replayed sticks as a manual override, or alone if `run` is None.
+    """
+    clock = SimClock(speed)
+    replay = joystick = mission_source = None
+    if run is not None:
+        replay = joystick = ReplayJoystick(run, realtime=True, clock=clock)
+    if mission is not None:
+        mission_source = MissionSource(load_mission(mission, hz), clock.now_ns)
+        if replay is None:
+            joystick = mission_source
+        else:
+            joystick = BlendedSource(
+                replay,
+                mission_source,
+                start_button=None,
+                abort_button=None,
+                clock=clock.now_ns,
+            )
+    device = SimulatedDevice(
+        baud_rate=baud_rate,
+        timeout=timeout,
+        wire_format=wire_format,
+        echo_latency=echo_latency,
+        drop_rate=drop_rate,
+        clock=clock,
+    )
+    device.connect()
+    link = device.ser
+    channel = StateChannel()
+    scheduler = RateScheduler(hz, clock=clock.now_ns, sleep=clock.sleep)
+    timers = StageTimers(WORKER_STAGES)
+    engine_timers = StageTimers(ENGINE_STAGES)
+    input_filter, send_gate = filters_from_config() if filtered else (None, None)
+    gc_pacer = GcPacer() if LoopConfig.GC_PACED else None
+    allocations = AllocationCounter()
+
+    wall_start = time.perf_counter()
+    thread, stop_event = start_worker(
+        joystick,
+        device,
+        channel,
+        verbose=True,
+        pipelined=pipelined,
+        scheduler=scheduler,
+        timers=timers,
+        engine_timers=engine_timers,
+        input_filter=input_filter,
+        send_gate=send_gate,
+        gc_pacer=gc_pacer,
+        allocations=allocations,
+    )
+    while not joystick.finished:
+        if max_seconds is not None and time.perf_counter() - wall_start > max_seconds:
+            break
+        time.sleep(0.01)
+    stop_event.set()
+    thread.join()
+    wall = time.perf_counter() - wall_start
+
+    result = {
+        "ticks_replayed": (replay or mission_source).index + 1,
+        "wall_seconds": wall,
+        "sim_seconds": wall * speed,
+        "speed": speed,
+        "loop": scheduler.stats.summary(),
+        "messages_sent": link.messages_received,
+        "bytes_sent": link.bytes_written,
+        "responses_dropped_by_link": link.responses_dropped,
+        "log_lines": len(channel.logs) + channel.logs.dropped,
+        "link": device.metrics.summary(),
+        "telemetry": device.parser.summary(),
+        "stages": timers.summary(),
+        "allocations": allocations.summary(),
+    }
+    if gc_pacer is not None:
+        result["gc"] = gc_pacer.summary()
+    if pipelined:
+        result["engine_stages"] = engine_timers.summary()
+    if send_gate is not None:
+        result["send_gate"] = send_gate.summary()
+    if mission_source is not None:
+        result["mission"] = mission_source.summary()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded run (or synthetic input) through the control "
+        "loop against a simulated device, and report timing as JSON."
+    )
+    parser.add_argument(
+        "run", nargs="?", help="Recording (.crec); synthetic if omitted"
+    )
+    parser.add_argument("--ticks", type=int, default=1000, help="Synthetic run length")
+    parser.add_argument("--hz", type=float, default=100)
+    parser.add_argument("--speed", type=float, default=1.0, help="Sim time / wall time")
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--timeout", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.002, help="Echo latency (s)")
+    parser.add_argument("--drop", type=float, default=0.0, help="Response drop rate")
+    parser.add_argument("--blocking", action="store_true", help="No I/O engine")
+    parser.add_argument(
+        "--mission",
+        help="Mission script to run (alone, or blended with the given recording)",
+    )
+    parser.add_argument(
+        "--filter",
+        action="store_true",
+        help="Input filter and send gate (FilterConfig)",
+    )
+    args = parser.parse_args()
+
+    if args.run:
+        run = args.run
+    elif args.mission:
+        run = None
+    else:
+        run = synthetic_run(args.ticks, args.hz)
+    result = run_simulation(
+        run,
+        hz=args.hz,
+        speed=args.speed,
+        pipelined=not args.blocking,
+        wire_format=args.format,
+        baud_rate=args.baud,
+        timeout=args.timeout,
+        echo_latency=args.latency,
+        drop_rate=args.drop,
+        filtered=args.filter,
+        mission=args.mission,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
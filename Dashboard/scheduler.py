@@ -0,0 +1,226 @@
+import argparse
+import gc
+import time
+from array import array
+
+
+OVERRUN_POLICIES = ("skip", "catch_up")
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def _distribution_ms(sorted_values):
+    return {
+        "p50": _percentile(sorted_values, 50) / 1e6,
+        "p90": _percentile(sorted_values, 90) / 1e6,
+        "p99": _percentile(sorted_values, 99) / 1e6,
+        "max": (sorted_values[-1] if sorted_values else 0) / 1e6,
+    }
+
+
+def format_loop_summary(s):
+    """One-line text for a LoopStats.summary() dict."""
+    period, jitter = s["period_ms"], s["jitter_ms"]
+    return (
+        f"Loop: {s['achieved_hz']:.1f}/{s['target_hz']} Hz  "
+        f"period p50 {period['p50']:.2f} p99 {period['p99']:.2f} ms  "
+        f"jitter p99 {jitter['p99']:.2f} max {jitter['max']:.2f} ms  "
+        f"overruns {s['overruns']} (skipped {s['skipped_ticks']})"
+    )
+
+
+class LoopStats:
+    """
+    Rolling window of loop period and jitter samples (in ns), plus
+    overrun counters. Written by the control thread, read by anyone.
+    """
+
+    def __init__(self, target_hz, window=1000):
+        self.target_hz = target_hz
+        self.window = window
+        self._periods = array("q", bytes(8 * window))
+        self._jitters = array("q", bytes(8 * window))
+        self._index = 0
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+
+    def record(self, period_ns, jitter_ns):
+        i = self._index
+        self._periods[i] = period_ns
+        self._jitters[i] = jitter_ns
+        self._index = (i + 1) % self.window
+        self.ticks += 1
+
+    def summary(self):
+        """Percentile summary of the current window (times in ms)."""
+        n = min(self.ticks, self.window)
+        periods = sorted(self._periods[:n])
+        jitters = sorted(self._jitters[:n])
+        mean_period = sum(periods) / n if n else 0
+        return {
+            "target_hz": self.target_hz,
+            "achieved_hz": 1e9 / mean_period if mean_period else 0.0,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped_ticks,
+            "period_ms": _distribution_ms(periods),
+            "jitter_ms": _distribution_ms(jitters),
+        }
+
+    def format_summary(self):
+        return format_loop_summary(self.summary())
+
+
+class RateScheduler:
+    """
+    Fixed-rate loop pacing against absolute deadlines on perf_counter_ns.
+    Call `wait()` once at the end of every iteration.
+
+    Overrun policy (when an iteration runs past the next deadline):
+      - "skip":     drop the missed ticks and realign to the next deadline
+      - "catch_up": keep the schedule, running late ticks back-to-back
+    """
+
+    def __init__(
+        self,
+        target_hz=100,
+        overrun_policy="skip",
+        window=1000,
+        clock=time.perf_counter_ns,
+        sleep=time.sleep,
+    ):
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy: {overrun_policy!r}")
+        self.target_hz = target_hz
+        self.period_ns = int(1e9 / target_hz)
+        self.overrun_policy = overrun_policy
+        self.stats = LoopStats(target_hz, window)
+        self._clock = clock
+        self._sleep = sleep
+        self._next_deadline = None
+        self._last_tick = None
+
+    def now_ns(self):
+        """Current time on the scheduler's clock."""
+        return self._clock()
+
+    def start(self):
+        """(Re)anchor the schedule at the current time."""
+        now = self._clock()
+        self._last_tick = now
+        self._next_deadline = now + self.period_ns
+
+    def wait(self):
+        """Sleep until the next deadline and record timing for this tick."""
+        if self._next_deadline is None:
+            self.start()
+
+        remaining = self._next_deadline - self._clock()
+        if remaining > 0:
+            self._sleep(remaining / 1e9)
+
+        now = self._clock()
+        lateness = now - self._next_deadline
+        self.stats.record(now - self._last_tick, lateness)
+        self._last_tick = now
+
+        if lateness >= self.period_ns:
+            self.stats.overruns += 1
+            missed = lateness // self.period_ns
+            if self.overrun_policy == "skip":
+                self.stats.skipped_ticks += missed
+                self._next_deadline += (missed + 1) * self.period_ns
+                return
+        self._next_deadline += self.period_ns
+
+
+class GcPacer:
+    """
+    Keeps garbage collection out of the control loop's ticks. Automatic
+    collection runs whenever allocations in any thread (GUI included) cross
+    gc's threshold, pausing the control thread mid-tick. `start()` turns it
+    off instead and freezes what exists so far (gc.freeze: imports, config,
+    widgets are never scanned again); the loop then calls `collect()` once
+    per tick, after its work, to run the generation that is due by gc's
+    thresholds in the idle time before the next deadline.
+    `stop()` turns automatic collection back on.
+    """
+
+    def __init__(self, thresholds=None):
+        self.thresholds = thresholds if thresholds is not None else gc.get_threshold()
+        self.collections = [0, 0, 0]  # Per generation
+        self._was_enabled = False
+
+    def start(self):
+        self._was_enabled = gc.isenabled()
+        gc.disable()
+        self.freeze()
+
+    def freeze(self):
+        """Collect, then move every surviving object to the permanent generation."""
+        gc.collect()
+        gc.freeze()
+
+    def collect(self):
+        """Run a collection if one is due; returns its generation, or -1."""
+        count0, count1, count2 = gc.get_count()
+        threshold0, threshold1, threshold2 = self.thresholds
+        if count0 <= threshold0:
+            return -1
+        generation = 0
+        if count1 > threshold1:
+            generation = 2 if count2 > threshold2 else 1
+        gc.collect(generation)
+        self.collections[generation] += 1
+        return generation
+
+    def stop(self):
+        if self._was_enabled:
+            gc.enable()
+
+    def summary(self):
+        return {
+            "collections": list(self.collections),
+            "frozen_objects": gc.get_freeze_count(),
+        }
+
+
+def format_gc_summary(s):
+    """One-line summary of GcPacer.summary()."""
+    gen0, gen1, gen2 = s["collections"]
+    return (
+        f"GC between ticks: {gen0}/{gen1}/{gen2} collections (gen 0/1/2), "
+        f"{s['frozen_objects']} objects frozen"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run an empty fixed-rate loop and print its timing statistics."
+    )
+    parser.add_argument("--hz", type=float, default=100)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--policy", choices=OVERRUN_POLICIES, default="skip")
+    parser.add_argument(
+        "--work-ms", type=float, default=0, help="Simulated work per tick"
+    )
+    args = parser.parse_args()
+
+    scheduler = RateScheduler(args.hz, args.policy)
+    scheduler.start()
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        if args.work_ms:
+            time.sleep(args.work_ms / 1000)
+        scheduler.wait()
+    print(scheduler.stats.format_summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import random
+import threading
+import time
+
+from device_communicator import DeviceCommunicator
+from link_metrics import LinkMetrics
+from protocol import BinaryFrameCodec, split_messages
+
+
+class SimClock:
+    """
+    Clock for simulations. With `speed` > 1 simulated time runs faster than
+    wall time: `sleep(1.0)` at speed 10 returns after 0.1 s of wall time.
+    `now_ns`/`sleep` match RateScheduler's clock/sleep arguments.
+    """
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self._t0 = time.perf_counter_ns()
+
+    def now_ns(self):
+        return int((time.perf_counter_ns() - self._t0) * self.speed)
+
+    def now(self):
+        return self.now_ns() / 1e9
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+
+def echo_responder(message):
+    """Default device behavior: reply with exactly what was received."""
+    return message
+
+
+class SimulatedSerial:
+    """
+    In-process stand-in for serial.Serial talking to a simulated Pico.
+      - Host->device bytes take 10 bits/byte at `baud_rate` (8N1) on the wire
+      - Each complete message (JSON line or binary frame) is handed to
+        `responder` after `echo_latency`; the reply goes back over the wire
+      - Replies are dropped with probability `drop_rate`
+    All delays follow `clock`, so a fast SimClock speeds the whole link up.
+    Safe to use from separate reader and writer threads.
+    """
+
+    def __init__(
+        self,
+        baud_rate=115200,
+        timeout=0.05,
+        echo_latency=0.002,
+        drop_rate=0.0,
+        responder=echo_responder,
+        clock=None,
+        seed=0,
+    ):
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.echo_latency = echo_latency
+        self.drop_rate = drop_rate
+        self.responder = responder
+        self.clock = clock or SimClock()
+        self.is_open = True
+
+        self.frame_size = BinaryFrameCodec().frame_size
+        self._byte_time = 10.0 / baud_rate
+        self._random = random.Random(seed)
+        self._cond = threading.Condition()
+        self._rx_pending = bytearray()  # host->device bytes not yet a full message
+        self._tx_busy_until = 0.0  # host->device line busy until (sim seconds)
+        self._rx_busy_until = 0.0  # device->host line busy until (sim seconds)
+        self._outgoing = []  # [(ready_time, bytes)] device->host, in time order
+        self._incoming = bytearray()  # device->host bytes already arrived
+
+        self.bytes_written = 0
+        self.messages_received = 0
+        self.responses_dropped = 0
+
+    @property
+    def in_waiting(self):
+        with self._cond:
+            self._collect(self.clock.now())
+            return len(self._incoming)
+
+    def write(self, data):
+        data = bytes(data)
+        with self._cond:
+            now = self.clock.now()
+            tx_done = max(now, self._tx_busy_until) + len(data) * self._byte_time
+            self._tx_busy_until = tx_done
+            self.bytes_written += len(data)
+            self._rx_pending += data
+            for message in self._split_messages():
+                self.messages_received += 1
+                reply = self.responder(message)
+                if not reply:
+                    continue
+                if self.drop_rate and self._random.random() < self.drop_rate:
+                    self.responses_dropped += 1
+                    continue
+                start = max(tx_done + self.echo_latency, self._rx_busy_until)
+                ready = start + len(reply) * self._byte_time
+                self._rx_busy_until = ready
+                self._outgoing.append((ready, reply))
+            self._cond.notify_all()
+        return len(data)
+
+    def read(self, size=1):
+        """Return up to `size` bytes, waiting at most `timeout` for the first one."""
+        with self._cond:
+            if not self._wait_for(lambda: len(self._incoming) > 0):
+                return b""
+            out = bytes(self._incoming[:size])
+            del self._incoming[:size]
+            return out
+
+    def readline(self):
+        """Return one line including the newline, or what arrived before `timeout`."""
+        with self._cond:
+            self._wait_for(lambda: b"\n" in self._incoming)
+            end = self._incoming.find(b"\n")
+            end = len(self._incoming) if end < 0 else end + 1
+            out = bytes(self._incoming[:end])
+            del self._incoming[:end]
+            return out
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._incoming.clear()
+            self._outgoing.clear()
+
+    def close(self):
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+
+    def _wait_for(self, predicate):
+        """Advance the simulated link until `predicate()` holds or `timeout` passes."""
+        deadline = self.clock.now() + (self.timeout or 0)
+        while True:
+            now = self.clock.now()
+            self._collect(now)
+            if predicate():
+                return True
+            if not self.is_open or now >= deadline:
+                return False
+            wake = deadline
+            if self._outgoing:
+                wake = min(wake, self._outgoing[0][0])
+            # Wall-clock wait, woken early by writes/close
+            self._cond.wait(max(wake - now, 0) / self.clock.speed)
+
+    def _collect(self, now):
+        """Move replies whose wire time has elapsed into the input buffer."""
+        while self._outgoing and self._outgoing[0][0] <= now:
+            self._incoming += self._outgoing.pop(0)[1]
+
+    def _split_messages(self):
+        """Yield complete JSON lines / binary frames from the host->device stream."""
+        return split_messages(self._rx_pending, self.frame_size)
+
+
+class SimulatedDevice(DeviceCommunicator):
+    """DeviceCommunicator whose `connect()` attaches a SimulatedSerial instead of a port."""
+
+    def __init__(
+        self,
+        baud_rate=115200,
+        timeout=0.05,
+        wire_format="json",
+        echo_latency=0.002,
+        drop_rate=0.0,
+        responder=echo_responder,
+        clock=None,
+        seed=0,
+    ):
+        super().__init__(
+            port="sim", baud_rate=baud_rate, timeout=timeout, wire_format=wire_format
+        )
+        self.echo_latency = echo_latency
+        self.drop_rate = drop_rate
+        self.responder = responder
+        self.clock = clock or SimClock()
+        self.seed = seed
+        # Measure the link in simulated time
+        self.metrics = LinkMetrics(
+            window=self.metrics.window,
+            ack_timeout=self.metrics.ack_timeout,
+            clock=self.clock.now,
+        )
+        self.metrics.parser = self.parser
+
+    def connect(self):
+        """Attach a fresh simulated link. Always succeeds."""
+        self.ser = SimulatedSerial(
+            baud_rate=self.baud_rate,
+            timeout=self.timeout,
+            echo_latency=self.echo_latency,
+            drop_rate=self.drop_rate,
+            responder=self.responder,
+            clock=self.clock,
+            seed=self.seed,
+        )
+        self.parser.reset()
+        self.metrics.reset_window()
+        return True
@@ -0,0 +1,204 @@
+import json
+import time
+
+import numpy as np
+
+from config import TelemetryConfig
+from protocol import FrameDecoder
+
+TELEMETRY_FIELDS = TelemetryConfig.FIELDS
+
+
+class ResponseParser:
+    """
+    Incremental parser for the bytes a board sends back. It runs once, in
+    the read path (control loop or serial reader thread), never on the GUI:
+      - "json" wire format: newline-terminated lines, each a JSON object,
+        key=value pairs (`battery_v=12.4 current_a=1.2 ack=17`, separated
+        by spaces or commas) or plain text (debug prints)
+      - "binary": CRC frames (FrameDecoder) whose values are `binary_fields`
+    Bytes may arrive split anywhere; a partial line waits for the rest.
+    Each message's ack (JSON "ack"/"seq", key ack/seq, frame seq) goes to
+    `on_ack`. The numeric `fields` it carries update `latest`, which is
+    appended as one row to `telemetry` (a HistoryRing with a column per
+    field; a field the message lacks holds its last value, NaN before any).
+    Malformed input (bad JSON, non-numeric values, invalid UTF-8, lines
+    longer than `max_line`) is counted in `malformed` instead of raising.
+    """
+
+    def __init__(
+        self,
+        wire_format="json",
+        decoder=None,
+        fields=TELEMETRY_FIELDS,
+        binary_fields=TelemetryConfig.BINARY_FIELDS,
+        max_line=TelemetryConfig.MAX_LINE,
+        on_ack=None,
+        telemetry=None,
+        clock=time.perf_counter,
+    ):
+        self.wire_format = wire_format
+        self.decoder = decoder if decoder is not None else FrameDecoder()
+        self.fields = fields
+        self.max_line = max_line
+        self.on_ack = on_ack
+        self.telemetry = telemetry
+        self.clock = clock
+
+        self._columns = {name: i for i, name in enumerate(fields)}
+        self._binary_columns = [
+            (i, self._columns[name])
+            for i, name in enumerate(binary_fields)
+            if name in self._columns
+        ]
+        self.latest = np.full(len(fields), np.nan)
+        self._scratch = np.full(len(fields), np.nan)  # key=value fields being parsed
+        self._pending = bytearray()  # Received text after the last complete line
+        self._discarding = False  # Skipping the rest of an overlong line
+
+        self.lines = 0
+        self.records = 0  # Messages that carried telemetry
+        self.malformed = 0
+
+    @property
+    def errors(self):
+        """Malformed text plus binary frames that failed their CRC."""
+        return self.malformed + self.decoder.crc_errors
+
+    def summary(self):
+        return {
+            "lines": self.lines,
+            "records": self.records,
+            "malformed": self.malformed,
+            "crc_errors": self.decoder.crc_errors,
+        }
+
+    def feed(self, data):
+        """Append received bytes."""
+        if self.wire_format == "binary":
+            self.decoder.feed(data)
+        else:
+            self._pending += data
+
+    def next_response(self):
+        """
+        Parse the next complete message and return it (a stripped text line,
+        or a Frame), or None if no complete message is buffered.
+        """
+        if self.wire_format == "binary":
+            frame = self.decoder.next_frame()
+            if frame is not None:
+                self._parse_frame(frame)
+            return frame
+
+        buf = self._pending
+        while True:
+            end = buf.find(b"\n")
+            if end < 0:
+                if len(buf) > self.max_line:
+                    # No newline in sight: drop it now so the buffer stays bounded
+                    if not self._discarding:
+                        self.malformed += 1
+                        self._discarding = True
+                    buf.clear()
+                return None
+            if self._discarding:
+                self._discarding = False
+                del buf[: end + 1]
+                continue
+            if end > self.max_line:
+                self.malformed += 1
+                del buf[: end + 1]
+                continue
+            try:
+                text = buf[:end].decode("utf-8").strip()
+            except UnicodeDecodeError:
+                text = None
+                self.malformed += 1
+            del buf[: end + 1]
+            if text:
+                self.lines += 1
+                self._parse_text(text)
+                return text
+
+    def responses(self, data=b""):
+        """Feed `data` and yield every complete message now available."""
+        if data:
+            self.feed(data)
+        while True:
+            response = self.next_response()
+            if response is None:
+                return
+            yield response
+
+    def reset(self):
+        """Drop any buffered partial message (e.g. after a reconnect)."""
+        self._pending.clear()
+        self._discarding = False
+        self.decoder.reset()
+
+    def _parse_text(self, text):
+        if text[0] == "{":
+            try:
+                reply = json.loads(text)
+            except ValueError:
+                self.malformed += 1
+                return
+            if not isinstance(reply, dict):
+                self.malformed += 1
+                return
+            ack = reply.get("ack", reply.get("seq"))
+            if type(ack) is int and self.on_ack is not None:
+                self.on_ack(ack)
+            found = False
+            for name, value in reply.items():
+                column = self._columns.get(name)
+                if column is not None and type(value) in (int, float):
+                    self.latest[column] = value
+                    found = True
+            if found:
+                self._append()
+        elif "=" in text:
+            self._parse_pairs(text)
+
+    def _parse_pairs(self, text):
+        """key=value pairs; a known key with a non-numeric value rejects the line."""
+        values = self._scratch
+        values[:] = self.latest
+        ack = None
+        found = False
+        for pair in text.replace(",", " ").split():
+            name, sep, value = pair.partition("=")
+            if not sep:
+                continue
+            try:
+                if name == "ack" or name == "seq":
+                    ack = int(value)
+                    continue
+                column = self._columns.get(name)
+                if column is not None:
+                    values[column] = float(value)
+                    found = True
+            except ValueError:
+                self.malformed += 1
+                return
+        if ack is not None and self.on_ack is not None:
+            self.on_ack(ack)
+        if found:
+            self.latest[:] = values
+            self._append()
+
+    def _parse_frame(self, frame):
+        if self.on_ack is not None:
+            self.on_ack(frame.seq)
+        if not self._binary_columns:
+            return
+        values = frame.values
+        for i, column in self._binary_columns:
+            self.latest[column] = values[i]
+        self._append()
+
+    def _append(self):
+        self.records += 1
+        if self.telemetry is not None:
+            self.telemetry.append_row(self.clock(), self.latest)
@@ -0,0 +1,72 @@
+import gc
+import threading
+
+import numpy as np
+
+from channel import StateChannel
+from main import device_worker_loop
+from profiling import AllocationCounter
+from recorder import RECORD_DTYPE
+from replay import ReplayJoystick
+from scheduler import GcPacer, RateScheduler
+from sim_device import SimClock, SimulatedDevice
+
+# deque (LogRing) storage grows and shrinks in blocks of 64 entries
+_DEQUE_BLOCK = 64
+
+
+class _StopAfter(AllocationCounter):
+    """AllocationCounter that stops the loop after `ticks` counted ticks."""
+
+    def __init__(self, stop_event, ticks, warmup):
+        super().__init__(warmup)
+        self.stop_event = stop_event
+        self.limit = warmup + ticks
+
+    def end(self):
+        super().end()
+        if self.ticks >= self.limit:
+            self.stop_event.set()
+
+
+def test_steady_state_tick_leaves_nothing_allocated():
+    # A held stick, played back every tick
+    run = np.zeros(2, dtype=RECORD_DTYPE)
+    run["t_ns"] = [0, 1]
+    run["axes"][:, 1] = 0.3
+    run["axes"][:, 5] = 0.5
+    clock = SimClock(speed=20)
+    joystick = ReplayJoystick(run, realtime=False, loop=True, clock=clock)
+    device = SimulatedDevice(clock=clock, wire_format="json")
+    device.connect()
+    channel = StateChannel()
+    device.parser.telemetry = channel.telemetry
+    scheduler = RateScheduler(100, clock=clock.now_ns, sleep=clock.sleep)
+
+    # Count once the device log is full and its deque has stopped
+    # growing its block cache (a few hundred responses later)
+    stop_event = threading.Event()
+    allocations = _StopAfter(
+        stop_event,
+        ticks=20 * _DEQUE_BLOCK,
+        warmup=channel.logs.capacity + 8 * _DEQUE_BLOCK,
+    )
+    try:
+        device_worker_loop(
+            stop_event,
+            channel,
+            joystick,
+            device,
+            verbose=True,
+            scheduler=scheduler,
+            gc_pacer=GcPacer(),
+            allocations=allocations,
+        )
+    finally:
+        gc.unfreeze()
+
+    summary = allocations.summary()
+    assert summary["ticks"] == 20 * _DEQUE_BLOCK
+    assert device.metrics.summary()["acked"] > 0
+    assert summary["net_objects"] == 0
+    assert summary["net_blocks"] <= 0
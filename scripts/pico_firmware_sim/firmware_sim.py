@@ -0,0 +1,608 @@
+import argparse
+import binascii
+import json
+import math
+import multiprocessing as mp
+import os
+import select
+import struct
+import threading
+import time
+from collections import deque
+
+try:
+    import tty
+except ImportError:  # Windows: no pty
+    tty = None
+
+THRUST_FIELDS = ("left_thrust_power", "right_thrust_power", "z_thrust_power")
+NEUTRAL = (3300, 3300, 5200)  # MotorConfig zero shifts
+REPLIES = ("ack", "echo", "none")
+
+# Binary frames, same layout as Dashboard/protocol.py:
+#   sync (u8) | seq (u8) | 3 x value (int16, little endian) | CRC-16/CCITT (u16)
+SYNC_BYTE = 0xA5
+_FRAME_BODY = struct.Struct("<BB3h")
+_FRAME_CRC = struct.Struct("<H")
+FRAME_SIZE = _FRAME_BODY.size + _FRAME_CRC.size
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(
+        len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * p / 100) - 1)
+    )
+    return sorted_values[index]
+
+
+class FirmwareModel:
+    """
+    The thruster board's command handler, driven by a clock instead of
+    hardware, so it can be stepped from a test or served on a pty:
+      - Host bytes cross the wire at `baud_rate` (8N1) into a UART receive
+        buffer of `rx_buffer` bytes (the RP2040 FIFO is 32 bytes, MicroPython's
+        default rxbuf 256). The main loop empties it each `poll()`; a byte
+        that arrives while it is full is lost and sets the overrun flag,
+        like the UART's OE bit.
+      - The loop collects the bytes into lines of at most `max_line` bytes
+        (the firmware's line buffer); a longer line is dropped as a parse error.
+      - The loop checks the flag on every pass: an overrun counts as one
+        event, drops the line it cut, and is reported with
+        {"error": "overrun"}.
+      - Each complete message costs `processing_s` of loop time: JSON thrust
+        commands (acked with {"ack": seq}, echoed, or not answered, per
+        `reply`), binary frames (echoed), the {"hello": "crams"} handshake
+        and {"config": ...} pushes. Lines that do not parse count as
+        `parse_errors`.
+      - The newest command is written to the PWM outputs at `pwm_hz`; a
+        command replaced before its update is `superseded`. With no command
+        for `failsafe_s`, the outputs go back to neutral.
+      - Every `stall_interval` seconds the loop stalls for `stall_s`
+        (garbage collection, flash writes).
+    """
+
+    def __init__(
+        self,
+        baud_rate=115200,
+        processing_s=0.001,
+        rx_buffer=256,
+        max_line=256,
+        pwm_hz=50.0,
+        reply="ack",
+        role="thrusters",
+        failsafe_s=0.5,
+        stall_s=0.0,
+        stall_interval=1.0,
+        telemetry_hz=0.0,
+    ):
+        if reply not in REPLIES:
+            raise ValueError(f"reply must be one of {REPLIES}")
+        self.byte_time = 10.0 / baud_rate
+        self.processing_s = processing_s
+        self.rx_buffer = rx_buffer
+        self.max_line = max_line
+        self.pwm_period = 1.0 / pwm_hz
+        self.reply = reply
+        self.role = role
+        self.failsafe_s = failsafe_s
+        self.stall_s = stall_s
+        self.stall_interval = stall_interval
+        self.telemetry_period = 1.0 / telemetry_hz if telemetry_hz else None
+
+        self._wire = deque()  # [start time, bytes] still crossing the wire
+        self._wire_free = 0.0  # When the line has sent every byte queued so far
+        self.rx = bytearray()  # UART receive buffer
+        self._overrun = False  # OE flag, cleared when the loop reads it
+        self._line = bytearray()  # Partial message read by the loop
+        self._skip_line = False  # Resyncing after an overrun: drop to the next newline
+
+        self.outputs = list(NEUTRAL)  # PWM outputs
+        self._command = None  # (values, received at) waiting for the next PWM update
+        self._last_command = None
+        self._next_pwm = None
+        self._next_stall = None
+        self._next_telemetry = None
+
+        self.bytes_received = 0
+        self.messages = 0
+        self.commands = 0
+        self.replies = 0
+        self.parse_errors = 0
+        self.overruns = 0
+        self.overrun_bytes = 0
+        self.rx_high_water = 0
+        self.pwm_updates = 0
+        self.applied = 0
+        self.superseded = 0
+        self.failsafes = 0
+        self.handshakes = 0
+        self.configs = 0
+        self.config = {}
+        self.busy_s = 0.0
+        self.apply_latencies = []
+
+    def on_host_bytes(self, data, now):
+        """Bytes the host wrote at `now`; they reach the UART at the wire rate."""
+        start = max(now, self._wire_free)
+        self._wire_free = start + len(data) * self.byte_time
+        self._wire.append([start, bytes(data)])
+
+    def poll(self, now):
+        """
+        One pass of the main loop at `now`: read the UART, handle complete
+        messages, update the PWM outputs when due.
+        Returns (replies to send, seconds the pass keeps the loop busy).
+        """
+        self._receive(now)
+        replies = []
+        busy = 0.0
+        if self._overrun:
+            self._overrun = False
+            self.overruns += 1
+            self._line.clear()
+            self._skip_line = True
+            replies.append(b'{"error": "overrun"}\n')
+
+        data = bytes(self.rx)
+        self.rx.clear()
+        for message in self._split(data):
+            self.messages += 1
+            busy += self.processing_s
+            reply = self._handle(message, now + busy)
+            if reply:
+                replies.append(reply)
+
+        if self._next_pwm is None:
+            self._next_pwm = now
+            self._next_stall = now + self.stall_interval
+            self._next_telemetry = now
+        if now >= self._next_pwm:
+            self._update_pwm(now)
+            self._next_pwm += self.pwm_period * max(
+                1, math.ceil((now - self._next_pwm) / self.pwm_period)
+            )
+        if self.telemetry_period is not None and now >= self._next_telemetry:
+            self._next_telemetry = now + self.telemetry_period
+            replies.append(self._telemetry_line(now))
+        if self.stall_s and now >= self._next_stall:
+            self._next_stall = now + self.stall_interval
+            busy += self.stall_s
+        self.replies += len(replies)
+        self.busy_s += busy
+        return replies, busy
+
+    def next_event(self):
+        """Time of the next PWM update or telemetry line (None before the first poll)."""
+        if self._next_pwm is None:
+            return None
+        if self.telemetry_period is None:
+            return self._next_pwm
+        return min(self._next_pwm, self._next_telemetry)
+
+    def _receive(self, now):
+        """Move the bytes that have arrived by `now` into the UART buffer."""
+        wire = self._wire
+        while wire:
+            start, chunk = wire[0]
+            arrived = min(len(chunk), int((now - start) / self.byte_time))
+            if arrived <= 0:
+                return
+            space = self.rx_buffer - len(self.rx)
+            kept = min(arrived, space)
+            self.rx += chunk[:kept]
+            if arrived > kept:
+                self._overrun = True
+                self.overrun_bytes += arrived - kept
+            self.bytes_received += arrived
+            self.rx_high_water = max(self.rx_high_water, len(self.rx))
+            if arrived == len(chunk):
+                wire.popleft()
+                continue
+            wire[0] = [start + arrived * self.byte_time, chunk[arrived:]]
+            return
+
+    def _split(self, data):
+        """Yield complete messages: binary frames (sync byte first) or text lines."""
+        line = self._line
+        line += data
+        while line:
+            if self._skip_line:
+                end = line.find(b"\n")
+                if end < 0:
+                    line.clear()
+                    return
+                del line[: end + 1]
+                self._skip_line = False
+                continue
+            if line[0] == SYNC_BYTE:
+                if len(line) < FRAME_SIZE:
+                    return
+                message = bytes(line[:FRAME_SIZE])
+                del line[:FRAME_SIZE]
+            else:
+                end = line.find(b"\n")
+                if end < 0:
+                    if len(line) > self.max_line:
+                        self.parse_errors += 1
+                        line.clear()
+                        self._skip_line = True
+                    return
+                message = bytes(line[: end + 1])
+                del line[: end + 1]
+            yield message
+
+    def _handle(self, message, now):
+        if message[0] == SYNC_BYTE:
+            body = message[: _FRAME_BODY.size]
+            (crc,) = _FRAME_CRC.unpack_from(message, _FRAME_BODY.size)
+            if binascii.crc_hqx(body[1:], 0xFFFF) != crc:
+                self.parse_errors += 1
+                # A false sync byte: rescan from the next byte
+                self._line[:0] = message[1:]
+                return None
+            _, seq, *values = _FRAME_BODY.unpack(body)
+            self._on_command(values, now)
+            return message if self.reply != "none" else None
+
+        text = message.strip()
+        if not text:
+            return None
+        try:
+            data = json.loads(text)
+        except (ValueError, UnicodeDecodeError):
+            self.parse_errors += 1
+            return None
+        if not isinstance(data, dict):
+            self.parse_errors += 1
+            return None
+        if data.get("hello") == "crams":
+            self.handshakes += 1
+            return (json.dumps({"crams": self.role, "fw": "sim"}) + "\n").encode()
+        if "config" in data:
+            self.configs += 1
+            self.config.update(data["config"])
+            return None
+        try:
+            values = [int(data[field]) for field in THRUST_FIELDS]
+        except (KeyError, TypeError, ValueError):
+            self.parse_errors += 1
+            return None
+        self._on_command(values, now)
+        seq = data.get("seq")
+        if self.reply == "echo":
+            return message
+        if self.reply == "ack" and isinstance(seq, int):
+            return (json.dumps({"ack": seq}) + "\n").encode()
+        return None
+
+    def _on_command(self, values, now):
+        self.commands += 1
+        if self._command is not None:
+            self.superseded += 1
+        self._command = (values, now)
+        self._last_command = now
+
+    def _update_pwm(self, now):
+        self.pwm_updates += 1
+        if self._command is not None:
+            values, received = self._command
+            self._command = None
+            self.outputs = list(values)
+            self.applied += 1
+            self.apply_latencies.append(now - received)
+        elif (
+            self._last_command is not None
+            and now - self._last_command > self.failsafe_s
+        ):
+            self._last_command = None
+            self.outputs = list(NEUTRAL)
+            self.failsafes += 1
+
+    def _telemetry_line(self, now):
+        """key=value status line: outputs, simulated battery and UART state."""
+        load = sum(abs(o - n) for o, n in zip(self.outputs, NEUTRAL)) / 3000
+        return (
+            f"battery_v={12.6 - 0.8 * load:.2f} current_a={0.3 + 20 * load:.2f} "
+            f"rx_high_water={self.rx_high_water} overruns={self.overruns}\n"
+        ).encode()
+
+    def summary(self):
+        latencies = sorted(self.apply_latencies)
+        return {
+            "bytes_received": self.bytes_received,
+            "messages": self.messages,
+            "commands": self.commands,
+            "replies": self.replies,
+            "parse_errors": self.parse_errors,
+            "overruns": self.overruns,
+            "overrun_bytes": self.overrun_bytes,
+            "rx_high_water": self.rx_high_water,
+            "pwm_updates": self.pwm_updates,
+            "applied": self.applied,
+            "superseded": self.superseded,
+            "failsafes": self.failsafes,
+            "handshakes": self.handshakes,
+            "configs": self.configs,
+            "busy_s": self.busy_s,
+            "apply_latency_ms": {
+                "p50": percentile(latencies, 50) * 1e3,
+                "p99": percentile(latencies, 99) * 1e3,
+                "max": (latencies[-1] if latencies else 0.0) * 1e3,
+            },
+        }
+
+
+class PtyFirmware:
+    """
+    Serves a FirmwareModel on a pseudo terminal (Linux/macOS): open `path`
+    like the board's serial port. A reader thread timestamps host bytes as
+    they are written; the loop thread polls the model every `loop_s` (or
+    sooner when a PWM update is due), sleeps while the model is busy, and
+    writes replies back at the wire rate.
+    """
+
+    def __init__(self, model, loop_s=0.001, clock=time.perf_counter):
+        if tty is None:
+            raise OSError("The firmware simulator needs a POSIX system")
+        self.model = model
+        self.loop_s = loop_s
+        self.clock = clock
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # Kept open so the master never sees a hangup
+        self.path = os.ttyname(self._slave)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._read_loop, daemon=True),
+            threading.Thread(target=self._run_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def summary(self):
+        with self._lock:
+            return self.model.summary()
+
+    def _read_loop(self):
+        while not self._stopped.is_set():
+            try:
+                ready, _, _ = select.select([self.master], [], [], 0.05)
+                if not ready:
+                    continue
+                data = os.read(self.master, 4096)
+            except OSError:
+                return
+            with self._lock:
+                self.model.on_host_bytes(data, self.clock())
+
+    def _run_loop(self):
+        clock = self.clock
+        model = self.model
+        tx = deque()  # (due time, reply) at the wire rate
+        tx_free = 0.0
+        while not self._stopped.is_set():
+            with self._lock:
+                replies, busy = model.poll(clock())
+                next_event = model.next_event()
+            if busy:
+                time.sleep(busy)
+            done = clock()
+            for reply in replies:
+                tx_free = max(done, tx_free) + len(reply) * model.byte_time
+                tx.append((tx_free, reply))
+            try:
+                while tx and tx[0][0] <= clock():
+                    os.write(self.master, tx.popleft()[1])
+            except OSError:
+                return
+            now = clock()
+            wake = now + self.loop_s
+            if next_event is not None:
+                wake = min(wake, next_event)
+            if tx:
+                wake = min(wake, tx[0][0])
+            if wake > now:
+                self._stopped.wait(wake - now)
+
+    def close(self):
+        self._stopped.set()
+        os.close(self._slave)  # With no slave fd left, the reader's read() fails
+        for thread in self._threads:
+            thread.join()
+        os.close(self.master)
+
+
+def _serve(conn, model_options, loop_s):
+    """Process entry point: serve the model until "stop", then send its summary."""
+    firmware = PtyFirmware(FirmwareModel(**model_options), loop_s)
+    conn.send(firmware.path)
+    try:
+        while True:
+            if conn.poll(0.5):
+                if conn.recv() == "stop":
+                    break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    summary = firmware.summary()
+    firmware.close()
+    conn.send(summary)
+
+
+class FirmwareProcess:
+    """The simulator in its own process (its own GIL, like a separate board)."""
+
+    def __init__(self, loop_s=0.001, **model_options):
+        self._conn, child_conn = mp.Pipe()
+        self.process = mp.Process(
+            target=_serve, args=(child_conn, model_options, loop_s), daemon=True
+        )
+        self.process.start()
+        self.path = self._conn.recv()
+
+    def stop(self):
+        """Stop the simulator; returns its FirmwareModel summary."""
+        try:
+            self._conn.send("stop")
+        except OSError:
+            pass  # Already stopping (Ctrl-C reaches both processes)
+        summary = self._conn.recv()
+        self.process.join()
+        return summary
+
+
+def load_test(rate, seconds, baud_rate=115200, timeout=0.05, **options):
+    """
+    Send thrust commands like DeviceCommunicator (JSON with "seq") at `rate`
+    per second for `seconds` to a fresh simulator process, then return the
+    host-side counts next to the firmware's summary.
+    """
+    import serial
+
+    sim = FirmwareProcess(baud_rate=baud_rate, **options)
+    ser = serial.Serial(sim.path, baud_rate, timeout=timeout)
+    received = {"acks": 0, "errors": 0, "other": 0}
+    done = threading.Event()
+
+    def read_replies():
+        while not done.is_set():
+            line = ser.readline()
+            if not line:
+                continue
+            if line.startswith(b'{"ack"'):
+                received["acks"] += 1
+            elif line.startswith(b'{"error"'):
+                received["errors"] += 1
+            else:
+                received["other"] += 1
+
+    reader = threading.Thread(target=read_replies, daemon=True)
+    reader.start()
+    count = int(rate * seconds)
+    bytes_sent = 0
+    start = time.perf_counter()
+    for i in range(count):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        value = 3300 + int(1000 * math.sin(i / 50))
+        command = {field: value for field in THRUST_FIELDS}
+        command["seq"] = i % 256
+        line = (json.dumps(command) + "\n").encode("utf-8")
+        ser.write(line)
+        bytes_sent += len(line)
+    send_seconds = time.perf_counter() - start
+
+    # Let the last replies arrive: a saturated wire still holds a backlog,
+    # so wait until replies stop (bounded by the time to clear everything sent)
+    backlog = bytes_sent * 10.0 / baud_rate + count * options.get("processing_s", 0)
+    deadline = time.perf_counter() + backlog + 1.0
+    last = -1
+    while time.perf_counter() < deadline:
+        total = sum(received.values())
+        if total == last:
+            break
+        last = total
+        time.sleep(max(0.2, 4 * timeout))
+    done.set()
+    reader.join()
+    ser.close()
+    return dict(
+        rate=rate,
+        sent=count,
+        achieved_rate=count / send_seconds if send_seconds else 0.0,
+        **received,
+        firmware=sim.stop(),
+    )
+
+
+def format_rows(rows):
+    lines = [
+        f"{'rate':>7}{'sent':>7}{'acks':>7}{'overruns':>9}{'lost B':>8}"
+        f"{'rx max':>8}{'parse err':>10}{'applied':>8}{'superseded':>11}"
+        f"{'apply p99':>10} ms"
+    ]
+    for r in rows:
+        f = r["firmware"]
+        lines.append(
+            f"{r['rate']:>7g}{r['sent']:>7}{r['acks']:>7}{f['overruns']:>9}"
+            f"{f['overrun_bytes']:>8}{f['rx_high_water']:>8}{f['parse_errors']:>10}"
+            f"{f['applied']:>8}{f['superseded']:>11}"
+            f"{f['apply_latency_ms']['p99']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulated thruster board firmware on a pty: serve it to the "
+        "dashboard, or load-test it at increasing command rates."
+    )
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument(
+        "--processing-ms", type=float, default=1.0, help="Loop time per message"
+    )
+    parser.add_argument(
+        "--rx-buffer", type=int, default=256, help="UART receive buffer (bytes)"
+    )
+    parser.add_argument(
+        "--max-line", type=int, default=256, help="Firmware line buffer (bytes)"
+    )
+    parser.add_argument("--pwm-hz", type=float, default=50.0)
+    parser.add_argument("--reply", choices=REPLIES, default="ack")
+    parser.add_argument("--role", default="thrusters", help="Handshake role")
+    parser.add_argument("--failsafe", type=float, default=0.5, help="Seconds")
+    parser.add_argument(
+        "--stall-ms", type=float, default=0.0, help="Periodic loop stall (GC)"
+    )
+    parser.add_argument("--stall-interval", type=float, default=1.0, help="Seconds")
+    parser.add_argument(
+        "--telemetry-hz", type=float, default=0.0, help="key=value status lines"
+    )
+    parser.add_argument(
+        "--loop-ms", type=float, default=1.0, help="Main loop period when idle"
+    )
+    parser.add_argument(
+        "--load-test",
+        type=float,
+        nargs="+",
+        metavar="RATE",
+        help="Commands/s to try, one fresh simulator each (instead of serving)",
+    )
+    parser.add_argument("--seconds", type=float, default=3.0, help="Per load test")
+    parser.add_argument("--json", action="store_true", help="Print JSON, not a table")
+    args = parser.parse_args()
+
+    options = {
+        "processing_s": args.processing_ms / 1e3,
+        "rx_buffer": args.rx_buffer,
+        "max_line": args.max_line,
+        "pwm_hz": args.pwm_hz,
+        "reply": args.reply,
+        "role": args.role,
+        "failsafe_s": args.failsafe,
+        "stall_s": args.stall_ms / 1e3,
+        "stall_interval": args.stall_interval,
+        "telemetry_hz": args.telemetry_hz,
+        "loop_s": args.loop_ms / 1e3,
+    }
+    if args.load_test:
+        rows = [
+            load_test(rate, args.seconds, args.baud, **options)
+            for rate in args.load_test
+        ]
+        print(json.dumps(rows, indent=2) if args.json else format_rows(rows))
+        return
+
+    sim = FirmwareProcess(baud_rate=args.baud, **options)
+    print(f"Simulated board on {sim.path} (Ctrl-C to stop)")
+    try:
+        while sim.process.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(sim.stop(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,374 @@
+import argparse
+import json
+import math
+import os
+import random
+import select
+import threading
+import time
+from collections import deque
+
 import serial
 
-def send_serial(baud_rate, port, number, zero_shift=3300):
-    with serial.Serial(port, baud_rate, timeout=1) as ser:
+try:
+    import tty
+except ImportError:  # Windows: no pty stand-in
+    tty = None
+
+DEFAULT_PORT = "COM3"  # For windows usb devices
+# DEFAULT_PORT = '/dev/tty.usbserial-A50285BI'  # Example: '/dev/tty.usbserial-1410'
+PAYLOADS = ("int", "json")
+PATTERNS = ("ramp", "sine", "random")
+
+
+def send_serial(ser, number, zero_shift=3300):
+    """Send one shifted integer on the open port `ser` and return the reply line."""
+    try:
+        # Send the number to the Pico
+        ser.write(f"{int(number + zero_shift)}\n".encode("utf-8"))
+
+        # Wait for a response from the Pico
+        response = ser.readline().decode("utf-8").strip()
+        if response:
+            print(f"Response from Pico: {response}")
+        return response
+    except serial.SerialException:
+        print("Error sending serialization to pico")
+        return None
+
+
+def interactive(ser):
+    print("Type an integer to send to the Pico. Type 'exit' to quit.")
+
+    while True:
+        # Get user input from the terminal
+        user_input = input("Enter a number: ")
+
+        if user_input.lower() == "exit":  # Exit the program
+            print("Exiting...")
+            break
+
         try:
-              # Send the number to the Pico
-              ser.write(f"{int(number + zero_shift)}\n".encode('utf-8'))
-              
-              # Wait for a response from the Pico
-              response = ser.readline().decode('utf-8').strip()
-              if response:
-                  print(f"Response from Pico: {response}")
-        except:
-            print("Error sending serializationt to pico")
+            # Ensure the input is a valid integer
+            int(user_input)
+
+            # Send the number to the Pico
+            ser.write(f"{user_input}\n".encode("utf-8"))
+
+            # Wait for a response from the Pico
+            response = ser.readline().decode("utf-8").strip()
+            if response:
+                print(f"Response from Pico: {response}")
+        except ValueError:
+            print("Please enter a valid integer!")
+
+
+def generate_values(pattern, count, amplitude=1000, seed=0):
+    """`count` thrust values in [-amplitude, amplitude] (before the zero shift)."""
+    if pattern == "ramp":
+        return [
+            int(-amplitude + 2 * amplitude * i / max(count - 1, 1))
+            for i in range(count)
+        ]
+    if pattern == "sine":
+        return [int(amplitude * math.sin(2 * math.pi * i / 100)) for i in range(count)]
+    rng = random.Random(seed)
+    return [rng.randint(-amplitude, amplitude) for _ in range(count)]
+
+
+def encode_commands(values, payload="int", zero_shift=3300):
+    """One newline-terminated command per value, as bytes."""
+    if payload == "int":
+        return [f"{value + zero_shift}\n".encode("utf-8") for value in values]
+    return [
+        (
+            json.dumps(
+                {
+                    "left_thrust_power": value + zero_shift,
+                    "right_thrust_power": value + zero_shift,
+                    "z_thrust_power": value + zero_shift,
+                    "seq": i % 256,
+                }
+            )
+            + "\n"
+        ).encode("utf-8")
+        for i, value in enumerate(values)
+    ]
+
+
+def load_commands(path):
+    """Commands from a text file, one per line (blank lines skipped), sent as-is."""
+    with open(path, "rb") as f:
+        return [line.rstrip(b"\r\n") + b"\n" for line in f if line.strip()]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(
+        len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * p / 100) - 1)
+    )
+    return sorted_values[index]
+
+
+def stream(ser, commands, rate=0.0):
+    """
+    Send `commands` over the open port `ser` and time the replies.
+      - rate 0: lockstep, each command waits for a reply (or the port
+        timeout) before the next is sent
+      - rate > 0: commands are written on a fixed schedule of `rate` per
+        second while a reader thread collects replies
+    Replies are matched to commands in order (the Pico answers every line
+    once), so a reply that misses the timeout is still timed correctly.
+    After the last command, replies are read until the port times out.
+    Returns send rate, reply rate, loss and latency percentiles.
+    """
+    send_times = deque()
+    latencies = []
+    rx_bytes = 0
+    last_reply = None
+
+    def read_reply():
+        nonlocal rx_bytes, last_reply
+        line = ser.readline()
+        if not line:
+            return False
+        now = time.perf_counter()
+        rx_bytes += len(line)
+        last_reply = now
+        if send_times:
+            latencies.append(now - send_times.popleft())
+        return True
+
+    def drain():
+        while send_times and read_reply():
+            pass
+
+    ser.reset_input_buffer()
+    tx_bytes = 0
+    start = time.perf_counter()
+    if rate <= 0:
+        for command in commands:
+            send_times.append(time.perf_counter())
+            ser.write(command)
+            tx_bytes += len(command)
+            read_reply()
+        send_seconds = time.perf_counter() - start
+        drain()
+    else:
+        done = threading.Event()
+
+        def read_replies():
+            while not done.is_set():
+                read_reply()
+            drain()
+
+        reader = threading.Thread(target=read_replies, daemon=True)
+        reader.start()
+        period = 1.0 / rate
+        for i, command in enumerate(commands):
+            delay = start + i * period - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            send_times.append(time.perf_counter())
+            ser.write(command)
+            tx_bytes += len(command)
+        send_seconds = time.perf_counter() - start
+        done.set()
+        reader.join()
+
+    latencies.sort()
+    sent = len(commands)
+    reply_seconds = (last_reply - start) if last_reply is not None else 0.0
+    return {
+        "sent": sent,
+        "replies": len(latencies),
+        "loss_rate": 1 - len(latencies) / sent if sent else 0.0,
+        "send_seconds": send_seconds,
+        "commands_per_s": sent / send_seconds if send_seconds else 0.0,
+        "replies_per_s": len(latencies) / reply_seconds if reply_seconds else 0.0,
+        "tx_bytes_per_s": tx_bytes / send_seconds if send_seconds else 0.0,
+        "rx_bytes_per_s": rx_bytes / reply_seconds if reply_seconds else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1e3,
+            "p90": percentile(latencies, 90) * 1e3,
+            "p99": percentile(latencies, 99) * 1e3,
+            "max": (latencies[-1] if latencies else 0.0) * 1e3,
+        },
+    }
+
+
+class PtyPico:
+    """
+    Local stand-in for the Pico on a pseudo terminal (Linux/macOS): every
+    line written to `path` is answered with `reply(line)` (default: echo).
+    Like a UART at `baud_rate` (8N1), a line is handled once its last byte
+    has crossed the wire and the reply then takes its own wire time; the two
+    directions are timed independently (full duplex), so sweeps over baud
+    rates behave like a UART-connected board.
+    """
+
+    def __init__(self, baud_rate=115200, reply=None, processing_s=0.0):
+        if tty is None:
+            raise OSError("The pty stand-in needs a POSIX system")
+        self.baud_rate = baud_rate
+        self.reply = reply or (lambda line: line)
+        self.processing_s = processing_s
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # Kept open so the master never sees a hangup
+        self.path = os.ttyname(self._slave)
+        self.lines = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        byte_time = 10 / self.baud_rate
+        pending = b""
+        rx_free = 0.0  # When the host->Pico wire has delivered every byte so far
+        busy_until = 0.0  # When the Pico has handled every line so far
+        tx_free = 0.0  # When the Pico->host wire has sent every reply so far
+        tx = deque()  # (due time, reply)
+        while not self._stopped.is_set():
+            now = time.perf_counter()
+            try:
+                while tx and tx[0][0] <= now:
+                    os.write(self.master, tx.popleft()[1])
+                wait = tx[0][0] - now if tx else 0.05
+                ready, _, _ = select.select([self.master], [], [], max(wait, 0.0))
+                if not ready:
+                    continue
+                data = os.read(self.master, 4096)
+            except OSError:
+                return
+            arrival = max(time.perf_counter(), rx_free)
+            rx_free = arrival + len(data) * byte_time
+            offset = len(pending)
+            pending += data
+            start = 0
+            while True:
+                end = pending.find(b"\n", start)
+                if end < 0:
+                    break
+                line = pending[start : end + 1]
+                start = end + 1
+                self.lines += 1
+                received = arrival + (end + 1 - offset) * byte_time
+                busy_until = max(received, busy_until) + self.processing_s
+                response = self.reply(line)
+                if response:
+                    tx_free = max(busy_until, tx_free) + len(response) * byte_time
+                    tx.append((tx_free, response))
+            pending = pending[start:]
+
+    def close(self):
+        self._stopped.set()
+        os.close(self._slave)  # With no slave fd left, the reader's read() fails
+        self._thread.join(1.0)
+        os.close(self.master)
+
+
+def open_port(port, baud_rate, timeout, pty_pico=False):
+    """(serial port, PtyPico or None); with `pty_pico` the port is a local stand-in."""
+    stand_in = None
+    if pty_pico:
+        stand_in = PtyPico(baud_rate)
+        port = stand_in.path
+    return serial.Serial(port, baud_rate, timeout=timeout), stand_in
+
+
+def sweep(port, baud_rates, timeouts, commands, rate=0.0, pty_pico=False):
+    """One `stream` run per (baud rate, timeout), each on a freshly opened port."""
+    rows = []
+    for baud_rate in baud_rates:
+        for timeout in timeouts:
+            ser, stand_in = open_port(port, baud_rate, timeout, pty_pico)
+            try:
+                result = stream(ser, commands, rate)
+            finally:
+                ser.close()
+                if stand_in is not None:
+                    stand_in.close()
+            rows.append(dict(result, baud_rate=baud_rate, timeout=timeout))
+    return rows
+
+
+def format_rows(rows):
+    lines = [
+        f"{'baud':>8}{'timeout':>9}{'cmd/s':>9}{'reply/s':>9}{'loss':>7}"
+        f"{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8} ms"
+    ]
+    for r in rows:
+        lat = r["latency_ms"]
+        lines.append(
+            f"{r['baud_rate']:>8}{r['timeout']:>9.3f}{r['commands_per_s']:>9.1f}"
+            f"{r['replies_per_s']:>9.1f}"
+            f"{r['loss_rate'] * 100:>6.1f}%{lat['p50']:>8.2f}{lat['p90']:>8.2f}"
+            f"{lat['p99']:>8.2f}{lat['max']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Talk to the Pico serialization test firmware: interactively "
+        "(default), or stream/sweep command sequences to measure the link."
+    )
+    parser.add_argument("--port", default=DEFAULT_PORT)
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument(
+        "--pty", action="store_true", help="Use a local pty stand-in instead of a Pico"
+    )
+    sub = parser.add_subparsers(dest="mode")
+    sub.add_parser("interactive", help="Type integers to send (default)")
+    for name, text in (
+        ("stream", "Send a command sequence and report throughput/latency"),
+        ("sweep", "Repeat the stream over baud rates x timeouts"),
+    ):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("--count", type=int, default=500)
+        p.add_argument(
+            "--rate", type=float, default=0.0, help="Commands/s (0 = lockstep)"
+        )
+        p.add_argument("--payload", choices=PAYLOADS, default="int")
+        p.add_argument("--pattern", choices=PATTERNS, default="ramp")
+        p.add_argument("--file", help="Commands to send, one per line (cycled)")
+        p.add_argument("--json", action="store_true", help="Print JSON, not a table")
+    sub.choices["sweep"].add_argument(
+        "--bauds", type=int, nargs="+", default=[9600, 57600, 115200, 230400]
+    )
+    sub.choices["sweep"].add_argument(
+        "--timeouts", type=float, nargs="+", default=[0.01, 0.05, 0.2]
+    )
+    args = parser.parse_args()
+
+    if args.mode in (None, "interactive"):
+        ser, stand_in = open_port(args.port, args.baud, args.timeout, args.pty)
+        with ser:
+            interactive(ser)
+        if stand_in is not None:
+            stand_in.close()
+        return
+
+    if args.file:
+        lines = load_commands(args.file)
+        commands = [lines[i % len(lines)] for i in range(args.count)]
+    else:
+        commands = encode_commands(
+            generate_values(args.pattern, args.count), args.payload
+        )
+
+    if args.mode == "stream":
+        rows = sweep(
+            args.port, [args.baud], [args.timeout], commands, args.rate, args.pty
+        )
+    else:
+        rows = sweep(
+            args.port, args.bauds, args.timeouts, commands, args.rate, args.pty
+        )
+    print(json.dumps(rows, indent=2) if args.json else format_rows(rows))
+
 
 if __name__ == "__main__":
-  # Replace this with the correct serial port for your USB-to-TTL adapter
-  #port = '/dev/tty.usbserial-A50285BI'  # Example: '/dev/tty.usbserial-1410'
-  port = "COM3" # For windows usb devices
-  baud_rate = 115200
-
-  with serial.Serial(port, baud_rate, timeout=1) as ser:
-      print("Type an integer to send to the Pico. Type 'exit' to quit.")
-      
-      while True:
-          # Get user input from the terminal
-          user_input = input("Enter a number: ")
-          
-          if user_input.lower() == 'exit':  # Exit the program
-              print("Exiting...")
-              break
-          
-          try:
-              # Ensure the input is a valid integer
-              int(user_input)
-              
-              # Send the number to the Pico
-              ser.write(f"{user_input}\n".encode('utf-8'))
-              
-              # Wait for a response from the Pico
-              response = ser.readline().decode('utf-8').strip()
-              if response:
-                  print(f"Response from Pico: {response}")
-          except ValueError:
-              print("Please enter a valid integer!")
\ No newline at end of file
+    main()